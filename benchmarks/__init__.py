@@ -0,0 +1,5 @@
+"""
+性能基准：合成订单生成器 + 分环节计时。
+
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 100000
+"""
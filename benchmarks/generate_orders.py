@@ -0,0 +1,86 @@
+"""
+合成订单生成器：按真实表格的列和取值分布生成任意行数的订单，用于性能基准。
+
+    python -m benchmarks.generate_orders 100000 -o 订单_100k.xlsx --seed 0
+
+生成的列：订单编号、下单日期、加工工艺、材料厚度、材料材质（含“来料”前缀、不锈钢）、
+未完成数量、生产件数、预计交期（"3.22 15:00" 格式，部分中文冒号、部分为空）、完成量（部分“已完成”）。
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+PROCESSES = ["直管", "异型", "弯头", "三通", "差异化", " 直管 ", "异型 差异化"]
+PROCESS_WEIGHTS = [0.38, 0.30, 0.14, 0.10, 0.03, 0.03, 0.02]
+MATERIALS = ["镀锌板", "来料镀锌板", "冷轧板", "彩钢板", "304不锈钢", "来料304不锈钢", "201不锈钢", "铝板"]
+MATERIAL_WEIGHTS = [0.30, 0.10, 0.18, 0.14, 0.10, 0.05, 0.05, 0.08]
+THICKNESSES = [0.4, 0.5, 0.6, 0.75, 0.8, 1.0, 1.2, 1.5, 2.0]
+THICKNESS_WEIGHTS = [0.05, 0.16, 0.14, 0.14, 0.14, 0.15, 0.10, 0.08, 0.04]
+
+
+def generate_orders(n, seed=0, start="2025-03-21 08:00"):
+    """
+    生成 n 行合成订单。
+    :param n: 行数
+    :param seed: 随机种子（相同种子生成相同订单）
+    :param start: 排产开始时间，预计交期分布在它之后的 0 ~ 30 天（少量已逾期）
+    :return: DataFrame，列与订单信息表格一致
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start)
+
+    # 📌 订单编号：平均每个订单 3 个批次
+    order_ids = pd.Series(rng.integers(1, n // 3 + 2, n)).map("SO{:06d}".format)
+    order_dates = start.normalize() - pd.to_timedelta(rng.integers(0, 30, n), unit="D")
+
+    # 📌 预计交期：约 40% 无交期，其余在开始时间前 2 天到后 30 天，整点或半点，部分用中文冒号
+    due = start.normalize() + pd.to_timedelta(rng.integers(-2, 31, n), unit="D")
+    hours = rng.integers(8, 21, n)
+    minutes = np.where(rng.random(n) < 0.5, "00", "30")
+    colon = np.where(rng.random(n) < 0.1, "：", ":")
+    due_text = (
+        pd.Series(due.month.astype(str)) + "." + pd.Series(due.day.astype(str)) + " "
+        + pd.Series(hours.astype(str)) + colon + minutes
+    )
+    due_text[rng.random(n) < 0.4] = None
+
+    return pd.DataFrame({
+        "订单编号": order_ids,
+        "下单日期": order_dates,
+        "加工工艺": rng.choice(PROCESSES, n, p=PROCESS_WEIGHTS),
+        "材料厚度": rng.choice(THICKNESSES, n, p=THICKNESS_WEIGHTS),
+        "材料材质": rng.choice(MATERIALS, n, p=MATERIAL_WEIGHTS),
+        "未完成数量": np.round(rng.uniform(1, 120, n), 2),
+        "生产件数": rng.integers(1, 300, n),
+        "预计交期": due_text,
+        "完成量": np.where(rng.random(n) < 0.05, "已完成", None),
+    })
+
+
+def write_orders(df, path):
+    """ 用 openpyxl 只写模式写出订单表格（比 DataFrame.to_excel 快，适合百万行） """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(list(df.columns))
+    columns = [df[column].astype(object).where(df[column].notna(), None).tolist() for column in df.columns]
+    for row in zip(*columns):
+        ws.append(row)
+    wb.save(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.generate_orders", description="生成合成订单表格")
+    parser.add_argument("rows", type=int, help="行数")
+    parser.add_argument("-o", "--output", required=True, help="输出 xlsx 路径")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--start", default="2025-03-21 08:00", help="排产开始时间")
+    args = parser.parse_args(argv)
+    write_orders(generate_orders(args.rows, args.seed, args.start), args.output)
+    print(f"✅ 已生成 {args.rows} 行订单: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
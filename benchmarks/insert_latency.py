@@ -0,0 +1,77 @@
+"""
+插单延迟基准：积压订单从 1 万到 30 万行，每次插入几单急单，插单耗时应基本不变。
+
+    python -m benchmarks.insert_latency                          # 默认 1 万、10 万、30 万行
+    python -m benchmarks.insert_latency --sizes 10000 1000000 --batch 5 --inserts 50
+
+每个规模先全量排产并生成状态（不计入），第一次插单建立各设备的插单索引（单独列出），
+之后每次插入 --batch 单新订单（当前时间每次推后 10 分钟），统计 p50 / p90 / 最大耗时；
+各规模的 p50 ÷ 最小规模的 p50 超过 --max-ratio 时返回 1。
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from production_schedule import ScheduleConfig, ScheduleState, schedule
+
+from .generate_orders import generate_orders
+
+DEFAULT_SIZES = [10_000, 100_000, 300_000]
+MAX_RATIO = 2.0  # 最大规模的插单 p50 不超过最小规模的倍数
+
+
+def measure_inserts(size, config, batch=5, inserts=30, seed=0):
+    """
+    对 size 行积压订单连续插单，记录每次插单的耗时。
+    :return: {size, first_ms: 第一次插单（含建索引）, p50_ms, p90_ms, max_ms}
+    """
+    state = ScheduleState.from_result(schedule(generate_orders(size, seed, config.start_time), config), config)
+    now = config.start_time
+    seconds = []
+    for i in range(inserts + 1):
+        orders = generate_orders(batch, seed + 1 + i, now)
+        orders["订单编号"] = [f"插单{i}-{k}" for k in range(batch)]
+        now += pd.Timedelta(minutes=10)
+        started = time.perf_counter()
+        state.insert_orders(orders, now=now)
+        seconds.append(time.perf_counter() - started)
+    steady = np.array(seconds[1:]) * 1000
+    return {
+        "size": size, "first_ms": round(seconds[0] * 1000, 1), "p50_ms": round(float(np.median(steady)), 1),
+        "p90_ms": round(float(np.percentile(steady, 90)), 1), "max_ms": round(float(steady.max()), 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.insert_latency", description="插单延迟基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="积压订单行数")
+    parser.add_argument("--batch", type=int, default=5, help="每次插入的订单数")
+    parser.add_argument("--inserts", type=int, default=30, help="每个规模插单的次数（不含第一次）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--max-ratio", type=float, default=MAX_RATIO, help="p50 ÷ 最小规模 p50 的上限")
+    args = parser.parse_args(argv)
+
+    config = ScheduleConfig()
+    records = []
+    for size in args.sizes:
+        print(f"⏱️ {size:,} 行 ...")
+        records.append(measure_inserts(size, config, args.batch, args.inserts, args.seed))
+
+    base = min(records, key=lambda record: record["size"])["p50_ms"]
+    print(f"{'积压行数':>10}  {'第一次':>10}  {'p50':>8}  {'p90':>8}  {'最大':>8}  {'倍数':>6}")
+    ok = True
+    for record in records:
+        ratio = record["p50_ms"] / base
+        ok &= ratio <= args.max_ratio
+        mark = "✅" if ratio <= args.max_ratio else "❌"
+        print(
+            f"{record['size']:>12,}  {record['first_ms']:>10.1f}ms  {record['p50_ms']:>6.1f}ms  "
+            f"{record['p90_ms']:>6.1f}ms  {record['max_ms']:>6.1f}ms  {ratio:>5.2f} {mark}"
+        )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,146 @@
+"""
+排产服务压测：多个客户端同时 POST /schedule，统计延迟的 p50 / p90 / p99 和吞吐量。
+
+    python -m benchmarks.load_test --rows 500 --requests 200 --concurrency 8 --workers 4
+    python -m benchmarks.load_test --url http://127.0.0.1:8765 --rows 2000   # 压测已经启动的服务
+
+不指定 --url 时在子进程里启动一个服务（python -m production_schedule --serve），压测完关闭。
+每个请求的订单用 generate_orders 按不同的随机种子生成，只用标准库的 http.client，完全离线。
+"""
+import argparse
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from benchmarks.generate_orders import generate_orders
+
+DEFAULT_START = "2025-03-21 08:00"
+
+
+def request_bodies(rows, count, seed=0, start=DEFAULT_START):
+    """
+    生成请求体：count 个不同的订单表（最多 8 种，循环使用）。
+    :return: bytes 列表
+    """
+    bodies = []
+    for i in range(min(count, 8)):
+        orders = generate_orders(rows, seed=seed + i, start=start)
+        payload = {"orders": orders.to_dict("records"), "config": {"start_time": start}}
+        bodies.append(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"))
+    return [bodies[i % len(bodies)] for i in range(count)]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(host, port, timeout=30):
+    """ 等服务的 /health 返回 200 """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"排产服务 {timeout}s 内没有启动")
+
+
+def send(host, port, body):
+    """
+    发送一个排产请求。
+    :return: (延迟秒数, 状态码)
+    """
+    started = time.perf_counter()
+    connection = http.client.HTTPConnection(host, port, timeout=600)
+    try:
+        connection.request("POST", "/schedule", body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        return time.perf_counter() - started, response.status
+    finally:
+        connection.close()
+
+
+def run_load(host, port, bodies, concurrency):
+    """
+    concurrency 个客户端同时发送，直到发完所有请求。
+    :return: 统计字典
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda body: send(host, port, body), bodies))
+    elapsed = time.perf_counter() - started
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    errors = sum(status != 200 for _, status in results)
+    return {
+        "requests": len(results),
+        "concurrency": concurrency,
+        "errors": errors,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p90_ms": round(float(np.percentile(latencies, 90)), 1),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 1),
+        "max_ms": round(float(latencies.max()), 1),
+        "throughput_rps": round(len(results) / elapsed, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.load_test", description="排产服务压测")
+    parser.add_argument("--url", help="已经启动的服务地址，如 http://127.0.0.1:8765；默认在子进程里启动一个")
+    parser.add_argument("--workers", type=int, default=2, help="自动启动服务时的排产进程数")
+    parser.add_argument("--rows", type=int, default=500, help="每个请求的订单行数")
+    parser.add_argument("--requests", type=int, default=100, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=8, help="同时发送请求的客户端数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--json", help="把统计结果追加写入 JSON lines 文件")
+    args = parser.parse_args(argv)
+
+    print(f"📋 生成 {args.requests} 个请求（每个 {args.rows:,} 行）...")
+    bodies = request_bodies(args.rows, args.requests, args.seed)
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = "127.0.0.1", _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "production_schedule", "--serve", str(port), "-j", str(args.workers)],
+            stdout=subprocess.DEVNULL,
+        )
+    try:
+        wait_ready(host, port)
+        send(host, port, bodies[0])  # 预热：进程池启动、第一次导入
+        print(f"🚀 压测 http://{host}:{port}/schedule（{args.concurrency} 个客户端）...")
+        record = run_load(host, port, bodies, args.concurrency)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    record["rows"] = args.rows
+    print(
+        f"✅ {record['requests']} 个请求，失败 {record['errors']}，"
+        f"p50 {record['p50_ms']}ms，p90 {record['p90_ms']}ms，p99 {record['p99_ms']}ms，"
+        f"最慢 {record['max_ms']}ms，吞吐 {record['throughput_rps']} 个/秒"
+    )
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return 0 if record["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
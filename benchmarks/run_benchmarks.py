@@ -0,0 +1,282 @@
+"""
+分环节性能基准：对 1k / 10k / 100k / 1M 行的合成订单，分别记录每个环节的耗时和峰值内存。
+
+    python -m benchmarks.run_benchmarks                          # 默认 1k、10k、100k
+    python -m benchmarks.run_benchmarks --sizes 1000000 --skip-excel
+    python -m benchmarks.run_benchmarks --json results.jsonl      # 每个环节一行 JSON，便于对比回归
+
+环节：生成表格（不计入）→ 读取 → 预处理 → 分配设备 → 排序分组 → 排产 → 拆分 → 输出。
+峰值内存用 tracemalloc 统计（numpy / pandas 的数组分配也会计入）。tracemalloc 会让 openpyxl 这类
+纯 Python 的环节慢很多，所以耗时和内存分两遍跑：第一遍只计时，第二遍只统计内存；只看耗时时加 --no-memory。
+
+峰值 RSS 回归检查（--rss）：每个规模在新的子进程里对合成订单跑一遍 schedule()，
+记录 排产期间 RSS 的增长 ÷ 订单表本身的内存（“表宽倍数”），超过 --max-rss-ratio 时返回 1：
+
+    python -m benchmarks.run_benchmarks --rss --sizes 100000 1000000
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from production_schedule import ScheduleConfig, export_schedule, read_orders, resolve_overdue_splits, schedule
+from production_schedule.reader import CACHE_DIR_NAME
+from production_schedule.assignment import assign_devices
+from production_schedule.pipeline import (
+    ScheduleResult,
+    check_delivery,
+    prepare_orders,
+    project_delivery_times,
+    sort_orders,
+)
+from production_schedule.scheduling import compute_schedule, production_minutes
+
+from .generate_orders import generate_orders, write_orders
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+MAX_RSS_RATIO = 1.0  # 排产期间 RSS 增长不超过订单表内存的倍数（整张表只在合并时多一份）
+
+
+def _rows(result):
+    """ 环节结果的行数：DataFrame / Series 取长度，(待排产, 其他) 这样的元组取第一个 """
+    if isinstance(result, tuple):
+        result = result[0]
+    return len(result) if isinstance(result, (pd.DataFrame, pd.Series)) else None
+
+
+class StageTimer:
+    """ 依次运行各环节，记录 耗时（或峰值内存）/ 行数 """
+
+    def __init__(self, size, memory=False):
+        self.size = size
+        self.memory = memory
+        self.records = []
+
+    def run(self, stage, func, *args, **kwargs):
+        if self.memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        record = {"size": self.size, "stage": stage, "rows": _rows(result)}
+        if self.memory:
+            record["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)  # 环节内新分配的峰值
+            tracemalloc.stop()
+        else:
+            record["seconds"] = round(elapsed, 4)
+        self.records.append(record)
+        return result
+
+
+def benchmark_size(size, work_dir, config, seed=0, excel=True, memory=False):
+    """
+    对一个规模跑完整流程，返回各环节的记录。
+    :param size: 订单行数
+    :param work_dir: 存放生成表格和输出的目录
+    :param config: ScheduleConfig
+    :param seed: 随机种子
+    :param excel: 是否包含读取 / 输出 Excel 两个环节（百万行时这两步最慢，可以跳过）
+    :param memory: False 记录耗时，True 记录峰值内存
+    :return: 记录列表
+    """
+    timer = StageTimer(size, memory)
+    orders = generate_orders(size, seed, config.start_time)
+    if excel:
+        input_file = Path(work_dir) / f"订单_{size}.xlsx"
+        if not input_file.exists():
+            write_orders(orders, input_file)
+        shutil.rmtree(Path(work_dir) / CACHE_DIR_NAME, ignore_errors=True)  # 每一遍都从没有快照开始
+        orders = timer.run("读取", read_orders, input_file, cache=False)
+        timer.run("读取（快照）", read_orders, input_file)  # 第一次生成快照
+        timer.run("读取（快照命中）", read_orders, input_file)
+
+    df, df_other = timer.run("预处理", prepare_orders, orders)
+    df["设备"] = timer.run("分配设备", assign_devices, df)
+    df = df[df["设备"] != ""]
+    df = timer.run("排序分组", sort_orders, df, config.start_time, config.changeover_model)
+
+    def schedule_stage(df):
+        df["生产分钟"] = production_minutes(df)
+        compute_schedule(df, config.calendar, config.start_times(df["设备"].unique()))
+        return check_delivery(df, config.start_time)
+
+    df = timer.run("排产", schedule_stage, df)
+    if config.split_overdue:
+        df = timer.run(
+            "拆分", resolve_overdue_splits, df, config.calendar, config.start_times(df["设备"].unique()),
+            config.changeover_model, config.max_split_rounds, config.split_placement,
+        )
+    else:
+        df["是否拆分"] = False
+    result = ScheduleResult(orders=df, project_delivery=project_delivery_times(df), other=df_other)
+    if excel:
+        timer.run("输出", export_schedule, result, Path(work_dir) / f"优化排产_{size}.xlsx")
+    return timer.records
+
+
+def _proc_status_mb(key):
+    """ /proc/self/status 中的 VmRSS（当前）/ VmHWM（峰值），单位 MB；没有 /proc 时返回 None """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(key + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _reset_peak_rss():
+    """ 把进程的峰值 RSS 重置为当前值（Linux 的 /proc/self/clear_refs），不支持时返回 False """
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _max_rss_mb():
+    """ 进程的峰值 RSS（ru_maxrss），单位 MB；没有 resource 模块（Windows）时返回 None """
+    try:
+        import resource  # 只有类 Unix 系统有，用到时再导入
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_peak_rss(size, config, seed=0):
+    """
+    对 size 行合成订单跑一遍 schedule()，记录排产期间的峰值 RSS。在独立的子进程里调用，前面的环节不影响结果。
+    :return: {size, stage, data_mb: 订单表内存, base_mb: 排产前 RSS, peak_mb: 排产期间峰值 RSS, ratio: 表宽倍数}，
+             读不到 RSS 时（没有 /proc 和 resource 模块）后三项为 None
+    """
+    orders = generate_orders(size, seed, config.start_time)
+    data_mb = orders.memory_usage(deep=True).sum() / 2 ** 20
+    gc.collect()
+    if _reset_peak_rss():
+        base_mb = _proc_status_mb("VmRSS")
+        schedule(orders, config)
+        peak_mb = _proc_status_mb("VmHWM")
+    else:  # 不能重置峰值时用 ru_maxrss，生成订单的峰值也会计入
+        base_mb = _max_rss_mb()
+        schedule(orders, config)
+        peak_mb = _max_rss_mb()
+    if base_mb is None or peak_mb is None:
+        return {
+            "size": size, "stage": "排产峰值RSS", "data_mb": round(data_mb, 1),
+            "base_mb": None, "peak_mb": None, "ratio": None,
+        }
+    return {
+        "size": size, "stage": "排产峰值RSS", "data_mb": round(data_mb, 1), "base_mb": round(base_mb, 1),
+        "peak_mb": round(peak_mb, 1), "ratio": round((peak_mb - base_mb) / data_mb, 2),
+    }
+
+
+def check_peak_rss(sizes, config, seed=0, max_ratio=MAX_RSS_RATIO):
+    """
+    各规模分别在新的子进程（spawn）里测峰值 RSS，并和 max_ratio 比较。
+    :return: (记录列表, 是否全部不超过 max_ratio)
+    """
+    records = []
+    context = multiprocessing.get_context("spawn")
+    for size in sizes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            record = pool.submit(measure_peak_rss, size, config, seed).result()
+        records.append(record)
+        if record["ratio"] is None:
+            print(f"⚠️ {size:>10,} 行  当前系统读不到 RSS（没有 /proc 和 resource 模块），跳过")
+            continue
+        mark = "✅" if record["ratio"] <= max_ratio else "❌"
+        print(
+            f"{mark} {size:>10,} 行  订单表 {record['data_mb']:>8.1f}MB  排产前 {record['base_mb']:>8.1f}MB  "
+            f"峰值 {record['peak_mb']:>8.1f}MB  表宽倍数 {record['ratio']:.2f}（上限 {max_ratio}）"
+        )
+    return records, all(record["ratio"] is None or record["ratio"] <= max_ratio for record in records)
+
+
+def print_summary(records):
+    """ 打印汇总表：每个规模一列 """
+    sizes = list(dict.fromkeys(record["size"] for record in records))
+    stages = list(dict.fromkeys(record["stage"] for record in records))
+    cell = {(record["size"], record["stage"]): record for record in records}
+
+    header = f"{'环节':<14}" + "".join(f"{size:>22,}" for size in sizes)
+    print(header)
+    print("-" * len(header))
+    for stage in stages:
+        line = f"{stage:<14}"
+        for size in sizes:
+            record = cell.get((size, stage))
+            if record is None:
+                line += f"{'-':>22}"
+                continue
+            memory = f" / {record['peak_mb']:>7.1f}MB" if record.get("peak_mb") is not None else ""
+            line += f"{record['seconds']:>10.3f}s{memory:>12}"
+        print(line)
+    totals = "".join(
+        f"{sum(r['seconds'] for r in records if r['size'] == size):>21.3f}s" for size in sizes
+    )
+    print(f"{'合计':<14}{totals}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.run_benchmarks", description="分环节性能基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="订单行数，如 1000 10000 100000 1000000")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--split", action=argparse.BooleanOptionalAction, default=True, help="是否包含拆分环节")
+    parser.add_argument("--skip-excel", action="store_true", help="跳过读取 / 输出 Excel（直接用内存中的合成订单）")
+    parser.add_argument("--no-memory", action="store_true", help="不统计峰值内存（tracemalloc 有额外开销）")
+    parser.add_argument("--work-dir", help="存放生成表格和输出的目录，默认临时目录")
+    parser.add_argument("--json", help="把每个环节的记录追加写入 JSON lines 文件")
+    parser.add_argument("--rss", action="store_true", help="只做峰值 RSS 回归检查（每个规模一个子进程跑 schedule()）")
+    parser.add_argument("--max-rss-ratio", type=float, default=MAX_RSS_RATIO, help="RSS 增长 ÷ 订单表内存 的上限")
+    args = parser.parse_args(argv)
+
+    config = ScheduleConfig(split_overdue=args.split)
+    excel = not args.skip_excel
+
+    if args.rss:
+        records, ok = check_peak_rss(args.sizes, config, args.seed, args.max_rss_ratio)
+        if args.json:
+            with open(args.json, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return 0 if ok else 1
+
+    records = []
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = args.work_dir or tmp
+        for size in args.sizes:
+            print(f"⏱️ {size:,} 行 ...")
+            size_records = benchmark_size(size, work_dir, config, args.seed, excel)
+            if not args.no_memory:
+                print(f"📈 {size:,} 行（内存）...")
+                peaks = benchmark_size(size, work_dir, config, args.seed, excel, memory=True)
+                for record, peak in zip(size_records, peaks):
+                    record["peak_mb"] = peak["peak_mb"]
+            records.extend(size_records)
+
+    print_summary(records)
+    max_rss = _max_rss_mb()
+    if max_rss is None:
+        print("📈 进程峰值内存 (ru_maxrss): 当前系统没有 resource 模块，跳过")
+    else:
+        print(f"📈 进程峰值内存 (ru_maxrss): {max_rss:.1f}MB")
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
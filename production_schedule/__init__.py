@@ -0,0 +1,82 @@
+"""
+生产排产核心模块。
+
+    from production_schedule import ScheduleConfig, export_schedule, read_orders, schedule
+
+    result = schedule(read_orders("3.21订单信息.xlsx"), ScheduleConfig(start_time="2025-03-21 08:00"))
+    export_schedule(result, "3.21优化排产.xlsx")
+"""
+from .assignment import assign_devices
+from .batch import BatchJob, run_batch
+from .changeover import ChangeoverModel, ChangeoverRule, ChangeoverTable, mark_changeovers
+from .config import DEFAULT_WORK_SHIFTS, DEVICES, ScheduleConfig, load_config
+from .due_dates import parse_due_dates
+from .export import export_schedule, output_sheets
+from .incremental import ScheduleState
+from .machines import DEFAULT_MACHINES, YIXING1_THICKNESSES, Machine, MachineRegistry
+from .pipeline import ScheduleResult, merge_device_results, schedule, schedule_device
+from .reader import file_digest, read_orders, read_orders_streaming
+from .result_cache import ResultCache
+from .scenarios import Scenario, ScenarioPlanner, ScenarioReport, load_scenarios
+from .service import RequestError, ScheduleService
+from .scheduling import (
+    CHANGEOVER_MINUTES,
+    PRODUCTION_RATES,
+    compute_schedule,
+    format_duration,
+    production_minutes,
+    schedule_queue,
+)
+from .shift_calendar import ShiftCalendar, from_minutes, to_minutes
+from .splitting import NO_DUE_DATE, debug_move_orders, resolve_overdue_splits, split_marks
+from .watch import FolderWatcher
+
+__all__ = [
+    "BatchJob",
+    "CHANGEOVER_MINUTES",
+    "ChangeoverModel",
+    "ChangeoverRule",
+    "ChangeoverTable",
+    "DEFAULT_MACHINES",
+    "DEFAULT_WORK_SHIFTS",
+    "DEVICES",
+    "FolderWatcher",
+    "Machine",
+    "MachineRegistry",
+    "NO_DUE_DATE",
+    "PRODUCTION_RATES",
+    "RequestError",
+    "ResultCache",
+    "Scenario",
+    "ScenarioPlanner",
+    "ScenarioReport",
+    "ScheduleConfig",
+    "ScheduleResult",
+    "ScheduleService",
+    "ScheduleState",
+    "ShiftCalendar",
+    "YIXING1_THICKNESSES",
+    "assign_devices",
+    "compute_schedule",
+    "debug_move_orders",
+    "export_schedule",
+    "file_digest",
+    "format_duration",
+    "from_minutes",
+    "load_config",
+    "load_scenarios",
+    "mark_changeovers",
+    "merge_device_results",
+    "output_sheets",
+    "parse_due_dates",
+    "production_minutes",
+    "read_orders",
+    "read_orders_streaming",
+    "resolve_overdue_splits",
+    "run_batch",
+    "schedule",
+    "schedule_device",
+    "schedule_queue",
+    "split_marks",
+    "to_minutes",
+]
@@ -0,0 +1,6 @@
+import sys
+
+from .cli import main
+
+if __name__ == "__main__":  # Windows 上进程池的子进程会重新导入本模块，不能再次运行 main
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+设备分配：按设备表（machines.py）把订单分配到各设备池，池内按负荷分配。
+
+规则 2（相同厚度 & 材质沿用原设备）决定了每个 (材料厚度, 材料材质) 组只会落在一台设备上，
+所以真正需要做决定的是“组”，而不是“行”：
+每个组能由哪些设备生产，一次算成 组 × 设备 的布尔掩码；
+只有一台设备能生产的组、达到某台设备优先厚度的组直接分配，
+其余的组按首次出现的顺序（厚度降序）交给负荷最小的可生产设备（负荷相同时 tie_priority 大的优先）。
+负荷最小的设备用优先队列（堆）查找，按可生产设备的组合各建一个堆；
+负荷只增不减，堆顶过期时重新放入当前负荷即可，整体 O(n log m)（n 订单，m 设备）。
+负荷仍按原逐行循环的顺序累加，保证浮点比较（含相等的情况）与逐行结果完全一致。
+"""
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from .machines import MachineRegistry
+from .profiling import profiled
+
+
+def _accumulate(load, values):
+    """ 按顺序逐个累加（与逐行 += 的浮点结果一致） """
+    if len(values) == 0:
+        return load
+    return float(np.add.accumulate(np.concatenate(([load], values)))[-1])
+
+
+class _LoadHeap:
+    """ 一组可生产设备的负荷堆：堆顶是负荷最小（相同时 tie_priority 最大、设备表中靠前）的设备 """
+
+    def __init__(self, machines, ties, loads):
+        self.heap = [(loads[m], -ties[m], m) for m in machines]
+        heapq.heapify(self.heap)
+
+    def least_loaded(self, ties, loads):
+        # 负荷只增不减：堆顶记录的负荷过期时，换成当前负荷重新入堆，直到堆顶是最新的
+        while self.heap[0][0] != loads[self.heap[0][2]]:
+            _, _, m = heapq.heappop(self.heap)
+            heapq.heappush(self.heap, (loads[m], -ties[m], m))
+        return self.heap[0][2]
+
+
+def _assign_pool(df_orders, machines, loads=None):
+    """
+    在一个设备池内分配。
+    :param df_orders: 该池的订单（材料厚度、材料材质 + 各设备数量列），已按厚度降序排列
+    :param machines: 池内的 Machine 列表
+    :param loads: {设备: 已有负荷}，按负荷分配时在此基础上累加，默认都为 0
+    :return: 每行的设备位置（machines 中的下标），没有设备能生产的为 -1
+    """
+    thickness = df_orders["材料厚度"].to_numpy()
+
+    # **🔹 按 (材料厚度, 材料材质) 分组，组号即首次出现的顺序**
+    codes = df_orders.groupby(["材料厚度", "材料材质"], sort=False, dropna=False).ngroup().to_numpy()
+    first_pos = np.unique(codes, return_index=True)[1]
+    key_thickness = thickness[first_pos]
+    key_material = df_orders["材料材质"].to_numpy()[first_pos]
+
+    # **🔹 可生产掩码：组 × 设备，只算一次**
+    eligible = np.column_stack([machine.eligible(key_thickness, key_material) for machine in machines])
+    preferred = np.column_stack([
+        key_thickness >= np.float32(machine.preferred_thickness) if machine.preferred_thickness is not None
+        else np.zeros(len(first_pos), dtype=bool)
+        for machine in machines
+    ]) & eligible
+    key_device = np.full(len(first_pos), -1)
+
+    # **🔹 规则 1：只有一台设备能生产的组、达到优先厚度的组直接分配**
+    count = eligible.sum(axis=1)
+    key_device[count == 1] = eligible[count == 1].argmax(axis=1)
+    has_preferred = (count > 1) & preferred.any(axis=1)
+    key_device[has_preferred] = preferred[has_preferred].argmax(axis=1)
+
+    # **🔹 规则 3：其余的组按首次出现顺序交给负荷最小的可生产设备**
+    balanced = np.flatnonzero((count > 1) & ~has_preferred)
+    if len(balanced) == 0:
+        return key_device[codes]
+    ties = [machine.tie_priority for machine in machines]
+    loads = [float((loads or {}).get(machine.name, 0.0)) for machine in machines]
+    heaps = {}
+    row_loads = np.column_stack([
+        pd.to_numeric(df_orders[machine.quantity_column], errors="coerce").fillna(0).to_numpy(dtype=float) / machine.rate
+        for machine in machines
+    ])
+    done = 0
+    for key in balanced:
+        pos = first_pos[key]
+        # 累加该组首次出现之前所有行的负荷（这些行所属的组都已分配）
+        assigned = key_device[codes[done:pos]]
+        for m in np.unique(assigned[assigned >= 0]):
+            loads[m] = _accumulate(loads[m], row_loads[done:pos, m][assigned == m])
+        done = pos
+        candidates = tuple(np.flatnonzero(eligible[key]))
+        heap = heaps.get(candidates)
+        if heap is None:
+            heap = heaps[candidates] = _LoadHeap(candidates, ties, loads)
+        key_device[key] = heap.least_loaded(ties, loads)
+
+    # **🔹 规则 2：同组的所有行沿用该组的设备**
+    return key_device[codes]
+
+
+@profiled("分配设备")
+def assign_devices(df, machines=None, loads=None):
+    """
+    为订单分配设备。
+    :param df: 含 加工工艺、材料厚度、材料材质 及各设备数量列（未完成数量、生产件数）的 DataFrame
+    :param machines: MachineRegistry 或 Machine 列表，默认 DEFAULT_MACHINES
+    :param loads: {设备: 已有负荷（数量 ÷ 产能）}，如插单时各设备还没开工的订单，默认都从 0 开始
+    :return: 设备 Series（index 同 df），未分配的为空字符串
+    """
+    registry = machines if isinstance(machines, MachineRegistry) else MachineRegistry(machines)
+    devices = pd.Series("", index=df.index, dtype=object)
+
+    for processes, pool in registry.pools():
+        # 该池的订单，先按“材料厚度”降序排列，确保厚的订单优先分配
+        in_pool = registry.pool_mask(processes, df["加工工艺"])
+        columns = {"材料厚度": pd.to_numeric(df["材料厚度"], errors="coerce"), "材料材质": df["材料材质"].astype(str)}
+        for machine in pool if len(pool) > 1 else []:  # 只有一台设备时不需要负荷
+            columns.setdefault(machine.quantity_column, df[machine.quantity_column])
+        df_orders = pd.DataFrame(columns)[in_pool]
+        df_orders = df_orders.sort_values(by="材料厚度", ascending=False)
+        if len(df_orders) == 0:
+            continue
+
+        names = np.array([machine.name for machine in pool] + [""], dtype=object)  # -1 → ""
+        devices.loc[df_orders.index] = names[_assign_pool(df_orders, pool, loads)]
+    return devices
@@ -0,0 +1,182 @@
+"""
+批量排产：一次排产多个车间 / 多天的订单表格，用进程池并行。
+
+    python -m production_schedule "订单/3.*订单信息.xlsx" --jobs 4 --start-from-name
+    python -m production_schedule --manifest jobs.csv --jobs 4 --summary 汇总.csv
+
+清单（CSV，utf-8）列：input（必填）、start_time、output，例如：
+
+    input,start_time,output
+    一车间/3.20订单信息.xlsx,2025-03-20 08:00,
+    二车间/3.20订单信息.xlsx,2025-03-20 13:30,二车间/3.20排产.xlsx
+
+每个表格单独输出一个排产结果，另外写一份汇总表（每个表格一行：订单数、逾期数、拆分数、最晚完工时间、耗时、状态）。
+某个表格出错不影响其他表格，错误信息写在汇总表的 状态 列。
+"""
+import csv
+import glob
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+import pandas as pd
+
+from .due_dates import infer_years
+from .export import export_schedule
+from .pipeline import schedule
+from .reader import read_orders
+
+SUMMARY_COLUMNS = ["输入", "输出", "开工时间", "订单数", "逾期交付", "拆分", "换料", "最晚完工时间", "耗时(s)", "状态"]
+_NAME_DATE = re.compile(r"^(\d{1,2})\.(\d{1,2})")  # 文件名开头的 月.日，如 "3.21订单信息.xlsx"
+
+
+@dataclass
+class BatchJob:
+    """
+    一个排产任务。
+    :param input: 订单表格路径
+    :param output: 输出路径
+    :param start_time: 该表格的开工时间（None 使用 ScheduleConfig.start_time）
+    """
+    input: str
+    output: str
+    start_time: pd.Timestamp = None
+
+
+def default_output_path(input_path):
+    """ 默认输出路径：'3.21订单信息.xlsx' → '3.21优化排产.xlsx'，否则加 '_优化排产' 后缀 """
+    path = Path(input_path)
+    if "订单信息" in path.stem:
+        return path.with_name(path.stem.replace("订单信息", "优化排产") + ".xlsx")
+    return path.with_name(f"{path.stem}_优化排产.xlsx")
+
+
+def start_from_name(input_path, config):
+    """
+    从文件名开头的 月.日 推断开工时间：当天第一个班次开始（年份按 config.start_time 推断）。
+    :return: Timestamp，文件名没有日期时返回 None
+    """
+    match = _NAME_DATE.match(Path(input_path).name)
+    if not match:
+        return None
+    month, day = int(match.group(1)), int(match.group(2))
+    year = int(infer_years([month], config.start_time)[0])
+    first_shift = min(start for start, _ in config.work_shifts)
+    try:
+        return pd.Timestamp(f"{year:04d}-{month:02d}-{day:02d} {first_shift}")
+    except ValueError:
+        return None
+
+
+def expand_inputs(patterns):
+    """ 展开通配符（Windows 命令行不会自动展开），去重并保持顺序 """
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"⚠️ 没有匹配的文件: {pattern}")
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+
+def read_manifest(path):
+    """
+    读取清单 CSV（input, start_time, output）。
+    :return: BatchJob 列表
+    """
+    jobs = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            input_file = (row.get("input") or "").strip()
+            if not input_file:
+                continue
+            start_time = (row.get("start_time") or "").strip()
+            output_file = (row.get("output") or "").strip()
+            jobs.append(BatchJob(
+                input=input_file,
+                output=output_file or str(default_output_path(input_file)),
+                start_time=pd.Timestamp(start_time) if start_time else None,
+            ))
+    return jobs
+
+
+def build_jobs(inputs, config, output=None, infer_start=False):
+    """
+    由输入文件（可含通配符）生成任务。
+    :param inputs: 路径或通配符列表
+    :param config: ScheduleConfig
+    :param output: 输出路径（只有一个输入时可用）
+    :param infer_start: 是否从文件名推断开工时间
+    :return: BatchJob 列表
+    """
+    paths = expand_inputs(inputs)
+    if output and len(paths) > 1:
+        raise ValueError("多个输入文件时不能指定输出路径")
+    return [
+        BatchJob(
+            input=path,
+            output=output or str(default_output_path(path)),
+            start_time=start_from_name(path, config) if infer_start else None,
+        )
+        for path in paths
+    ]
+
+
+def run_job(job, config, cache=True, result_cache=None):
+    """
+    排产一个表格并写出结果（在子进程中运行）。
+    :param result_cache: ResultCache，各进程共用同一个缓存目录
+    :return: 汇总表的一行（字典）
+    """
+    started = time.perf_counter()
+    job_config = replace(config, start_time=job.start_time) if job.start_time is not None else config
+    row = {"输入": job.input, "输出": job.output, "开工时间": job_config.start_time.strftime("%Y-%m-%d %H:%M")}
+    try:
+        result = schedule(read_orders(job.input, cache=cache), job_config, result_cache)
+        export_schedule(result, job.output, result_cache)
+        orders = result.orders
+        last_end = orders["生产结束时间"].max() if len(orders) else pd.NaT
+        row.update({
+            "订单数": len(orders),
+            "逾期交付": int((~orders["按时交付检查"]).sum()),
+            "拆分": int(orders["是否拆分"].sum()),
+            "换料": int(orders["是否换料"].sum()),
+            "最晚完工时间": "" if pd.isna(last_end) else last_end.strftime("%Y-%m-%d %H:%M"),
+            "状态": "完成",
+        })
+    except Exception as e:  # 单个表格出错不影响其他表格
+        row["状态"] = f"失败: {type(e).__name__}: {e}"
+    row["耗时(s)"] = round(time.perf_counter() - started, 3)
+    return row
+
+
+def run_batch(jobs, config, workers=None, cache=True, result_cache=None):
+    """
+    用进程池并行排产多个表格。
+    :param jobs: BatchJob 列表
+    :param config: ScheduleConfig（各任务的开工时间可单独指定）
+    :param workers: 最多同时运行的进程数，默认 CPU 核数；1 表示在当前进程依次运行
+    :param cache: 是否使用表格快照
+    :param result_cache: ResultCache，默认不缓存排产结果
+    :return: 汇总 DataFrame（行顺序同 jobs）
+    """
+    workers = min(workers or os.cpu_count() or 1, len(jobs)) if jobs else 1
+    if workers <= 1:
+        rows = [run_job(job, config, cache, result_cache) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(
+                run_job, jobs, [config] * len(jobs), [cache] * len(jobs), [result_cache] * len(jobs),
+            ))
+    return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+
+
+def write_summary(summary, path):
+    """ 写出汇总表：.xlsx 写 Excel，其他写 CSV（utf-8-sig，Excel 可直接打开） """
+    if str(path).lower().endswith(".xlsx"):
+        summary.to_excel(path, index=False)
+    else:
+        summary.to_csv(path, index=False, encoding="utf-8-sig")
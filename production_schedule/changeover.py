@@ -0,0 +1,172 @@
+"""
+换料模型：换料时间取决于 从哪种料（材质 + 厚度）换到哪种料，可以按设备分别配置。
+
+规则示例（JSON，写在 config.json 的 changeover_rules 里，后面的规则覆盖前面的）：
+
+    [
+        {"same_material": true, "minutes": 8},                    # 同材质只换厚度：8 分钟
+        {"to_material": "不锈钢", "minutes": 30},                   # 换成不锈钢：30 分钟
+        {"device": "异型管机2", "from_thickness": 1.2, "to_thickness": 1.5, "minutes": 10}
+    ]
+
+没有匹配到规则的换料用默认的 changeover_minutes（15 分钟）；材质和厚度都相同不换料（0 分钟）；
+设备队列的第一单总是换料，用默认分钟数。
+
+排产前把一台设备队列里出现的 (材质, 厚度) 编成整数，规则预先展开成 编码 × 编码 的分钟矩阵，
+之后 是否换料 和 换料分钟 都是对矩阵的一次向量化查表，排产和拆分共用。
+"""
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .profiling import profiled
+from .scheduling import CHANGEOVER_MINUTES
+from .schema import as_thickness
+
+
+@dataclass
+class ChangeoverRule:
+    """
+    一条换料规则，未填写的条件表示不限。
+    :param minutes: 换料分钟数
+    :param device: 只对该设备生效
+    :param from_material: 前一单材质包含该文字（如 "不锈钢"）
+    :param to_material: 本单材质包含该文字
+    :param from_thickness: 前一单材料厚度
+    :param to_thickness: 本单材料厚度
+    :param same_material: True 只匹配材质不变的换料，False 只匹配换材质的
+    :param same_thickness: True 只匹配厚度不变的换料，False 只匹配换厚度的
+    """
+    minutes: int
+    device: str = None
+    from_material: str = None
+    to_material: str = None
+    from_thickness: float = None
+    to_thickness: float = None
+    same_material: bool = None
+    same_thickness: bool = None
+
+    def applies_to(self, device):
+        return self.device is None or self.device == device
+
+    def to_dict(self):
+        """ 只保留填写了的字段 """
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
+def _match(materials, thicknesses, material, thickness):
+    """ 对每种料判断是否满足规则的一端（材质包含 material，厚度等于 thickness） """
+    mask = np.ones(len(materials), dtype=bool)
+    if material is not None:
+        mask &= pd.Series(materials, dtype=object).astype(str).str.contains(material, regex=False).to_numpy()
+    if thickness is not None:
+        mask &= as_thickness(thicknesses) == np.float32(thickness)  # 与内部的 float32 厚度一致
+    return mask
+
+
+@dataclass
+class ChangeoverTable:
+    """
+    一台设备队列的换料查表结果。
+    :param codes: 队列中每一行的料编码（(材质, 厚度) 的整数编码）
+    :param matrix: matrix[前一单编码, 本单编码] = 换料分钟，对角线为 0
+    :param first_minutes: 设备第一单的换料分钟
+    """
+    codes: np.ndarray
+    matrix: np.ndarray
+    first_minutes: int
+
+    def changeovers(self, rows, prev_row=None):
+        """
+        按给定顺序计算是否换料和换料分钟。
+        :param rows: 队列顺序（codes 的行位置数组）
+        :param prev_row: 前一单的行位置（None 表示 rows[0] 是设备第一单）
+        :return: (是否换料 布尔数组, 换料分钟 int64 数组)
+        """
+        codes = self.codes[rows]
+        if len(codes) == 0:
+            return np.zeros(0, dtype=bool), np.zeros(0, dtype=np.int64)
+        prev = np.empty_like(codes)
+        prev[1:] = codes[:-1]
+        prev[0] = codes[0] if prev_row is None else self.codes[prev_row]
+        flags = prev != codes
+        minutes = self.matrix[prev, codes]
+        if prev_row is None:  # 第一单总是换料
+            flags[0] = True
+            minutes[0] = self.first_minutes
+        return flags, minutes
+
+
+@dataclass
+class ChangeoverModel:
+    """
+    换料模型。
+    :param default_minutes: 没有匹配规则时的换料分钟数
+    :param rules: ChangeoverRule 列表（也可以是字典），后面的覆盖前面的
+    """
+    default_minutes: int = CHANGEOVER_MINUTES
+    rules: list = field(default_factory=list)
+
+    def __post_init__(self):
+        self.rules = [rule if isinstance(rule, ChangeoverRule) else ChangeoverRule(**rule) for rule in self.rules]
+
+    def compile(self, device, thicknesses, materials):
+        """
+        把一台设备队列里的料编码，并把规则展开成分钟矩阵。
+        :param device: 设备
+        :param thicknesses: 队列的材料厚度
+        :param materials: 队列的材料材质
+        :return: ChangeoverTable
+        """
+        keys = pd.DataFrame({
+            "材料材质": pd.Series(materials, dtype=object).to_numpy(),
+            "材料厚度": pd.to_numeric(pd.Series(thicknesses), errors="coerce").to_numpy(),
+        })
+        codes = keys.groupby(["材料材质", "材料厚度"], sort=False, dropna=False).ngroup().to_numpy()
+        first_pos = np.unique(codes, return_index=True)[1]
+        key_materials = keys["材料材质"].to_numpy()[first_pos]
+        key_thicknesses = keys["材料厚度"].to_numpy()[first_pos]
+
+        size = len(first_pos)
+        matrix = np.full((size, size), self.default_minutes, dtype=np.int64)
+        rules = [rule for rule in self.rules if rule.applies_to(device)]
+        if rules:
+            material_codes = pd.factorize(key_materials)[0]
+            same_material = material_codes[:, None] == material_codes[None, :]
+            same_thickness = key_thicknesses[:, None] == key_thicknesses[None, :]
+            for rule in rules:
+                mask = np.outer(
+                    _match(key_materials, key_thicknesses, rule.from_material, rule.from_thickness),
+                    _match(key_materials, key_thicknesses, rule.to_material, rule.to_thickness),
+                )
+                if rule.same_material is not None:
+                    mask &= same_material == rule.same_material
+                if rule.same_thickness is not None:
+                    mask &= same_thickness == rule.same_thickness
+                matrix[mask] = rule.minutes
+        np.fill_diagonal(matrix, 0)
+        return ChangeoverTable(codes=codes, matrix=matrix, first_minutes=self.default_minutes)
+
+
+@profiled("判断换料")
+def mark_changeovers(df, model=None):
+    """
+    按设备判断是否换料并计算换料分钟（df 的行顺序即各设备的生产顺序）。
+    :param df: 含 设备、材料厚度、材料材质 的 DataFrame（原地写入 是否换料、换料分钟）
+    :param model: ChangeoverModel，默认每次换料 15 分钟
+    :return: df
+    """
+    model = model or ChangeoverModel()
+    flags = np.zeros(len(df), dtype=bool)
+    minutes = np.zeros(len(df), dtype=np.int64)
+    devices = df["设备"].to_numpy()
+    thickness = df["材料厚度"].to_numpy()
+    material = df["材料材质"].to_numpy()
+    for device in pd.unique(devices):
+        positions = np.flatnonzero(devices == device)
+        table = model.compile(device, thickness[positions], material[positions])
+        flags[positions], minutes[positions] = table.changeovers(np.arange(len(positions)))
+    df["是否换料"] = flags
+    df["换料分钟"] = minutes
+    return df
@@ -0,0 +1,177 @@
+"""
+命令行入口：
+
+    python -m production_schedule 3.21订单信息.xlsx --start "2025-03-21 08:00"
+    python -m production_schedule a.xlsx b.xlsx --config config.json
+    python -m production_schedule "订单/*订单信息.xlsx" --jobs 4 --start-from-name   # 批量，进程池并行
+    python -m production_schedule --manifest jobs.csv --jobs 4 --summary 汇总.csv
+    python -m production_schedule 3.21订单信息.xlsx --state 排产状态.pkl                      # 全量排产并保存状态
+    python -m production_schedule 急单.xlsx --state 排产状态.pkl --now "2025-03-21 10:00"    # 插单，只重排受影响的后缀
+    python -m production_schedule 3.21订单信息.xlsx --scenarios 情景.json                      # 情景对比（加班、推迟开工…）
+    python -m production_schedule 3.21订单信息.xlsx --result-cache .schedule_results           # 只重排输入有变化的设备
+    python -m production_schedule --watch 订单 --start-from-name                              # 常驻监视文件夹，放入表格自动排产
+    python -m production_schedule --serve 8765 -j 4                                            # 本地 HTTP / JSON 排产服务
+
+同一个进程里依次排产多个表格，只需付一次 Python / pandas / openpyxl 的启动开销；
+--jobs 大于 1 时用进程池并行排产，见 batch.py。
+"""
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+from . import profiling
+from .batch import build_jobs, default_output_path, expand_inputs, read_manifest, run_batch, write_summary
+from .config import ScheduleConfig, load_config
+from .export import export_schedule
+from .incremental import ScheduleState
+from .pipeline import schedule
+from .reader import read_orders
+from .result_cache import DEFAULT_MAX_MB, ResultCache
+from .scenarios import ScenarioPlanner, load_scenarios
+from .service import ScheduleService
+from .watch import DEFAULT_PATTERN, FolderWatcher
+
+SUMMARY_FILE_NAME = "排产汇总.csv"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="production_schedule", description="生产排产")
+    parser.add_argument("inputs", nargs="*", help="订单信息 Excel 文件（可用通配符，如 '订单/*.xlsx'）")
+    parser.add_argument("-o", "--output", help="输出 Excel 路径（仅一个输入文件时可用）")
+    parser.add_argument("-c", "--config", help="排产参数 JSON 文件")
+    parser.add_argument("--start", help="设备开工时间，如 '2025-03-21 08:00'")
+    parser.add_argument("--start-from-name", action="store_true", help="从文件名开头的 月.日 推断开工时间（当天第一个班次）")
+    parser.add_argument("--manifest", help="批量清单 CSV（input, start_time, output），代替 inputs")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="同时排产的进程数（默认 1，依次排产）")
+    parser.add_argument("--device-workers", type=int, help="每个表格内各设备并行排产的进程数（结果与依次排产相同）")
+    parser.add_argument("--summary", help=f"汇总表路径（.csv / .xlsx），多个表格时默认写到第一个输出目录的 {SUMMARY_FILE_NAME}")
+    parser.add_argument("--no-split", action="store_true", help="不拆分逾期订单前的无交期订单（3.21 版本逻辑）")
+    parser.add_argument("--optimize", type=float, metavar="SECONDS", help="每台设备用局部搜索优化生产顺序的秒数（减少逾期和换料）")
+    parser.add_argument("--no-cache", action="store_true", help="不读取 / 生成 .schedule_cache 快照，每次重新解析表格")
+    parser.add_argument("--result-cache", metavar="DIR", help="排产结果缓存目录：输入和配置没有变化的设备直接用缓存的结果，见 result_cache.py")
+    parser.add_argument("--result-cache-mb", type=float, default=DEFAULT_MAX_MB, help=f"排产结果缓存的大小上限（MB，默认 {DEFAULT_MAX_MB}）")
+    parser.add_argument("--state", help="排产状态文件：不存在时全量排产并保存；存在时把输入表格作为插单 / 改单增量排产")
+    parser.add_argument("--now", help="插单时的当前时间（之前已开工的订单不动），默认当前时间")
+    parser.add_argument("--scenarios", help="情景 JSON 文件：按同一生产顺序批量评估多组班次 / 开工时间，输出情景对比表")
+    parser.add_argument("--watch", metavar="DIR", help="常驻监视文件夹：有新的 / 修改过的订单表格时自动排产，输出写在旁边，见 watch.py")
+    parser.add_argument("--watch-pattern", default=DEFAULT_PATTERN, help=f"监视的文件名通配符（默认 '{DEFAULT_PATTERN}'）")
+    parser.add_argument("--watch-interval", type=float, default=0.5, help="监视文件夹的轮询间隔（秒，默认 0.5）")
+    parser.add_argument("--watch-settle", type=float, default=0.5, help="表格连续多少秒没有变化才认为写完（秒，默认 0.5）")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="启动本地 HTTP / JSON 排产服务（POST /schedule），PORT 为 0 时由系统分配空闲端口，-j 为排产进程数，见 service.py")
+    parser.add_argument("--host", default="127.0.0.1", help="排产服务的监听地址（默认只接受本机）")
+    parser.add_argument("--profile", action="store_true", help="记录每个环节的耗时、行数、内存变化，结束时打印汇总表")
+    parser.add_argument("--profile-log", help="把每个环节的记录追加写入 JSON lines 文件（隐含 --profile）")
+    return parser
+
+
+def run_with_state(args, config):
+    """
+    --state：状态文件不存在时全量排产并保存状态；存在时读取状态（排产参数沿用状态里的），
+    把输入表格依次作为插单 / 改单，只重排受影响设备的后缀。
+    """
+    inputs = expand_inputs(args.inputs)
+    if not inputs:
+        raise SystemExit("⚠️ 没有要排产的订单表格")
+    state_path = Path(args.state)
+    cache = not args.no_cache
+    if state_path.exists():
+        state = ScheduleState.load(state_path)
+        now = pd.Timestamp(args.now) if args.now else pd.Timestamp.now().floor("min")
+        for path in inputs:
+            affected = state.insert_orders(read_orders(path, cache=cache), now=now)
+            changes = "、".join(f"{device} 第 {first + 1} 单起" for device, first in affected.items()) or "无变化"
+            print(f"📥 已插入 {path}：{changes}")
+        output = args.output or state_path.with_suffix(".xlsx")
+    else:
+        if len(inputs) > 1:
+            raise SystemExit("⚠️ 首次生成排产状态只能指定一个订单表格")
+        state = ScheduleState.from_result(schedule(read_orders(inputs[0], cache=cache), config), config)
+        output = args.output or default_output_path(inputs[0])
+    state.save(state_path)
+    export_schedule(state.result(), output)
+    print(f"✅ 排产已完成，结果保存至 {output}，排产状态保存至 {state_path}")
+    return 0
+
+
+def run_scenarios(args, config):
+    """ --scenarios：排产一次，批量评估情景，输出“情景对比”表格（汇总 + 各情景的项目交付时间） """
+    inputs = expand_inputs(args.inputs)
+    if len(inputs) != 1:
+        raise SystemExit("⚠️ 情景对比只能指定一个订单表格")
+    planner = ScenarioPlanner.from_orders(read_orders(inputs[0], cache=not args.no_cache), config)
+    report = planner.evaluate(load_scenarios(args.scenarios))
+    output = args.output or Path(inputs[0]).with_name(f"{Path(inputs[0]).stem}_情景对比.xlsx")
+    report.to_excel(output)
+    print(report.summary.to_string(index=False))
+    print(f"✅ 情景对比已完成，结果保存至 {output}")
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    profile = args.profile or args.profile_log
+    config = load_config(args.config) if args.config else ScheduleConfig()
+    if args.device_workers:
+        config.device_workers = args.device_workers
+    if profile and (args.jobs > 1 or config.device_workers > 1):
+        raise SystemExit("⚠️ --profile 只能在 --jobs 1、--device-workers 1 时使用（子进程里的环节无法记录）")
+
+    if args.start:
+        config.start_time = ScheduleConfig(start_time=args.start).start_time
+    if args.no_split:
+        config.split_overdue = False
+    if args.optimize is not None:
+        config.optimize_seconds = args.optimize
+
+    if args.serve is not None:
+        ScheduleService(config, args.jobs, args.host, args.serve).run()
+        return 0
+
+    if args.watch:
+        result_cache = ResultCache(args.result_cache, args.result_cache_mb) if args.result_cache else None
+        FolderWatcher(
+            args.watch, config, args.watch_pattern, args.watch_interval, args.watch_settle,
+            infer_start=args.start_from_name, result_cache=result_cache, cache=not args.no_cache,
+        ).run()
+        return 0
+
+    if args.state or args.scenarios:
+        profiler = profiling.enable(args.profile_log) if profile else None
+        try:
+            return run_with_state(args, config) if args.state else run_scenarios(args, config)
+        finally:
+            if profiler is not None:
+                profiling.disable()
+                print(profiler.summary())
+
+    try:
+        if args.manifest:
+            jobs = read_manifest(args.manifest)
+        else:
+            jobs = build_jobs(args.inputs, config, args.output, args.start_from_name)
+    except ValueError as e:
+        raise SystemExit(f"⚠️ {e}")
+    if not jobs:
+        raise SystemExit("⚠️ 没有要排产的订单表格")
+
+    profiler = profiling.enable(args.profile_log) if profile else None
+    try:
+        result_cache = ResultCache(args.result_cache, args.result_cache_mb) if args.result_cache else None
+        summary = run_batch(jobs, config, args.jobs, cache=not args.no_cache, result_cache=result_cache)
+    finally:
+        if profiler is not None:
+            profiling.disable()
+            print(profiler.summary())
+
+    for row in summary.itertuples(index=False):
+        if row.状态 == "完成":
+            print(f"✅ 排产已完成，结果保存至 {row.输出}")
+        else:
+            print(f"❌ {row.输入} 排产{row.状态}")
+
+    summary_path = args.summary or (Path(jobs[0].output).parent / SUMMARY_FILE_NAME if len(jobs) > 1 else None)
+    if summary_path:
+        write_summary(summary, summary_path)
+        print(f"📋 汇总表已保存至 {summary_path}")
+    return 0 if (summary["状态"] == "完成").all() else 1
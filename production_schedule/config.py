@@ -0,0 +1,134 @@
+"""
+排产参数：开始时间、工作班次、换料时间、是否拆分逾期订单、设备表等。
+可以在代码里直接构造 ScheduleConfig，也可以从 JSON 文件读取。
+"""
+import copy
+import json
+from dataclasses import dataclass, field, fields
+
+import pandas as pd
+
+from .changeover import ChangeoverModel, ChangeoverRule
+from .machines import DEFAULT_MACHINES, MachineRegistry
+from .scheduling import CHANGEOVER_MINUTES
+from .shift_calendar import ShiftCalendar
+from .splitting import SPLIT_PLACEMENTS
+
+DEVICES = [machine.name for machine in DEFAULT_MACHINES]  # 默认设备（也是输出表单的顺序）
+
+DEFAULT_WORK_SHIFTS = [
+    ("08:00", "12:00"),
+    ("13:30", "17:30"),
+    ("18:00", "21:00"),
+]
+
+
+@dataclass
+class ScheduleConfig:
+    """
+    排产参数。
+    :param start_time: 各设备的默认开工时间
+    :param work_shifts: 工作班次，休息时间即班次之间的空档
+    :param changeover_minutes: 每次换料增加的分钟数（没有匹配 changeover_rules 时）
+    :param changeover_rules: 换料规则，如 [{"to_material": "不锈钢", "minutes": 30}]，见 changeover.py
+    :param split_overdue: 是否循环拆分逾期订单前的无交期订单（3.22 版本逻辑）
+    :param max_split_rounds: 拆分循环的最多轮数
+    :param split_placement: 拆分订单的位置，"group"（回到本组，与 3.22 版本相同）或 "tail"（移到队尾），见 splitting.py
+    :param device_start_times: 单独指定某些设备的开工时间，如 {"异型管机2": "2025-03-21 13:30"}
+    :param device_workers: 分配设备后各设备队列并行排产的进程数，1 表示在当前进程依次排产
+    :param machines: 设备表（Machine 或字典的列表），默认 DEFAULT_MACHINES，见 machines.py
+    :param optimize_seconds: 每台设备局部搜索优化生产顺序的时间（秒），0 表示不优化，见 optimizer.py
+    """
+    start_time: pd.Timestamp = pd.Timestamp("2025-03-21 08:00")
+    work_shifts: list = field(default_factory=lambda: list(DEFAULT_WORK_SHIFTS))
+    changeover_minutes: int = CHANGEOVER_MINUTES
+    changeover_rules: list = field(default_factory=list)
+    split_overdue: bool = True
+    max_split_rounds: int = 1000
+    split_placement: str = "group"
+    device_start_times: dict = field(default_factory=dict)
+    device_workers: int = 1
+    machines: list = field(default_factory=lambda: copy.deepcopy(DEFAULT_MACHINES))
+    optimize_seconds: float = 0
+
+    def __post_init__(self):
+        self.start_time = pd.Timestamp(self.start_time)
+        self.work_shifts = [tuple(shift) for shift in self.work_shifts]
+        self.changeover_rules = [
+            rule if isinstance(rule, ChangeoverRule) else ChangeoverRule(**rule) for rule in self.changeover_rules
+        ]
+        self.device_start_times = {device: pd.Timestamp(ts) for device, ts in self.device_start_times.items()}
+        self.machines = MachineRegistry(self.machines).machines
+        if self.split_placement not in SPLIT_PLACEMENTS:
+            raise ValueError(f"split_placement 只能是 {' / '.join(SPLIT_PLACEMENTS)}：{self.split_placement!r}")
+
+    @property
+    def registry(self):
+        """ 由 machines 生成的设备表 """
+        return MachineRegistry(self.machines)
+
+    @property
+    def calendar(self):
+        """ 由 work_shifts 生成的班次日历 """
+        return ShiftCalendar(self.work_shifts)
+
+    def calendar_for(self, device):
+        """ 某台设备的班次日历：设备表里单独设置了 work_shifts 时用设备的班次 """
+        registry = self.registry
+        if device in registry and registry[device].work_shifts is not None:
+            return ShiftCalendar(registry[device].work_shifts)
+        return self.calendar
+
+    @property
+    def changeover_model(self):
+        """ 由 changeover_minutes 和 changeover_rules 生成的换料模型 """
+        return ChangeoverModel(self.changeover_minutes, self.changeover_rules)
+
+    def start_times(self, devices=None):
+        """
+        各设备的开工时间：device_start_times > 设备表的 start_time > start_time。
+        :param devices: 设备列表，默认设备表中的所有设备
+        :return: {设备: 开工时间}
+        """
+        registry = self.registry
+        devices = registry.names if devices is None else devices
+        times = {}
+        for device in devices:
+            machine_start = registry[device].start_time if device in registry else None
+            default = machine_start if machine_start is not None else self.start_time
+            times[device] = self.device_start_times.get(device, default)
+        return times
+
+    @classmethod
+    def from_dict(cls, data):
+        """ 从字典构造，忽略未知的键 """
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+    def to_dict(self):
+        """ 转换为可写入 JSON 的字典 """
+        return {
+            "start_time": self.start_time.strftime("%Y-%m-%d %H:%M"),
+            "work_shifts": [list(shift) for shift in self.work_shifts],
+            "changeover_minutes": self.changeover_minutes,
+            "changeover_rules": [rule.to_dict() for rule in self.changeover_rules],
+            "split_overdue": self.split_overdue,
+            "max_split_rounds": self.max_split_rounds,
+            "split_placement": self.split_placement,
+            "device_start_times": {
+                device: ts.strftime("%Y-%m-%d %H:%M") for device, ts in self.device_start_times.items()
+            },
+            "device_workers": self.device_workers,
+            "machines": [machine.to_dict() for machine in self.machines],
+            "optimize_seconds": self.optimize_seconds,
+        }
+
+
+def load_config(path):
+    """
+    从 JSON 文件读取排产参数。
+    :param path: JSON 文件路径
+    :return: ScheduleConfig
+    """
+    with open(path, encoding="utf-8") as f:
+        return ScheduleConfig.from_dict(json.load(f))
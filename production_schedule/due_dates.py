@@ -0,0 +1,66 @@
+"""
+预计交期解析：'3.22 15:00' → 2025-03-22 15:00。
+
+表格里只写月.日，年份按排产开始时间推断：与开始月份相差超过 6 个月的，
+算作上一年 / 下一年（12 月开始排产时，'1.5' 是下一年的 1 月 5 日；1 月开始排产时，'12.28' 是上一年的）。
+同一个交期字符串在订单里往往重复很多次，只对不同的字符串解析一次，
+所有字符串用一次 str.extract + 一次 pd.to_datetime（固定格式）完成。
+"""
+import numpy as np
+import pandas as pd
+
+# 月.日 + 空格 + 时:分(:秒)，兼容中文冒号
+DUE_DATE_PATTERN = r"^\s*(?P<month>\d{1,2})\.(?P<day>\d{1,2})\s+(?P<hour>\d{1,2})[:：](?P<minute>\d{1,2})(?:[:：](?P<second>\d{1,2}))?\s*$"
+DUE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def infer_years(months, reference):
+    """
+    按排产开始时间推断年份：月份相差超过 6 个月的跨年。
+    :param months: 月份数组
+    :param reference: 排产开始时间
+    :return: 年份数组
+    """
+    diff = np.asarray(months, dtype=np.int64) - reference.month
+    return reference.year - (diff > 6) + (diff < -6)
+
+
+def parse_due_dates(values, reference=None):
+    """
+    解析预计交期，空值和无法解析的为 NaT；无法解析的非空值汇总打印一次。
+    :param values: 预计交期 Series（字符串；已经是日期时间的原样返回）
+    :param reference: 排产开始时间，用于推断年份，默认今天
+    :return: datetime64[ns] Series（index 同 values）
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    reference = pd.Timestamp.today() if reference is None else pd.Timestamp(reference)
+
+    # **📌 只解析不同的字符串**
+    codes, uniques = pd.factorize(values.astype("string").str.strip())
+    uniques = pd.Series(uniques, dtype="string")
+    parts = uniques.str.extract(DUE_DATE_PATTERN)
+    matched = parts["month"].notna().to_numpy()
+
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+    if matched.any():
+        fields = parts[matched].fillna({"second": "0"})
+        years = pd.Series(infer_years(fields["month"].astype(np.int64), reference), index=fields.index)
+        text = (
+            years.astype("string") + "-" + fields["month"].str.zfill(2) + "-" + fields["day"].str.zfill(2) + " "
+            + fields["hour"].str.zfill(2) + ":" + fields["minute"].str.zfill(2) + ":" + fields["second"].str.zfill(2)
+        )
+        parsed[matched] = pd.to_datetime(text, format=DUE_DATE_FORMAT, errors="coerce").to_numpy()
+
+    # **📌 汇总报告无法解析的交期（空字符串不算）**
+    failed = parsed.isna().to_numpy() & (uniques != "").to_numpy()
+    if failed.any():
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))[failed]
+        examples = "，".join(f"{text}（{count} 单）" for text, count in zip(uniques[failed][:10], counts[:10]))
+        more = "…" if failed.sum() > 10 else ""
+        print(f"⚠️ {int(counts.sum())} 单预计交期无法解析，按无交期处理: {examples}{more}")
+
+    # 末尾补一个 NaT，缺失值（编码 -1）取到它；全部为空时 parsed 为空也能取值
+    result = np.append(parsed.to_numpy(), np.datetime64("NaT", "ns"))[codes]
+    return pd.Series(result, index=values.index, dtype="datetime64[ns]")
@@ -0,0 +1,159 @@
+"""
+输出排产结果：按设备分表写入 Excel，并美化表格（列宽、居中、边框、表头加粗、逾期交付标红）。
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from .profiling import profiled, stage
+from .scheduling import format_duration
+from .schema import to_display
+
+TIME_COLUMNS = ["预计交期", "生产开始时间", "生产结束时间"]  # 写成日期时间单元格（DATETIME_FORMAT）的列
+# 输出时不需要的临时列
+INTERNAL_COLUMNS = ["设备", "交期排序", "是否有交期", "组1", "组2", "是否拆分", "组最早交期", "其他设备不可生产", "项目交付时间", "换料分钟"]
+
+
+@profiled("格式化输出")
+def format_orders(df):
+    """
+    输出前的格式化：内部类型转为显示文字（是 / 否、按时交付 / 逾期交付等），
+    预计交期、生产开始 / 结束时间统一为 datetime（写成日期时间单元格，缺失为空单元格），
+    生产分钟转为“X小时 Y分钟”的生产时间，加回材质的‘来料’前缀，删除临时列 原始材料材质。
+    :param df: 排产结果 orders
+    :return: 新的 DataFrame
+    """
+    out = to_display(df)
+    if "下单日期" in out:
+        out["下单日期"] = pd.to_datetime(out["下单日期"], errors="coerce").dt.strftime("%Y-%m-%d").fillna("")
+    for column in TIME_COLUMNS:
+        out[column] = pd.to_datetime(out[column], errors="coerce")
+
+    # **📌 生产时间只在输出时格式化，放在原 生产分钟 列的位置**
+    position = out.columns.get_loc("生产分钟")
+    out.insert(position, "生产时间", format_duration(out.pop("生产分钟")))
+
+    # **📌 输出前加回前缀**
+    incoming = out["原始材料材质"].astype(str).str.startswith("来料").to_numpy()
+    out["材料材质"] = np.where(incoming, "来料" + out["材料材质"].astype(str), out["材料材质"])
+    del out["原始材料材质"]
+    return out
+
+
+def output_sheets(result):
+    """
+    生成各输出表单。
+    :param result: ScheduleResult
+    :return: {表单名: DataFrame}，顺序为 各设备、项目交付时间、其他
+    """
+    orders = format_orders(result.orders)
+
+    devices = orders["设备"].to_numpy()
+    for column in orders.columns.intersection(INTERNAL_COLUMNS):
+        del orders[column]  # 原地删除临时列，不复制整张表
+    sheets = {device: orders[devices == device] for device in result.devices}
+    sheets["项目交付时间"] = result.project_delivery
+    sheets["其他"] = result.other
+    return sheets
+
+
+# **📌 美化表格输出：边框、居中、表头加粗在写入时一次设置，逾期交付用条件格式标红**
+THIN_BORDER = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
+CENTER = Alignment(horizontal="center", vertical="center")
+HEADER_FONT = Font(bold=True)
+RED_FILL = PatternFill(start_color="FF9999", end_color="FF9999", fill_type="solid")  # 红色背景填充
+DATETIME_FORMAT = "YYYY-MM-DD HH:MM:SS"  # 与 pd.ExcelWriter 的默认日期时间格式一致
+
+
+def _named_styles():
+    """ 表头 / 普通单元格 / 日期时间单元格的命名样式；单元格只引用样式，不再逐个设置字体、边框、对齐 """
+    return {
+        "header": NamedStyle(name="排产表头", font=HEADER_FONT, border=THIN_BORDER, alignment=CENTER),
+        "cell": NamedStyle(name="排产单元格", border=THIN_BORDER, alignment=CENTER),
+        "datetime": NamedStyle(name="排产日期时间", border=THIN_BORDER, alignment=CENTER, number_format=DATETIME_FORMAT),
+    }
+
+
+def column_widths(sheet):
+    """
+    根据 DataFrame 计算列宽：表头和所有非空值中最长的显示宽度 + 2（中文字符算 2 个单位）。
+    :param sheet: 要写入的 DataFrame
+    :return: 列宽列表，顺序同 sheet.columns
+    """
+    widths = []
+    for position, column in enumerate(sheet.columns):
+        values = sheet.iloc[:, position]
+        values = values[values.notna()]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            text = values.dt.strftime("%Y-%m-%d %H:%M:%S")
+        else:
+            text = values[values.astype(bool)].astype(str)  # 0、空字符串不参与计算
+        text = pd.concat([pd.Series([str(column)]), text], ignore_index=True)
+        lengths = text.str.len() + text.str.count(r"[^\x00-\xff]")
+        widths.append(int(lengths.max()) + 2)  # 适配 Excel 的字体宽度
+    return widths
+
+
+def _column_values(values):
+    """ 把一列转换为写入用的 Python 值，缺失值为 None """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        values = values.astype(object)
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _write_sheet(wb, sheet_name, sheet, styles):
+    """ 写入一个表单：先设列宽，再逐行写入带样式的单元格 """
+    ws = wb.create_sheet(sheet_name)
+    for position, width in enumerate(column_widths(sheet), start=1):
+        ws.column_dimensions[get_column_letter(position)].width = width
+
+    def styled(value, style="cell"):
+        cell = WriteOnlyCell(ws, value)
+        cell.style = styles["datetime" if isinstance(value, datetime) else style].name
+        return cell
+
+    ws.append([styled(str(column), "header") for column in sheet.columns])
+    columns = [_column_values(sheet.iloc[:, position]) for position in range(sheet.shape[1])]
+    for row in zip(*columns):
+        ws.append([styled(value) for value in row])
+
+    # **📌 “按时交付检查”为“逾期交付”的单元格标红（条件格式，不逐个单元格填充）**
+    if "按时交付检查" in sheet.columns and len(sheet):
+        letter = get_column_letter(sheet.columns.get_loc("按时交付检查") + 1)
+        ws.conditional_formatting.add(
+            f"{letter}2:{letter}{len(sheet) + 1}",
+            CellIsRule(operator="equal", formula=['"逾期交付"'], fill=RED_FILL),
+        )
+
+
+@profiled("输出 Excel")
+def export_schedule(result, output_file, cache=None):
+    """
+    写出排产结果并美化表格（列宽、居中、边框、表头加粗、逾期交付标红），只写一遍文件。
+    :param result: ScheduleResult
+    :param output_file: 输出 Excel 路径
+    :param cache: ResultCache，排产结果没有变化时直接复制缓存的 Excel，默认不使用
+    """
+    if cache is not None:
+        key = cache.workbook_key(result)
+        if cache.copy_workbook(key, output_file):
+            print(f"📊 排产结果没有变化，使用缓存的 Excel: {output_file}")
+            return
+    wb = Workbook(write_only=True)
+    styles = _named_styles()
+    for style in styles.values():
+        wb.add_named_style(style)
+    for sheet_name, sheet in output_sheets(result).items():
+        with stage("写入表单", rows=len(sheet), sheet=sheet_name):
+            _write_sheet(wb, sheet_name, sheet, styles)
+    with stage("保存文件"):
+        wb.save(output_file)
+    if cache is not None:
+        cache.store_workbook(key, output_file)
+    print(f"📊 Excel 格式优化完成: {output_file}")
@@ -0,0 +1,661 @@
+"""
+增量排产：保存排产状态，插单 / 改单时只重排受影响设备的后缀，已开工的订单不动。
+
+    state = ScheduleState.from_result(schedule(read_orders("3.21订单信息.xlsx"), config), config)
+    state.save("排产状态.pkl")
+
+    # 10:00 来了急单
+    state = ScheduleState.load("排产状态.pkl")
+    state.insert_orders(read_orders("急单.xlsx"), now="2025-03-21 10:00")
+    state.save("排产状态.pkl")
+    export_schedule(state.result(), "3.21优化排产.xlsx")
+
+状态包括：排产参数、各设备的队列（生产顺序 + 开始 / 结束时间）、各设备已冻结（now 之前已开工）的单数、
+各设备最后一单的结束时间（device_last_end_time）。
+
+插单规则（每台设备只在未冻结的部分插入）：
+- 已有的 (材料厚度, 材料材质) 组沿用原设备，新组按设备表分配，各设备的负荷从未开工的订单算起；
+- 批次里出现的订单编号视为改单：未开工的旧行（以及“其他”表单里的旧行）删掉，按新行重新插入；
+  已开工（有一行已冻结）的订单不能再改，批次里这些行忽略并提示；
+- 按交期找到新单的位置：第一段 组最早交期 晚于新单交期的段之前（exclusive_first 的设备，其他设备不可生产的订单仍在前）；
+- 这个位置之前（未冻结部分）已有同组的一段时，插进这段里（有交期优先、按交期），不增加换料；否则单独成段。
+之后只从第一个变化的位置起，重算是否换料、开始 / 结束时间、是否逾期；
+插单不会重新走拆分逾期订单的循环，需要时全量重排。
+
+第一次插单（或冻结）时每台设备建一个插单索引（_DeviceIndex），之后插单只改索引，耗时与积压的单数无关：
+位置从冻结处往后按块查找，找到就停；开始 / 结束时间 freeze 只补算到 now，
+队列表格（queues、result()、save()）用到时才补算完并按新顺序重建。
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .assignment import assign_devices
+from .config import ScheduleConfig
+from .due_dates import parse_due_dates
+from .pipeline import FRONT_COLUMN, ScheduleResult, prepare_orders, project_delivery_times
+from .profiling import profiled
+from .scheduling import production_minutes, schedule_queue
+from .schema import CATEGORY_COLUMNS, match_categories
+from .shift_calendar import NS_PER_MINUTE, to_minutes
+from .splitting import NO_DUE_DATE
+
+STATE_VERSION = 2  # 2: 队列改用 category / bool / float32 列（见 schema.py）
+# 新订单插入前先填上的排产列（类型与队列一致），插入后从第一个变化的位置起重算
+PLACEHOLDERS = {
+    "是否换料": False, "换料分钟": 0, "生产开始时间": pd.NaT, "生产结束时间": pd.NaT,
+    "按时交付检查": True, "是否拆分": False, "项目交付时间": pd.NaT,
+}
+# 插单索引按行号保存的列：{名称: dtype}
+INDEX_COLUMNS = {
+    "number": object,       # 订单编号
+    "code": np.int64,       # 组1
+    "group2": np.int64,     # 组2
+    "earliest": np.int64,   # 组最早交期（分钟）
+    "due": np.int64,        # 交期排序（分钟）
+    "has_due": bool,        # 是否有交期
+    "due_set": bool,        # 预计交期 不为空（判断逾期用）
+    "front": np.int64,      # exclusive_first 的设备上其他设备也能生产的为 1（排在后面）
+    "minutes": np.int64,    # 生产分钟
+    "load": np.float64,     # 负荷：数量 ÷ 产能
+    "thickness": np.float32,
+    "material": object,
+    "prev": np.int64,       # 计算换料时的前一单行号（-1 为设备第一单，-2 为还没算过）
+    "flag": bool,           # 是否换料
+    "changeover": np.int64,  # 换料分钟
+    "start": np.int64,      # 生产开始时间（分钟）
+    "end": np.int64,        # 生产结束时间（分钟）
+    "on_time": bool,        # 按时交付检查
+}
+SCAN_ROWS = 64  # 查找插入位置时第一块的行数，之后每块翻倍
+SCHEDULE_ROWS = 4096  # 补算开始 / 结束时间时每块的行数
+
+
+def _minutes(values):
+    """ datetime 列 → 分钟整数数组（已经是 datetime64 时不再解析） """
+    values = np.asarray(values)
+    if values.dtype.kind != "M":
+        values = pd.to_datetime(values).to_numpy()
+    return values.astype("datetime64[ns]").astype(np.int64) // NS_PER_MINUTE
+
+
+def _group_key(thickness, material):
+    """ (材料厚度, 材料材质) 作为字典的键：厚度转成浮点，缺失统一为 None """
+    thickness = pd.to_numeric(thickness, errors="coerce")
+    return (None if pd.isna(thickness) else float(thickness), None if pd.isna(material) else material)
+
+
+class _DeviceIndex:
+    """
+    一台设备的插单索引。
+    各列按行号保存在只追加的数组里（行号即 frames 依次拼接后的行位置），rows 是当前的生产顺序；
+    valid 之前的位置换料和开始 / 结束时间已算好，之后的按块补算。
+    :param device: 设备
+    :param frame: 设备当前的队列
+    :param config: ScheduleConfig
+    """
+
+    def __init__(self, device, frame, config):
+        registry = config.registry
+        self.device = device
+        self.machine = registry[device] if device in registry else None
+        self.exclusive = self.machine is not None and self.machine.exclusive_first
+        self.calendar = config.calendar_for(device)
+        self.start_minute = to_minutes(config.start_times([device])[device])
+        self.model = config.changeover_model
+        self.frames = [frame]
+        self.columns = frame.columns
+        self.data = {name: np.empty(0, dtype=dtype) for name, dtype in INDEX_COLUMNS.items()}
+        self.size = 0
+        n = len(frame)
+        self._append(self._static_columns(frame), {
+            "code": frame["组1"].to_numpy(dtype=np.int64),
+            "group2": frame["组2"].to_numpy(dtype=np.int64),
+            "earliest": _minutes(frame["组最早交期"]),
+            "prev": np.arange(n) - 1,
+            "flag": frame["是否换料"].to_numpy(dtype=bool),
+            "changeover": frame["换料分钟"].to_numpy(dtype=np.int64),
+            "start": _minutes(frame["生产开始时间"]),
+            "end": _minutes(frame["生产结束时间"]),
+            "on_time": frame["按时交付检查"].to_numpy(dtype=bool),
+        })
+        self.rows = np.arange(n)
+        self.valid = n
+        self.floors = []  # [[行号, 最早开工分钟, 位置]]：插单时的 now，补算到这一单时开工不早于它
+        # 组2：同组沿用第一次出现时的组2，新组接在最大的组2 后面（删掉的组也不再复用编号）
+        codes, first = np.unique(self.data["code"][:n], return_index=True)
+        self.group2_of = dict(zip(codes.tolist(), self.data["group2"][first].tolist()))
+        self.max_group2 = int(self.data["group2"][:n].max(initial=-1))
+        self.locations = {}  # {订单编号: [行号]}，改单时找旧行
+        for row, number in enumerate(self.data["number"][:n]):
+            self.locations.setdefault(number, []).append(row)
+        self.cache = frame
+
+    def _static_columns(self, frame):
+        """ 插入后不再变化的列 """
+        only_machine = frame[FRONT_COLUMN].to_numpy(dtype=bool)
+        due_dates = np.asarray(frame["预计交期"].to_numpy(), dtype="datetime64[ns]")
+        if self.machine is not None:
+            quantity = pd.to_numeric(frame[self.machine.quantity_column], errors="coerce").fillna(0).to_numpy(dtype=float)
+            load = quantity / self.machine.rate
+        else:
+            load = np.zeros(len(frame))
+        return {
+            "number": frame["订单编号"].to_numpy(dtype=object),
+            "due": _minutes(frame["交期排序"]),
+            "has_due": frame["是否有交期"].to_numpy(dtype=bool),
+            "due_set": ~np.isnat(due_dates),
+            "front": (self.exclusive & ~only_machine).astype(np.int64),  # exclusive_first 的设备：其他设备不可生产的（0）排在前
+            "minutes": frame["生产分钟"].to_numpy(dtype=np.int64),
+            "load": load,
+            "thickness": frame["材料厚度"].to_numpy(),
+            "material": frame["材料材质"].to_numpy(dtype=object),
+        }
+
+    def _append(self, *parts):
+        """ 追加行（各列等长），返回新行的行号；容量不够时翻倍 """
+        columns = {name: values for part in parts for name, values in part.items()}
+        count = len(columns["number"])
+        end = self.size + count
+        for name, array in self.data.items():
+            if len(array) < end:
+                grown = np.empty(max(end, 2 * len(array)), dtype=array.dtype)
+                grown[:self.size] = array[:self.size]
+                self.data[name] = array = grown
+            if name in columns:
+                array[self.size:end] = columns[name]
+        rows = np.arange(self.size, end)
+        self.size = end
+        return rows
+
+    def _find(self, lo, hi, test):
+        """ 从位置 lo 起按块（先小后大）找第一个 test(lo, hi) 为 True 的位置，找不到返回 hi """
+        size = SCAN_ROWS
+        while lo < hi:
+            stop = min(lo + size, hi)
+            hit = np.flatnonzero(test(lo, stop))
+            if hit.size:
+                return lo + int(hit[0])
+            lo = stop
+            size *= 2
+        return hi
+
+    def pending_load(self, frozen, removed):
+        """ 未冻结部分的负荷，removed（要删除的位置）不计 """
+        keep = np.ones(len(self.rows) - frozen, dtype=bool)
+        keep[removed - frozen] = False
+        return float(self.data["load"][self.rows[frozen:][keep]].sum())
+
+    def find_rows(self, numbers, frozen):
+        """ 未冻结部分里订单编号在 numbers 中的位置（升序） """
+        rows = [row for number in numbers for row in self.locations.get(number, ())]
+        if not rows:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(np.isin(self.rows[frozen:], rows)) + frozen
+
+    def edit(self, frozen, removed, new_rows, codes, now_minute):
+        """
+        删除改单的旧行、在未冻结部分插入新行。
+        :param frozen: 队列前面已冻结的单数
+        :param removed: 要删除的位置数组（升序，都不小于 frozen）
+        :param new_rows: 新订单（组1 为 codes）
+        :param codes: 新订单的组1
+        :param now_minute: 当前时间（分钟），重算的第一单不早于它开工
+        :return: 第一个变化的位置，没有变化为 None
+        """
+        first = None
+        # **🔹 改单：删除未冻结部分里同订单编号的旧行**
+        if len(removed):
+            numbers = self.data["number"]
+            for row in self.rows[removed].tolist():
+                rows = self.locations[numbers[row]]
+                rows.remove(row)
+                if not rows:
+                    del self.locations[numbers[row]]
+            self.rows = np.delete(self.rows, removed)
+            first = int(removed[0])
+            for floor in self.floors:
+                floor[2] -= int(np.searchsorted(removed, floor[2]))
+
+        # **🔹 新行按 (交期, 行号) 依次插入未冻结部分**
+        if len(new_rows):
+            # 组2、组最早交期 在 frame() 里按索引写回，这里只占位，类型与队列一致
+            self.frames.append(new_rows.assign(组1=codes, 组2=0, 组最早交期=pd.NaT).reindex(columns=self.columns))
+            n = len(new_rows)
+            added = self._append(self._static_columns(new_rows), {"code": codes, "prev": np.full(n, -2)})
+            for row in sorted(added.tolist(), key=lambda r: (self.data["due"][r], r)):
+                pos = self._place(frozen, row)
+                self.rows = np.insert(self.rows, pos, row)
+                self.locations.setdefault(self.data["number"][row], []).append(row)
+                first = pos if first is None else min(first, pos)
+                for floor in self.floors:
+                    floor[2] += floor[2] >= pos
+        if first is None:
+            return None
+
+        # **🔹 从第一个变化的位置起等到用到时再重算，开工不早于 now**
+        self.floors = [floor for floor in self.floors if floor[2] < first and floor[0] in self.rows[floor[2]:floor[2] + 1]]
+        if first < len(self.rows):
+            self.floors.append([int(self.rows[first]), now_minute, first])
+        self.valid = min(self.valid, first)
+        self.cache = None
+        return first
+
+    def _place(self, frozen, row):
+        """ 新行（已写入 组1）在未冻结部分的位置，同时写入它的 组2 和 组最早交期 """
+        data = self.data
+        rows = self.rows
+        code, group2, earliest = data["code"], data["group2"], data["earliest"]
+        front, due, has_due = data["front"], data["due"], data["has_due"]
+        c, f, d, h = code[row], front[row], due[row], has_due[row]
+
+        def run_later(lo, hi):
+            # 单独成段时的位置：第一段组最早交期晚于新单交期的段之前（冻结处总是段起点）
+            ids = rows[lo:hi]
+            codes = code[rows[lo - 1:hi]] if lo > frozen else np.concatenate(([-1], code[ids]))
+            later = earliest[ids] > d
+            if self.exclusive:
+                later = (front[ids] > f) | ((front[ids] == f) & later)
+            return (codes[1:] != codes[:-1]) & later
+
+        pos = self._find(frozen, len(rows), run_later)
+        a = self._find(frozen, pos, lambda lo, hi: code[rows[lo:hi]] == c)
+        if a < pos:
+            # 这个位置之前已有同组的一段：插进第一段，有交期优先，交期早的在前
+            b = self._find(a + 1, len(rows), lambda lo, hi: code[rows[lo:hi]] != c)
+
+            def later_in_run(lo, hi):
+                ids = rows[lo:hi]
+                return (has_due[ids] < h) | ((has_due[ids] == h) & (due[ids] > d))
+
+            pos = self._find(a, b, later_in_run)
+            earliest[row] = earliest[rows[a]]
+            group2[row] = group2[rows[a]]
+        else:
+            earliest[row] = d
+            group2[row] = self.group2_of.setdefault(int(c), self.max_group2 + 1)
+        self.max_group2 = max(self.max_group2, int(group2[row]))
+        return pos
+
+    def advance(self, until=None):
+        """
+        从 valid 起按块补算换料、开始 / 结束时间和是否逾期。
+        :param until: 算到开工时间不早于 until（分钟）的一单为止，None 表示算完
+        """
+        rows = self.rows
+        data = self.data
+        if until is not None and self.valid and data["start"][rows[self.valid - 1]] >= until:
+            return
+        while self.valid < len(rows):
+            lo = self.valid
+            start = self.start_minute if lo == 0 else int(data["end"][rows[lo - 1]])
+            if self.floors and self.floors[0][2] == lo:
+                start = max(start, self.floors.pop(0)[1])
+            hi = min(lo + SCHEDULE_ROWS, len(rows), self.floors[0][2] if self.floors else len(rows))
+            self._schedule(lo, hi, start)
+            self.valid = hi
+            if until is not None and data["start"][rows[hi - 1]] >= until:
+                break
+
+    def _schedule(self, lo, hi, start):
+        """ 计算位置 lo..hi 的换料（只算前一单变了的行）、开始 / 结束时间和是否逾期 """
+        data = self.data
+        rows = self.rows[lo:hi]
+        before = np.empty(len(rows), dtype=np.int64)
+        before[1:] = rows[:-1]
+        before[0] = self.rows[lo - 1] if lo else -1
+        changed = np.flatnonzero(data["prev"][rows] != before)
+        if changed.size:
+            flags, minutes = self._changeovers(before[changed], rows[changed])
+            data["flag"][rows[changed]] = flags
+            data["changeover"][rows[changed]] = minutes
+            data["prev"][rows[changed]] = before[changed]
+        starts, ends = schedule_queue(self.calendar, start, data["minutes"][rows], data["changeover"][rows])
+        data["start"][rows] = starts
+        data["end"][rows] = ends
+        data["on_time"][rows] = ~(data["due_set"][rows] & (data["due"][rows] < ends))
+
+    def _changeovers(self, before, rows):
+        """ 每行相对于前一单 before（-1 为设备第一单）的是否换料和换料分钟：只对这几对料编码查表 """
+        data = self.data
+        has_prev = before >= 0
+        pairs = np.concatenate((before[has_prev], rows))
+        table = self.model.compile(self.device, data["thickness"][pairs], data["material"][pairs])
+        codes = table.codes[has_prev.sum():]
+        prev = codes.copy()
+        prev[has_prev] = table.codes[:has_prev.sum()]
+        flags = prev != codes
+        minutes = table.matrix[prev, codes]
+        flags[~has_prev] = True  # 第一单总是换料
+        minutes[~has_prev] = table.first_minutes
+        return flags, minutes
+
+    def started(self, frozen, now_minute):
+        """ now 之前已开工的单数（先补算到 now）：开始时间单调不减，按位置二分查找 """
+        self.advance(now_minute)
+        start = self.data["start"]
+        lo, hi = frozen, self.valid
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if start[self.rows[mid]] < now_minute:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _match_base(self, frame):
+        """ 插入的一段表格对齐到第一段的类别（第一段的类别在插单时已经包含了各段的取值） """
+        base = self.frames[0]
+        for column in CATEGORY_COLUMNS:
+            if column in frame and isinstance(base[column].dtype, pd.CategoricalDtype) \
+                    and not frame[column].dtype == base[column].dtype:
+                frame[column] = frame[column].cat.set_categories(base[column].cat.categories)
+        return frame
+
+    def frame(self):
+        """ 按当前顺序重建的队列（补算完所有时间；没有再插单时直接返回上次的结果） """
+        if self.cache is None:
+            self.advance()
+            frames = [self._match_base(frame) for frame in self.frames if len(frame)] or self.frames[:1]
+            table = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            table = table.take(self.rows).reset_index(drop=True)
+            columns = {name: values[self.rows] for name, values in self.data.items()}
+            table["组1"] = columns["code"]
+            table["组2"] = columns["group2"]
+            for column, name in [("组最早交期", "earliest"), ("生产开始时间", "start"), ("生产结束时间", "end")]:
+                table[column] = (columns[name] * NS_PER_MINUTE).astype("datetime64[ns]")
+            table["是否换料"] = columns["flag"]
+            table["换料分钟"] = columns["changeover"]
+            table["按时交付检查"] = columns["on_time"]
+            self.cache = table
+        return self.cache
+
+
+class ScheduleState:
+    """
+    排产状态。
+    :param config: ScheduleConfig
+    :param queues: {设备: 按生产顺序排列的订单}
+    :param other: “其他”表单
+    :param frozen: {设备: 队列前面已冻结的单数}
+    """
+
+    def __init__(self, config, queues, other, frozen=None):
+        self.config = config
+        self.other = other  # 插单追加的部分先放在 _other_parts 里，用到时才拼接
+        self.frozen = dict(frozen or {})
+        self._queues = dict(queues)
+        self._devices = None  # {设备: _DeviceIndex}，第一次插单 / 冻结时建立
+        self._groups = None
+        self._started = None  # 已开工（有一行已冻结）的订单编号
+        self._other_numbers = None  # “其他”表单里的订单编号
+
+    @property
+    def other(self):
+        """ “其他”表单 """
+        if len(self._other_parts) > 1:
+            self._other_parts = [pd.concat(self._other_parts, ignore_index=True)]
+        return self._other_parts[0]
+
+    @other.setter
+    def other(self, value):
+        self._other_parts = [value]
+
+    @property
+    def queues(self):
+        """ {设备: 按生产顺序排列的订单}，插单后用到时才重建 """
+        if self._devices is None:
+            return self._queues
+        return {device: index.frame() for device, index in self._devices.items()}
+
+    def _indexes(self):
+        """ {设备: _DeviceIndex}，第一次用到时由各设备队列建立 """
+        if self._devices is None:
+            self._devices = {
+                device: _DeviceIndex(device, queue, self.config) for device, queue in self._queues.items()
+            }
+            self._started = set()
+            for device, index in self._devices.items():
+                self._started.update(index.data["number"][index.rows[:self._frozen(device)]].tolist())
+        return self._devices
+
+    def _frozen(self, device):
+        index = self._indexes()[device]
+        return min(self.frozen.get(device, 0), len(index.rows))
+
+    def _group_index(self):
+        """ {(设备池, 材料厚度, 材料材质): (设备, 组1)}，第一次插单时由各设备队列生成，之后随插单更新 """
+        if self._groups is None:
+            pool_of = self._pool_of()
+            self._groups = {}
+            for device, queue in self._queues.items():
+                unique = queue.drop_duplicates(["材料厚度", "材料材质"])
+                for thickness, material, group1 in zip(unique["材料厚度"], unique["材料材质"], unique["组1"]):
+                    self._groups[(pool_of.get(device),) + _group_key(thickness, material)] = (device, int(group1))
+        return self._groups
+
+    def _pool_of(self):
+        """ {设备: 设备池编号} """
+        return {machine.name: i for i, (_, pool) in enumerate(self.config.registry.pools()) for machine in pool}
+
+    @classmethod
+    def from_result(cls, result, config=None):
+        """ 由 schedule() 的结果生成状态 """
+        config = config or ScheduleConfig()
+        orders = result.orders
+        queues = {
+            device: orders[orders["设备"] == device].reset_index(drop=True)
+            for device in pd.unique(orders["设备"])
+        }
+        return cls(config=config, queues=queues, other=result.other, frozen={device: 0 for device in queues})
+
+    @property
+    def device_last_end_time(self):
+        """ {设备: 最后一单的结束时间}，没有订单的设备为开工时间 """
+        times = self.config.start_times()
+        for device, queue in self.queues.items():
+            if len(queue):
+                times[device] = queue["生产结束时间"].iloc[-1]
+        return times
+
+    def freeze(self, now):
+        """
+        冻结 now 之前已开工的订单（只增不减）。
+        :param now: 当前时间
+        """
+        now_minute = to_minutes(pd.Timestamp(now))
+        for device, index in self._indexes().items():
+            frozen = self._frozen(device)
+            started = index.started(frozen, now_minute)
+            if started > frozen:
+                self._started.update(index.data["number"][index.rows[frozen:started]].tolist())
+            self.frozen[device] = max(self.frozen.get(device, 0), started)
+
+    def result(self):
+        """ 当前状态的 ScheduleResult（设备按名称排列，与拆分后的全量排产一致） """
+        queues = self.queues
+        frames = [queues[device] for device in sorted(queues)]
+        orders = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        project_delivery_df = project_delivery_times(orders)
+        return ScheduleResult(orders=orders, project_delivery=project_delivery_df, other=self.other,
+                              devices=self.config.registry.names)
+
+    def save(self, path):
+        """ 写入状态文件（先写临时文件再替换，写到一半不会损坏旧状态） """
+        path = Path(path)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        pd.to_pickle({
+            "version": STATE_VERSION,
+            "config": self.config.to_dict(),
+            "queues": self.queues,
+            "other": self.other,
+            "frozen": self.frozen,
+        }, tmp)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """ 读取状态文件 """
+        data = pd.read_pickle(path)
+        if data.get("version") != STATE_VERSION:
+            raise ValueError(f"不支持的排产状态版本: {data.get('version')}")
+        return cls(
+            config=ScheduleConfig.from_dict(data["config"]),
+            queues=data["queues"],
+            other=data["other"],
+            frozen=data["frozen"],
+        )
+
+    def _removed_rows(self, numbers):
+        """ {设备: 要删除的位置数组}：未冻结部分里订单编号在 numbers 里的旧行（改单） """
+        return {
+            device: index.find_rows(numbers, self._frozen(device)) for device, index in self._indexes().items()
+        }
+
+    def _pending_loads(self, removed):
+        """
+        各设备还没开工（未冻结）的订单的负荷（数量 ÷ 产能，与 assign_devices 相同），改单要删掉的旧行不计。
+        :param removed: _removed_rows 的结果
+        :return: {设备: 负荷}
+        """
+        return {
+            device: index.pending_load(self._frozen(device), removed[device])
+            for device, index in self._indexes().items() if device in self.config.registry
+        }
+
+    def _known_groups(self, df):
+        """
+        已有 (材料厚度, 材料材质) 组在同一设备池里的原设备：按 (设备池, 材料厚度, 材料材质) 与组表合并一次。
+        :param df: 已分配设备的新订单
+        :return: 原设备数组（object），新组为 None
+        """
+        pool_of = self._pool_of()
+        groups = self._group_index()
+        known = pd.DataFrame(
+            [(pool, thickness, np.nan if material is None else material, device)
+             for (pool, thickness, material), (device, _) in groups.items()],
+            columns=["设备池", "材料厚度", "材料材质", "原设备"],
+        ).astype({"设备池": float, "材料厚度": float, "材料材质": object})
+        keys = pd.DataFrame({
+            "设备池": df["设备"].map(pool_of).to_numpy(dtype=float),
+            "材料厚度": pd.to_numeric(df["材料厚度"], errors="coerce").to_numpy(dtype=float),
+            "材料材质": df["材料材质"].to_numpy(dtype=object),
+        })
+        matched = keys.merge(known, how="left", on=["设备池", "材料厚度", "材料材质"])["原设备"]
+        return matched.to_numpy(dtype=object)
+
+    def _skip_started(self, df):
+        """ 去掉已开工订单的改单行，并提示 """
+        if "订单编号" not in df or not len(df):
+            return df
+        started = df["订单编号"].isin(self._started).to_numpy()
+        if started.any():
+            numbers = pd.unique(df["订单编号"][started])
+            more = " 等" if len(numbers) > 5 else ""
+            print(f"⚠️ {len(numbers)} 单已开工，忽略改单: {', '.join(map(str, numbers[:5]))}{more}")
+        return df[~started]
+
+    def _prepare_batch(self, df_new):
+        """
+        预处理新订单：分配设备（已有的组沿用原设备，新组按各设备未开工的负荷分配）、解析交期、计算生产分钟。
+        已开工订单的改单行忽略。
+        :return: (新订单, 其他订单, {设备: 要删除的位置数组（改单的旧行）}, 改单的订单编号)
+        """
+        registry = self.config.registry
+        self._indexes()
+        df, df_other = prepare_orders(self._skip_started(df_new))
+        other_numbers = set(df_other["订单编号"]) if "订单编号" in df_other else set()
+        numbers = set(df["订单编号"]) | other_numbers
+        removed = self._removed_rows(numbers)
+        df["设备"] = assign_devices(df, registry, self._pending_loads(removed))
+
+        # **🔹 已有的 (材料厚度, 材料材质) 组沿用同一设备池里的原设备**
+        # （差异化 / 已完成 这类没有设备能生产的行仍然不排）
+        assigned = df["设备"].to_numpy(dtype=object)
+        known = self._known_groups(df)
+        df["设备"] = np.where(pd.isna(known) | (assigned == ""), assigned, known)
+        df = df[df["设备"] != ""].copy()
+        df["设备"] = pd.Categorical(df["设备"], categories=registry.names)
+        if set(df["订单编号"]) | other_numbers != numbers:  # 没有设备能生产的新行不算改单，不删旧行
+            numbers = set(df["订单编号"]) | other_numbers
+            removed = self._removed_rows(numbers)
+
+        df["预计交期"] = parse_due_dates(df["预计交期"], self.config.start_time)
+        df["交期排序"] = df["预计交期"].fillna(NO_DUE_DATE)
+        df["是否有交期"] = (df["交期排序"] < NO_DUE_DATE).to_numpy()
+        df["生产分钟"] = production_minutes(df, registry.rates)
+        df = df.assign(**PLACEHOLDERS)
+        df[FRONT_COLUMN] = False
+        for device in pd.unique(df["设备"]):
+            mask = (df["设备"] == device).to_numpy()
+            df.loc[mask, FRONT_COLUMN] = registry.only_machine(
+                device, df["材料厚度"].to_numpy()[mask], df["材料材质"].to_numpy()[mask],
+            )
+        return df, df_other, removed, numbers
+
+    def _replace_other(self, numbers, df_other):
+        """ “其他”表单：删掉被改单的旧行，追加这一批的其他订单（先查订单编号集合，没有旧行时不扫描整张表） """
+        if self._other_numbers is None:
+            self._other_numbers = set(self.other["订单编号"]) if "订单编号" in self.other else set()
+        if not self._other_numbers.isdisjoint(numbers):
+            self.other = self.other[~self.other["订单编号"].isin(numbers).to_numpy()].reset_index(drop=True)
+            self._other_numbers -= set(numbers)
+        if len(df_other):
+            self._other_parts.append(df_other)
+            self._other_numbers.update(df_other["订单编号"])
+
+    @profiled("插单")
+    def insert_orders(self, df_new, now=None):
+        """
+        插入新订单 / 修改未开工的订单，只重排受影响设备从第一个变化位置起的后缀。
+        :param df_new: 新订单（与 read_orders 的结果格式相同）
+        :param now: 当前时间，之前已开工的订单冻结；默认 config.start_time
+        :return: {设备: 第一个变化的位置}
+        """
+        now = pd.Timestamp(now) if now is not None else self.config.start_time
+        self.freeze(now)
+        batch, batch_other, removed, numbers = self._prepare_batch(df_new)
+        indexes = self._indexes()
+        # 新订单和各设备的队列（第一段表格和重建过的表格）类别一致，拼接后仍是 category 列；
+        # 之后插入的各段在 frame() 里对齐到第一段的类别
+        references = {id(frame): frame for index in indexes.values() for frame in (index.frames[0], index.cache)
+                      if frame is not None}
+        batch = match_categories(batch, list(references.values()))
+        self._replace_other(numbers, batch_other)
+
+        affected = {}
+        devices = set(pd.unique(batch["设备"])) | {device for device, rows in removed.items() if len(rows)}
+        for device in sorted(devices):
+            first = self._insert_device(device, batch[batch["设备"] == device], removed.get(device), now)
+            if first is not None:
+                affected[device] = first
+        return affected
+
+    def _insert_device(self, device, new_rows, removed, now):
+        """
+        在一台设备的未冻结部分删除改单的旧行、插入新行；返回第一个变化的位置。
+        :param removed: 要删除的位置数组，None 表示都保留
+        """
+        indexes = self._indexes()
+        if device not in indexes:
+            template = next((index.columns for index in indexes.values()), new_rows.columns)
+            indexes[device] = _DeviceIndex(device, new_rows.iloc[:0].reindex(columns=template), self.config)
+        new_rows = new_rows.reset_index(drop=True)
+
+        # **🔹 组1：同一设备内 (材料厚度, 材料材质) 的编号，已有的组沿用，新组接在后面**
+        groups = self._group_index()
+        pool = self._pool_of().get(device)
+        codes = np.zeros(len(new_rows), dtype=np.int64)
+        next_code = max((code for owner, code in groups.values() if owner == device), default=-1) + 1
+        for i, (thickness, material) in enumerate(zip(new_rows["材料厚度"], new_rows["材料材质"])):
+            key = (pool,) + _group_key(thickness, material)
+            if key not in groups:
+                groups[key] = (device, next_code)
+                next_code += 1
+            codes[i] = groups[key][1]
+
+        removed = removed if removed is not None else np.empty(0, dtype=np.int64)
+        return indexes[device].edit(self._frozen(device), removed, new_rows, codes, to_minutes(now))
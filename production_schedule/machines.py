@@ -0,0 +1,182 @@
+"""
+设备表：每台设备的产量、能生产的订单（加工工艺、厚度、材质）、分配偏好、班次和开工时间。
+
+默认设备表与原来写死的规则一致：
+
+    直管机      直管订单，按 生产件数 计算，90 / 小时
+    异型管机1   其他订单，按 未完成数量 计算，50 / 小时，只能生产厚度 {0.5, 0.75, 0.6, 0.8, 1.0}，不能生产不锈钢
+    异型管机2   其他订单，按 未完成数量 计算，80 / 小时，厚度 ≥ 1.0 优先分配，负荷相同时优先，
+                异型管机1 不能生产的订单排在队列最前
+
+增加设备只需在 config.json 的 machines 里加一项，例如：
+
+    {"name": "异型管机3", "rate": 60, "thicknesses": [0.5, 0.6], "excluded_materials": ["不锈钢", "铜"],
+     "start_time": "2025-03-21 13:30", "work_shifts": [["13:30", "17:30"], ["18:00", "21:00"]]}
+
+加工工艺（processes）相同的设备组成一个“设备池”，池内按负荷分配，见 assignment.py。
+"""
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .schema import as_thickness
+
+YIXING1_THICKNESSES = {0.5, 0.75, 0.6, 0.8, 1.0}  # 异型管机1 能生产的厚度
+STRAIGHT_PIPE_RATE = 90  # 直管机 每小时产量
+YIXING1_RATE = 50  # 异型管机1 每小时产量
+YIXING2_RATE = 80  # 异型管机2 每小时产量
+EXCLUDED_PROCESSES = ["差异化"]  # 不参与排产的加工工艺
+
+
+@dataclass
+class Machine:
+    """
+    一台设备。
+    :param name: 设备名（也是输出表单名）
+    :param rate: 每小时产量
+    :param quantity_column: 按哪一列的数量计算生产时间和负荷
+    :param processes: 负责的加工工艺，如 ["直管"]；None 表示其余所有工艺（差异化除外）
+    :param thicknesses: 能生产的材料厚度，None 表示不限
+    :param excluded_materials: 不能生产的材质（材质包含该文字即不能生产）
+    :param preferred_thickness: 厚度不小于该值的组直接分配给这台设备，不比较负荷
+    :param tie_priority: 负荷相同时优先分配给该值大的设备
+    :param exclusive_first: 队列中只有这台设备能生产的订单排在最前
+    :param start_time: 开工时间，None 使用 ScheduleConfig.start_time
+    :param work_shifts: 工作班次，None 使用 ScheduleConfig.work_shifts
+    """
+    name: str
+    rate: float
+    quantity_column: str = "未完成数量"
+    processes: list = None
+    thicknesses: list = None
+    excluded_materials: list = field(default_factory=list)
+    preferred_thickness: float = None
+    tie_priority: int = 0
+    exclusive_first: bool = False
+    start_time: pd.Timestamp = None
+    work_shifts: list = None
+
+    def __post_init__(self):
+        if self.start_time is not None:
+            self.start_time = pd.Timestamp(self.start_time)
+        if self.work_shifts is not None:
+            self.work_shifts = [tuple(shift) for shift in self.work_shifts]
+
+    def eligible(self, thickness, material):
+        """
+        能否生产：厚度在可生产范围内，且材质不包含不能生产的材质。
+        :param thickness: 材料厚度（数组 / Series）
+        :param material: 材料材质（数组 / Series）
+        :return: 布尔数组
+        """
+        thickness = as_thickness(thickness)  # 厚度统一按 float32 比较
+        mask = np.ones(len(thickness), dtype=bool)
+        if self.thicknesses is not None:
+            mask &= np.isin(thickness, np.asarray(list(self.thicknesses), dtype=np.float32))
+        if self.excluded_materials:
+            material = pd.Series(material).astype(str)
+            for excluded in self.excluded_materials:
+                mask &= ~material.str.contains(excluded, regex=False).to_numpy()
+        return mask
+
+    def to_dict(self):
+        """ 只保留与默认值不同的字段 """
+        data = asdict(self)
+        defaults = asdict(Machine(name=self.name, rate=self.rate))
+        data = {key: value for key, value in data.items() if key in ("name", "rate") or value != defaults[key]}
+        if self.start_time is not None:
+            data["start_time"] = self.start_time.strftime("%Y-%m-%d %H:%M")
+        if self.work_shifts is not None:
+            data["work_shifts"] = [list(shift) for shift in self.work_shifts]
+        if self.thicknesses is not None:
+            data["thicknesses"] = list(self.thicknesses)
+        return data
+
+
+DEFAULT_MACHINES = [
+    Machine("直管机", STRAIGHT_PIPE_RATE, quantity_column="生产件数", processes=["直管"]),
+    Machine("异型管机1", YIXING1_RATE, thicknesses=sorted(YIXING1_THICKNESSES), excluded_materials=["不锈钢"]),
+    Machine("异型管机2", YIXING2_RATE, preferred_thickness=1.0, tie_priority=1, exclusive_first=True),
+]
+
+
+class MachineRegistry:
+    """
+    设备表。
+    :param machines: Machine 列表（也可以是字典），顺序即输出表单的顺序；默认 DEFAULT_MACHINES
+    """
+
+    def __init__(self, machines=None):
+        machines = DEFAULT_MACHINES if machines is None else machines
+        self.machines = [machine if isinstance(machine, Machine) else Machine(**machine) for machine in machines]
+        self._by_name = {machine.name: machine for machine in self.machines}
+        if len(self._by_name) != len(self.machines):
+            raise ValueError("设备名重复")
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __iter__(self):
+        return iter(self.machines)
+
+    def __len__(self):
+        return len(self.machines)
+
+    @property
+    def names(self):
+        """ 设备名列表（输出表单的顺序） """
+        return [machine.name for machine in self.machines]
+
+    @property
+    def rates(self):
+        """ 产量表 {设备: (数量列, 每小时产量)}，供 production_minutes 使用 """
+        return {machine.name: (machine.quantity_column, machine.rate) for machine in self.machines}
+
+    @property
+    def exclusive_first_names(self):
+        """ 队列中只有本设备能生产的订单排在最前的设备 """
+        return [machine.name for machine in self.machines if machine.exclusive_first]
+
+    def pools(self):
+        """
+        按加工工艺分组的设备池。
+        :return: [(加工工艺列表或 None, [Machine, ...])]，None 表示其余工艺
+        """
+        pools = {}
+        for machine in self.machines:
+            key = None if machine.processes is None else tuple(machine.processes)
+            pools.setdefault(key, []).append(machine)
+        return [(None if key is None else list(key), machines) for key, machines in pools.items()]
+
+    def pool_mask(self, processes, process):
+        """
+        哪些订单属于该设备池。
+        :param processes: 设备池的加工工艺（None 表示其余工艺）
+        :param process: 订单的加工工艺 Series
+        :return: 布尔 Series
+        """
+        if processes is not None:
+            return process.isin(processes)
+        named = [name for key, _ in self.pools() if key is not None for name in key]
+        return ~process.isin(named + EXCLUDED_PROCESSES)
+
+    def only_machine(self, device, thickness, material):
+        """
+        同一设备池的其他设备都不能生产的订单（如 异型管机2 队列中 异型管机1 不能生产的订单）。
+        :param device: 设备名
+        :param thickness: 材料厚度
+        :param material: 材料材质
+        :return: 布尔数组
+        """
+        mask = np.ones(len(thickness), dtype=bool)
+        if device not in self:
+            return mask
+        processes = self[device].processes
+        for machine in self.machines:
+            if machine.name != device and machine.processes == processes:
+                mask &= ~machine.eligible(thickness, material)
+        return mask
@@ -0,0 +1,389 @@
+"""
+生产顺序局部搜索（可选，默认关闭）：在规则排出的顺序上交换 / 移动组2 块，减少逾期行数和换料次数。
+
+    config = ScheduleConfig(optimize_seconds=2)   # 每台设备最多搜索 2 秒
+    result = schedule(read_orders("3.21订单信息.xlsx"), config)
+    result.optimization                           # 每台设备优化前后的 逾期行数、换料次数、换料分钟
+
+目标按优先级比较：逾期行数 → 换料次数 → 换料分钟（即最晚完工时间）。
+块 = 队列中连续的同一组2（同材质、同厚度），块内订单的先后不变；
+exclusive_first 的设备（异型管机2）中，其他设备不可生产的块仍留在队列最前（块不跨出所在的连续区）。
+
+每一步随机选一个块，和附近的块交换或移到附近的位置，只接受更好的顺序。
+评估一步不重排整条队列，全部在“累计工作分钟 W”上计算：
+- 块的开工 W = 前面各块的（换料分钟 + 生产分钟）之和，订单逾期 ⇔ 块开工 W > 该订单的 L
+  （L = 交期的 W − 块内前面订单的生产分钟 − 本单生产分钟，块内顺序不变所以 L 固定），
+  每块预先把 L 排好序，某个开工 W 下的逾期行数用一次二分查找得到；
+- 移动只改变被移动的一段（附近的几个块）和边界上的换料，这一段逐块二分；
+- 这一段之后的所有块整体平移 Δ（只来自换料分钟的变化，|Δ| 很小），
+  逾期行数的变化 = 后面“离逾期不到 Δ 分钟”的订单数：只有余量在 ±span 以内的临界行可能翻转，
+  临界行按位置排好、预先累计 临界行 × 余量 计数表，二分找到后缀后 O(1) 查到。
+接受一步时只重算被移动的这一段（和后一块的换料），后面的块整体平移 Δ；
+有交期的行按位置排好，被移动的一段之前的行（和临界行、计数表的前缀）不变，
+只从这一段起重算余量、重新筛临界行、接着前缀累计计数表，不再整条队列重算。
+
+W 上把换料分钟当作工作分钟（换料跨过休息时间时略偏保守），
+所以搜索结束后用 schedule_queue 按实际日历重算一遍，确实更好才采用，报告里的数字都是重算后的。
+"""
+import bisect
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from .scheduling import schedule_queue
+from .shift_calendar import NS_PER_MINUTE, to_minutes
+
+MOVE_WINDOW = 16  # 块只和前后 16 个块以内的块交换 / 移动
+TIME_CHECK_EVERY = 256  # 每尝试多少步检查一次时间
+REPORT_COLUMNS = [
+    "设备", "优化前逾期行数", "优化后逾期行数", "优化前换料次数", "优化后换料次数",
+    "优化前换料分钟", "优化后换料分钟", "尝试次数", "接受次数", "耗时(秒)",
+]
+
+
+class _BlockSequence:
+    """
+    按块表示的一台设备队列，在累计工作分钟上评估移动。
+    :param blocks: 每个块的行位置数组（按当前顺序）
+    :param codes: 每行的料编码（ChangeoverTable.codes）
+    :param minutes: 每行的生产分钟
+    :param limits: 每行的 L（无交期为 None）
+    :param regions: 每个块所属的区（块只在同一区内移动）
+    :param table: ChangeoverTable
+    :param base: 设备开工时刻的累计工作分钟
+    """
+
+    def __init__(self, blocks, codes, minutes, limits, regions, table, base):
+        self.block_rows = blocks
+        self.block_code = [int(codes[rows[0]]) for rows in blocks]
+        self.block_len = [int(minutes[rows].sum()) for rows in blocks]
+        self.block_limits = [sorted(limits[rows][~np.isnan(limits[rows])].astype(np.int64).tolist()) for rows in blocks]
+        self.region = list(regions)
+        self.matrix = table.matrix.tolist()
+        self.first_minutes = int(table.first_minutes)
+        self.base = int(base)
+        self.span = 4 * max(int(table.matrix.max(initial=0)), self.first_minutes)  # 一步移动 |Δ| 的上界
+
+        # 有交期的行按行展开（筛临界行时向量化计算）
+        row_block = np.repeat(np.arange(len(blocks)), [len(rows) for rows in blocks])
+        row_limit = np.concatenate([limits[rows] for rows in blocks]) if blocks else np.empty(0)
+        has_due = ~np.isnan(row_limit)
+        self.due_block = row_block[has_due]
+        self.due_limit = row_limit[has_due].astype(np.int64)
+        self.due_bounds = np.searchsorted(self.due_block, np.arange(len(blocks) + 1))  # 块 → 有交期的行的一段
+        self.sequence = list(range(len(blocks)))  # 当前顺序：位置 → 块
+        self.rebuild()
+
+    def rebuild(self):
+        """ 按当前顺序整体重算每个位置的换料、开工 W、逾期行数，以及临界行 """
+        seq = np.asarray(self.sequence, dtype=np.int64)
+        codes = np.asarray(self.block_code, dtype=np.int64)[seq]
+        lengths = np.asarray(self.block_len, dtype=np.int64)[seq]
+        matrix = np.asarray(self.matrix, dtype=np.int64)
+        changeover = np.empty(len(seq), dtype=np.int64)
+        flags = np.empty(len(seq), dtype=bool)
+        changeover[0], flags[0] = self.first_minutes, True
+        changeover[1:] = matrix[codes[:-1], codes[1:]]
+        flags[1:] = codes[:-1] != codes[1:]
+        starts = self.base + np.cumsum(changeover + lengths) - lengths
+
+        self.position = np.empty(len(seq), dtype=np.int64)  # 块 → 位置
+        self.position[seq] = np.arange(len(seq))
+        due_position = self.position[self.due_block]
+        slack = self.due_limit - starts[due_position]
+        over = np.bincount(due_position[slack < 0], minlength=len(seq))
+
+        self.changeover = changeover.tolist()
+        self.flags = flags.tolist()
+        self.starts = starts
+        self.over = over.tolist()
+        self.key = (int(over.sum()), int(flags.sum()), int(changeover.sum()))
+
+        # 有交期的行按位置排好（同一位置按行的顺序）：due_rows 为 due_* 的下标
+        self.due_rows = np.argsort(due_position, kind="stable")
+        self.row_position = due_position[self.due_rows]
+        self.row_slack = slack[self.due_rows]
+        self.near_index = []
+        self._near_position = np.empty(0, dtype=np.int64)  # 按容量分配，near_* 取前 len(near_index) 个
+        self._near_slack = np.empty(0, dtype=np.int64)
+        self._near_counts = np.zeros((1, 2 * self.span + 1), dtype=np.int64)
+        self._near(0)
+
+    @property
+    def near_position(self):
+        """ 临界行的位置（升序） """
+        return self._near_position[:len(self.near_index)]
+
+    @property
+    def near_slack(self):
+        """ 临界行的余量（顺序同 near_position） """
+        return self._near_slack[:len(self.near_index)]
+
+    @property
+    def near_counts(self):
+        """ near_counts[i, v + span] = 前 i 个临界行中余量 < v 的行数 """
+        return self._near_counts[:len(self.near_index) + 1]
+
+    def _near(self, lo, hi=None):
+        """
+        从位置 lo 起重新筛临界行（余量在 [-span, span) 以内，平移不超过 span 时只有它们可能翻转），
+        hi 不为 None 时后面的块没有平移，只重筛 lo..hi，之后的临界行原样保留；
+        位置 < lo 的临界行和计数表的前缀不变，后面接着累计 临界行 × 余量 计数表。
+        """
+        span = self.span
+        stop = len(self.sequence) if hi is None else hi + 1
+        first, last = np.searchsorted(self.row_position, [lo, stop])
+        i = bisect.bisect_left(self.near_index, lo)
+        j = bisect.bisect_left(self.near_index, stop)
+        slack = self.row_slack[first:last]
+        near = (slack >= -span) & (slack < span)
+        positions = np.concatenate((self.row_position[first:last][near], self._near_position[j:len(self.near_index)]))
+        slack = np.concatenate((slack[near], self._near_slack[j:len(self.near_index)]))
+        end = i + len(positions)
+        if end + 1 > len(self._near_counts):  # 容量不够时加倍，前缀原样复制
+            capacity = max(end + 1, 2 * len(self._near_counts))
+            self._near_position = np.resize(self._near_position[:i], capacity)
+            self._near_slack = np.resize(self._near_slack[:i], capacity)
+            counts = np.zeros((capacity, 2 * span + 1), dtype=np.int64)
+            counts[:i + 1] = self._near_counts[:i + 1]
+            self._near_counts = counts
+        self._near_position[i:end] = positions
+        self._near_slack[i:end] = slack
+        self.near_index[i:] = positions.tolist()
+        histogram = np.zeros((len(positions), 2 * span + 1), dtype=np.int64)
+        histogram[np.arange(len(positions)), slack + span + 1] = 1
+        self._near_counts[i + 1:end + 1] = self._near_counts[i] + np.cumsum(np.cumsum(histogram, axis=1), axis=0)
+
+    def _flipped(self, position, delta):
+        """ 位置 ≥ position 的块整体平移 delta 后翻转的临界行：(行所在的位置, 逾期行数 +1 / -1) """
+        i = bisect.bisect_left(self.near_index, position)
+        slack = self.near_slack[i:]
+        if delta > 0:  # 推迟：余量 ∈ [0, Δ) 的行变成逾期
+            return self.near_position[i:][(slack >= 0) & (slack < delta)], 1
+        return self.near_position[i:][(slack >= delta) & (slack < 0)], -1
+
+    def _shifted(self, position, delta):
+        """ 位置 ≥ position 的块整体平移 delta 后逾期行数的变化 """
+        if delta == 0 or position >= len(self.sequence):
+            return 0
+        delta = max(-self.span, min(self.span, delta))
+        i = bisect.bisect_left(self.near_index, position)
+        counts, last = self._near_counts, len(self.near_index)
+        column = delta + self.span
+        return int(counts[last, column] - counts[i, column] - counts[last, self.span] + counts[i, self.span])
+
+    def evaluate(self, lo, hi, segment):
+        """
+        把位置 lo..hi 换成 segment（同一批块的新顺序）后目标的变化。
+        :return: (逾期行数变化, 换料次数变化, 换料分钟变化)
+        """
+        if lo > 0:
+            prev_code = self.block_code[self.sequence[lo - 1]]
+            prev_end = int(self.starts[lo - 1]) + self.block_len[self.sequence[lo - 1]]
+        else:
+            prev_code, prev_end = None, self.base
+        end = min(hi + 2, len(self.sequence))
+        d_over = -sum(self.over[lo:hi + 1])
+        d_flags = -sum(self.flags[lo:end])
+        d_minutes = -sum(self.changeover[lo:end])
+        for block in segment:
+            code = self.block_code[block]
+            if prev_code is None:
+                minutes, flag = self.first_minutes, True
+            else:
+                minutes, flag = self.matrix[prev_code][code], prev_code != code
+            start = prev_end + minutes
+            d_over += bisect.bisect_left(self.block_limits[block], start)
+            d_flags += flag
+            d_minutes += minutes
+            prev_end, prev_code = start + self.block_len[block], code
+        if hi + 1 < len(self.sequence):
+            code = self.block_code[self.sequence[hi + 1]]
+            minutes = self.matrix[prev_code][code]
+            d_flags += prev_code != code
+            d_minutes += minutes
+            d_over += self._shifted(hi + 1, prev_end + minutes - int(self.starts[hi + 1]))
+        return d_over, d_flags, d_minutes
+
+    def propose(self, rng, window):
+        """ 随机生成一步移动：(lo, hi, 新的一段)，不可行时返回 None """
+        size = len(self.sequence)
+        i = rng.randrange(size)
+        j = i + rng.randint(-window, window)
+        if j == i or not 0 <= j < size or self.region[self.sequence[i]] != self.region[self.sequence[j]]:
+            return None
+        lo, hi = min(i, j), max(i, j)
+        segment = self.sequence[lo:hi + 1]
+        if rng.random() < 0.5:  # 交换两个块
+            segment[0], segment[-1] = segment[-1], segment[0]
+        elif i < j:  # 把块 i 移到 j 之后
+            segment = segment[1:] + segment[:1]
+        else:  # 把块 i 移到 j 之前
+            segment = segment[-1:] + segment[:-1]
+        return lo, hi, segment
+
+    def search(self, seconds, seed=0, window=MOVE_WINDOW, max_moves=None):
+        """
+        爬山搜索，只接受更好的顺序。
+        :return: (尝试次数, 接受次数)
+        """
+        if len(self.sequence) < 2:
+            return 0, 0
+        rng = random.Random(seed)
+        deadline = time.perf_counter() + seconds
+        tried = accepted = 0
+        while max_moves is None or tried < max_moves:
+            if tried % TIME_CHECK_EVERY == 0 and time.perf_counter() >= deadline:
+                break
+            tried += 1
+            move = self.propose(rng, window)
+            if move is None:
+                continue
+            lo, hi, segment = move
+            change = self.evaluate(lo, hi, segment)
+            if change < (0, 0, 0):
+                self.apply(lo, hi, segment, change)
+                accepted += 1
+        return tried, accepted
+
+    def apply(self, lo, hi, segment, change):
+        """
+        接受一步移动：只重算位置 lo..hi 和后一块的换料、开工 W、逾期行数，后面的块整体平移；
+        有交期的行、临界行和计数表只从位置 lo 起重算（后面的块没有平移时只重算 lo..hi）。
+        :param change: evaluate 算出的目标变化
+        """
+        size = len(self.sequence)
+        self.sequence[lo:hi + 1] = segment
+        self.position[segment] = np.arange(lo, hi + 1)
+        if lo > 0:
+            prev_code = self.block_code[self.sequence[lo - 1]]
+            prev_end = int(self.starts[lo - 1]) + self.block_len[self.sequence[lo - 1]]
+        else:
+            prev_code, prev_end = None, self.base
+        for position in range(lo, hi + 1):
+            block = self.sequence[position]
+            code = self.block_code[block]
+            if prev_code is None:
+                minutes, flag = self.first_minutes, True
+            else:
+                minutes, flag = self.matrix[prev_code][code], prev_code != code
+            start = prev_end + minutes
+            self.changeover[position], self.flags[position], self.starts[position] = minutes, flag, start
+            self.over[position] = bisect.bisect_left(self.block_limits[block], start)
+            prev_end, prev_code = start + self.block_len[block], code
+
+        # **🔹 lo..hi 的有交期的行按新顺序放回原来的一段，重算余量**
+        first, last = np.searchsorted(self.row_position, [lo, hi + 1])
+        rows = np.concatenate([np.arange(self.due_bounds[block], self.due_bounds[block + 1]) for block in segment])
+        self.due_rows[first:last] = rows
+        self.row_position[first:last] = self.position[self.due_block[rows]]
+        self.row_slack[first:last] = self.due_limit[rows] - self.starts[self.row_position[first:last]]
+
+        delta = 0
+        if hi + 1 < size:
+            code = self.block_code[self.sequence[hi + 1]]
+            minutes = self.matrix[prev_code][code]
+            self.changeover[hi + 1], self.flags[hi + 1] = minutes, prev_code != code
+            delta = prev_end + minutes - int(self.starts[hi + 1])
+            if delta:
+                # 后面的块整体平移：逾期行数只在翻转的临界行处变化
+                positions, sign = self._flipped(hi + 1, delta)
+                for position in positions.tolist():
+                    self.over[position] += sign
+                self.starts[hi + 1:] += delta
+                self.row_slack[last:] -= delta
+        self.key = tuple(int(a + b) for a, b in zip(self.key, change))
+        self._near(lo, None if delta else hi)
+
+    def rows(self):
+        """ 当前顺序的行位置 """
+        return np.concatenate([self.block_rows[block] for block in self.sequence])
+
+
+def _exact(table, calendar, start_minute, minutes, has_due, due_minute, order):
+    """ 按实际日历计算某个顺序：(是否换料, 换料分钟, 开始, 结束, 是否逾期, 目标) """
+    flags, changeover_minutes = table.changeovers(order)
+    starts, ends = schedule_queue(calendar, start_minute, minutes[order], changeover_minutes)
+    overdue = has_due[order] & (due_minute[order] < ends)
+    key = (int(overdue.sum()), int(flags.sum()), int(changeover_minutes.sum()))
+    return flags, changeover_minutes, starts, ends, overdue, key
+
+
+def _block_sequence(queue, table, calendar, start_minute, minutes, has_due, due_minute, front=None):
+    """ 把一台设备的队列切成块，建立 _BlockSequence """
+    n = len(queue)
+    # **🔹 块：连续的同一组2；区：连续的 front / 非 front 块，块只在自己的区内移动**
+    groups = pd.to_numeric(queue["组2"], errors="coerce").fillna(-1).to_numpy()
+    front = np.zeros(n, dtype=bool) if front is None else np.asarray(front, dtype=bool)
+    boundaries = np.flatnonzero((groups[1:] != groups[:-1]) | (front[1:] != front[:-1])) + 1
+    blocks = np.split(np.arange(n), boundaries)
+    block_front = front[np.r_[0, boundaries]]
+    regions = np.cumsum(np.r_[False, block_front[1:] != block_front[:-1]])
+
+    # **🔹 L = 交期的累计工作分钟 − 块内到本单完工为止的生产分钟**
+    done = minutes.cumsum()
+    block_begin = (done - minutes)[np.r_[0, boundaries]]
+    done_in_block = done - np.repeat(block_begin, [len(rows) for rows in blocks])
+    limits = np.where(has_due, calendar.working_minutes_array(due_minute) - done_in_block, np.nan)
+    return _BlockSequence(blocks, table.codes, minutes, limits, regions, table, calendar.working_minutes(start_minute))
+
+
+def optimize_sequence(queue, device, calendar, start_time, changeover_model, seconds, front=None, seed=0, max_moves=None):
+    """
+    在规则排出的顺序上做局部搜索。
+    :param queue: 一台设备排产后的订单（按生产顺序，含 组2、生产分钟、预计交期）
+    :param device: 设备
+    :param calendar: ShiftCalendar
+    :param start_time: 设备开工时间
+    :param changeover_model: ChangeoverModel
+    :param seconds: 搜索时间上限（秒）
+    :param front: 必须留在队列最前的行（布尔数组，如 异型管机2 的其他设备不可生产订单），None 表示没有
+    :param seed: 随机种子（相同的输入和种子结果相同）
+    :param max_moves: 最多尝试的步数，None 表示只受时间限制
+    :return: (优化后的订单, 报告字典)；没有更好的顺序时原样返回 queue
+    """
+    began = time.perf_counter()
+    n = len(queue)
+    minutes = queue["生产分钟"].to_numpy(dtype=np.int64)
+    due = pd.to_datetime(queue["预计交期"], errors="coerce").to_numpy().astype("datetime64[ns]")
+    has_due = ~np.isnat(due)
+    due_minute = np.where(has_due, due.astype(np.int64) // NS_PER_MINUTE, 0)
+    start_minute = to_minutes(start_time)
+    table = changeover_model.compile(device, queue["材料厚度"].to_numpy(), queue["材料材质"].to_numpy())
+
+    order = np.arange(n)
+    best = before = _exact(table, calendar, start_minute, minutes, has_due, due_minute, order)
+    tried = accepted = 0
+
+    if n > 1:
+        sequence = _block_sequence(queue, table, calendar, start_minute, minutes, has_due, due_minute, front)
+        tried, accepted = sequence.search(max(seconds, 0), seed=seed, max_moves=max_moves)
+        if accepted:
+            candidate = _exact(table, calendar, start_minute, minutes, has_due, due_minute, sequence.rows())
+            if candidate[5] < before[5]:  # 按实际日历确实更好才采用
+                order, best = sequence.rows(), candidate
+
+    report = {
+        "设备": device,
+        "优化前逾期行数": before[5][0], "优化后逾期行数": best[5][0],
+        "优化前换料次数": before[5][1], "优化后换料次数": best[5][1],
+        "优化前换料分钟": before[5][2], "优化后换料分钟": best[5][2],
+        "尝试次数": tried, "接受次数": accepted, "耗时(秒)": round(time.perf_counter() - began, 3),
+    }
+    if best is before:
+        return queue, report
+
+    flags, changeover_minutes, starts, ends, overdue, _ = best
+    result = queue.take(order)
+    result.index = pd.RangeIndex(n)
+    # 组2 按新的队列顺序重新编号（连续的同一组2 为一组）
+    groups = pd.to_numeric(result["组2"], errors="coerce").fillna(-1).to_numpy()
+    result["组2"] = np.cumsum(np.r_[True, groups[1:] != groups[:-1]]) - 1
+    result["是否换料"] = flags
+    result["换料分钟"] = changeover_minutes
+    result["生产开始时间"] = (starts * NS_PER_MINUTE).astype("datetime64[ns]")
+    result["生产结束时间"] = (ends * NS_PER_MINUTE).astype("datetime64[ns]")
+    result["按时交付检查"] = ~overdue
+    return result, report
@@ -0,0 +1,407 @@
+"""
+排产流程：读取订单 → 预处理 → 分配设备 → 排序 → 计算生产时间 → 排产 → 判断逾期 →（拆分逾期订单）→ 项目交付时间。
+
+每个环节都是独立的函数，schedule(df, config) 把它们串起来；
+同一个进程里可以连续排产多个表格，也可以单独对某个环节计时。
+
+分配设备之后各设备的队列互不影响：排序、换料、排产、判断逾期、拆分都按设备单独进行（schedule_device），
+config.device_workers 大于 1 时用进程池并行，最后按固定规则合并（merge_device_results），结果与依次排产完全相同。
+"""
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .assignment import assign_devices
+from .changeover import mark_changeovers
+from .config import DEVICES, ScheduleConfig
+from .due_dates import parse_due_dates
+from .machines import MachineRegistry
+from .optimizer import REPORT_COLUMNS, optimize_sequence
+from .profiling import profiled, stage
+from .schema import map_categories, to_internal
+from .scheduling import compute_schedule, production_minutes
+from .splitting import NO_DUE_DATE, resolve_overdue_splits
+
+# 排序键（主键在前，是否有交期 降序、其余升序），_sort_keys 编码为整数后一次 np.lexsort
+SORT_COLUMNS = ["组最早交期", "材料材质", "材料厚度", "是否有交期", "交期排序"]
+FRONT_COLUMN = "其他设备不可生产"  # 同一设备池的其他设备都不能生产，exclusive_first 的设备把这些订单排在最前
+ORDER_COLUMNS = ["订单编号", "加工工艺", "材料厚度", "材料材质", "预计交期", "完成量"]  # 排产用到的订单列（另加各设备的数量列）
+ROW_NUMBER = "_行号"  # 分配设备后的行号，合并各设备结果时用于还原排序中相同键的先后
+
+
+@dataclass
+class ScheduleResult:
+    """
+    排产结果。
+    :param orders: 参与排产的订单（含 设备、生产开始时间、生产结束时间、按时交付检查 等）
+    :param project_delivery: 项目交付时间表（订单编号, 项目交付时间）
+    :param other: “其他”表单：差异化和已完成订单，保持输入格式
+    :param devices: 设备列表（输出表单的顺序）
+    :param optimization: 优化生产顺序的报告（每台设备一行），没有优化时为 None
+    """
+    orders: pd.DataFrame
+    project_delivery: pd.DataFrame
+    other: pd.DataFrame
+    devices: list = field(default_factory=lambda: list(DEVICES))
+    optimization: pd.DataFrame = None
+
+
+def normalize_material(material):
+    """ 去掉 '来料' 前缀，确保数据处理时材质一致 """
+    return material.replace("来料", "").strip() if isinstance(material, str) else material
+
+
+def restore_material(original_material, processed_material):
+    """ 如果原始材质带有 '来料'，则输出时加回去 """
+    return f"来料{processed_material}" if original_material.startswith("来料") else processed_material
+
+
+def _sort_codes(values):
+    """ 升序的整数编码：与 sort_values 的顺序一致（category 按类别顺序），缺失值排在最后 """
+    codes, uniques = pd.factorize(values, sort=True)
+    return np.where(codes < 0, len(uniques), codes)
+
+
+def _datetime_codes(values):
+    """ 时间列的 int64 编码（纳秒） """
+    return values.to_numpy().astype("datetime64[ns]").view(np.int64)
+
+
+def _sort_keys(df):
+    """ SORT_COLUMNS 的整数编码，都按升序（是否有交期 取反，有交期的在前） """
+    return [
+        _datetime_codes(df["组最早交期"]), _sort_codes(df["材料材质"]), _sort_codes(df["材料厚度"]),
+        ~df["是否有交期"].to_numpy(dtype=bool), _datetime_codes(df["交期排序"]),
+    ]
+
+
+def _sequence_order(sort_keys, is_front, front_first, tiebreak=None):
+    """
+    一次 np.lexsort 得到排产顺序：先按 SORT_COLUMNS；is_front 的行（exclusive_first 设备）排在最后，
+    其中其他设备不可生产的（front_first）在前。稳定排序，键全部相同时保持原来的先后。
+    :param sort_keys: _sort_keys 的结果（主键在前）
+    :param tiebreak: 键全部相同时再按它排序，None 表示按行位置
+    :return: 行位置数组
+    """
+    keys = list(reversed(sort_keys)) + [~(is_front & front_first), is_front]
+    if tiebreak is not None:
+        keys.insert(0, tiebreak)
+    return np.lexsort(keys)
+
+
+def _run_starts(keys):
+    """ 已排好序的键（每行一个键）中，每一列是否与前一列不同（新的一段）；第一列总是 True """
+    starts = np.ones(keys.shape[1], dtype=bool)
+    starts[1:] = (keys[:, 1:] != keys[:, :-1]).any(axis=0)
+    return starts
+
+
+def _group_orders(devices, thicknesses, materials, due):
+    """
+    一次计算所有设备的组：组 = 同一设备、厚度、材质（各列为 _sort_codes 的编码）。组号按 (设备, 厚度, 材质) 升序。
+    :param due: 交期排序（int64）
+    :return: (每行的组号, 每组的 (设备, 厚度, 材质) 编码（3 × 组数）, 每组的组1, 每组的最早交期)
+    """
+    by_group = np.lexsort((materials, thicknesses, devices))
+    keys = np.stack((devices[by_group], thicknesses[by_group], materials[by_group]))
+    new_group = _run_starts(keys)
+    starts = np.flatnonzero(new_group)
+    group = np.empty(len(devices), dtype=np.int64)
+    group[by_group] = np.cumsum(new_group) - 1
+    group_keys = keys[:, starts]
+    # 组1：设备内从 0 编号，即组号 − 该设备第一个组的组号（组号按设备排在一起）
+    group1 = np.arange(len(starts)) - np.searchsorted(group_keys[0], group_keys[0], side="left")
+    earliest = np.minimum.reduceat(due[by_group], starts) if len(starts) else np.zeros(0, dtype=np.int64)
+    return group, group_keys, group1, earliest
+
+
+def _rank_within(labels):
+    """ 每个元素在同一 label 的元素中的名次（按出现的先后，从 0 开始） """
+    by_label = np.argsort(labels, kind="stable")
+    positions = np.arange(len(labels))
+    first = np.where(_run_starts(labels[by_label][None, :]), positions, 0)
+    ranks = np.empty(len(labels), dtype=np.int64)
+    ranks[by_label] = positions - np.maximum.accumulate(first)
+    return ranks
+
+
+@profiled("预处理")
+def _contains(values, text):
+    """ values.astype(str).str.contains(text)：category 列（read_orders 的 加工工艺）只对每个类别判断一次 """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        found = np.append(values.cat.categories.astype(str).str.contains(text, regex=False), False)  # 缺失值为 False
+        return found[values.cat.codes.to_numpy()]
+    return values.astype(str).str.contains(text, na=False, regex=False).to_numpy()
+
+
+def order_columns(machines=None):
+    """
+    排产需要的订单列：ORDER_COLUMNS + 设备表中各设备的数量列（默认 生产件数、未完成数量）。
+    :param machines: MachineRegistry 或 Machine 列表，默认 DEFAULT_MACHINES
+    :return: 列名列表
+    """
+    registry = machines if isinstance(machines, MachineRegistry) else MachineRegistry(machines)
+    return ORDER_COLUMNS + list(dict.fromkeys(machine.quantity_column for machine in registry))
+
+
+def prepare_orders(df_original):
+    """
+    预处理：筛选出‘差异化’和‘已完成’订单放入“其他”表单，清理加工工艺，去掉材质的‘来料’前缀，
+    转换为内部列类型（category、float32 厚度，见 schema.py）。
+    :param df_original: 读取的原始订单
+    :return: (待排产订单, 其他订单)
+    """
+    df_other = df_original[
+        _contains(df_original["加工工艺"], "差异化") | _contains(df_original["完成量"], "已完成")
+    ].reindex(columns=df_original.columns)  # 保持列顺序一致
+
+    df = df_original.copy(deep=False)  # 下面只替换整列，不会改到 df_original
+    # 每种取值只处理一次
+    df["加工工艺"] = map_categories(df["加工工艺"], lambda process: re.sub(r"\s+", "", str(process).strip()))
+    df["原始材料材质"] = map_categories(df["材料材质"])  # 先保存原始数据
+    df["材料材质"] = map_categories(df["材料材质"], normalize_material)
+    return to_internal(df), df_other
+
+
+@profiled("排序分组")
+def sort_orders(df, reference=None, changeover_model=None, machines=None):
+    """
+    交期排序 + 组内排序：相同材质 & 厚度的订单排在一起，组按最早交期排序，有交期的优先；
+    exclusive_first 的设备（默认 异型管机2）中其他设备不可生产的订单排在最前。
+    :param df: 已分配设备的订单
+    :param reference: 排产开始时间，用于推断预计交期的年份
+    :param changeover_model: ChangeoverModel，用于计算是否换料和换料分钟
+    :param machines: MachineRegistry，默认 DEFAULT_MACHINES
+    :return: 排序后的订单（含 交期排序、是否有交期、组1、组2、组最早交期、其他设备不可生产、是否换料、换料分钟）
+    """
+    registry = machines if isinstance(machines, MachineRegistry) else MachineRegistry(machines)
+    # 📌 交期转换，填充 NaT 为 2100-01-01，确保无交期的订单排在最后
+    df["预计交期"] = parse_due_dates(df["预计交期"], reference)  # 解析一次，check_delivery 直接沿用
+    df["交期排序"] = df["预计交期"].fillna(NO_DUE_DATE)
+    # 📌 标记是否有交期 (1: 有交期, 0: 无交期)
+    df["是否有交期"] = (df["交期排序"] < NO_DUE_DATE).to_numpy()
+
+    # 📌 组 = 同一设备、厚度、材质：所有设备一次编码、一次分组，得到 组1 和 组最早交期
+    with stage("组1/组2", rows=len(df)):
+        device_codes = _sort_codes(df["设备"])
+        thickness_codes = _sort_codes(df["材料厚度"])
+        material_codes = _sort_codes(df["材料材质"])
+        due = _datetime_codes(df["交期排序"])
+        group, group_keys, group1, earliest = _group_orders(device_codes, thickness_codes, material_codes, due)
+    df["组最早交期"] = earliest[group].view("datetime64[ns]")
+    only_machine = np.zeros(len(df), dtype=bool)
+    devices = df["设备"].to_numpy()
+    for device in pd.unique(devices):
+        positions = np.flatnonzero(devices == device)
+        only_machine[positions] = registry.only_machine(
+            device, df["材料厚度"].to_numpy()[positions], df["材料材质"].to_numpy()[positions],
+        )
+    df[FRONT_COLUMN] = only_machine
+
+    # 📌 排序：保证相同材质 & 厚度的订单在一起，同时组外按交期排序（SORT_COLUMNS）
+    # **📌 exclusive_first 设备（异型管机2）排在其他设备之后，其中其他设备不可生产的订单优先**
+    # 同一组的 组最早交期、材料材质、材料厚度 都相同：先按这三个键给组排名次（组很少），
+    # 再和 前置标记、是否有交期 合成一个整数键，行上只需 (合成键, 交期排序) 一次 np.lexsort（稳定排序，
+    # 与 _sequence_order 的顺序相同），整张表按位置取一次
+    group_order = np.lexsort((group_keys[1], group_keys[2], earliest))  # 组最早交期 → 材料材质 → 材料厚度
+    group_rank = np.empty(len(earliest), dtype=np.int64)
+    group_rank[group_order] = np.cumsum(_run_starts(np.stack((earliest, group_keys[2], group_keys[1]))[:, group_order])) - 1
+    is_front = df["设备"].isin(registry.exclusive_first_names).to_numpy()
+    lead = is_front.astype(np.int64) * 2 + ~(is_front & only_machine)
+    has_due = df["是否有交期"].to_numpy()
+    key = (lead * max(len(earliest), 1) + group_rank[group]) * 2 + ~has_due
+    order = np.lexsort((due, key))
+    df = df.take(order)
+    df.index = pd.RangeIndex(len(df))
+
+    # **📌 组1：设备内相同厚度 & 材质的订单为一组；组2：设备内按队列顺序从 0 开始编号（组首次出现的先后）**
+    group = group[order]
+    codes, first_seen = pd.factorize(group)  # 所有设备一起，按首次出现的顺序编号
+    df["组1"] = group1[group]
+    df["组2"] = _rank_within(group_keys[0][first_seen])[codes]
+
+    return mark_changeovers(df, changeover_model)
+
+
+@profiled("判断交付")
+def check_delivery(df, reference=None):
+    """
+    判断是否按时交付：无预计交期或预计交期不早于生产结束时间为按时交付（按时交付检查 = True），否则逾期交付。
+    :param reference: 排产开始时间，用于推断预计交期的年份
+    """
+    df["预计交期"] = parse_due_dates(df["预计交期"], reference)
+    df["生产结束时间"] = pd.to_datetime(df["生产结束时间"], errors="coerce")
+    on_time = df["预计交期"].isna() | (df["预计交期"] >= df["生产结束时间"])
+    df["按时交付检查"] = on_time.to_numpy()
+    return df
+
+
+@profiled("项目交付时间")
+def project_delivery_times(df):
+    """
+    项目交付时间：同一订单编号所有批次的最晚生产结束时间。
+    :return: 按交付时间升序排列的 (订单编号, 项目交付时间) 表
+    """
+    df["项目交付时间"] = df.groupby("订单编号")["生产结束时间"].transform("max")
+    return df[["订单编号", "项目交付时间"]].drop_duplicates().sort_values(by="项目交付时间")
+
+
+def schedule_device(df, device, config):
+    """
+    排产一台设备的队列：排序分组 → 换料 → 生产时间 → 开始/结束时间 → 判断交付 →（拆分逾期订单）→（优化生产顺序）。
+    各设备之间只共享开工时间，可以在子进程中运行；优化报告放在返回值的 attrs["优化"] 里。
+    :param df: 分配到该设备的订单
+    :param device: 设备
+    :param config: ScheduleConfig
+    :return: 该设备排产后的订单
+    """
+    with stage("排产（单台设备）", rows=len(df), device=device):
+        registry = config.registry
+        calendar = config.calendar_for(device)
+        devices = [device] if device is not None else []
+        df = sort_orders(df, config.start_time, config.changeover_model, registry)
+
+        # **📌 计算生产时间、生产开始时间 & 结束时间**
+        df["生产分钟"] = production_minutes(df, registry.rates)
+        compute_schedule(df, calendar, config.start_times(devices))  # 会更新传入的字典，拆分时重新取
+        df = check_delivery(df, config.start_time)
+
+        # **📌 循环拆分逾期订单前的无交期订单**
+        if config.split_overdue:
+            df = resolve_overdue_splits(
+                df, calendar, config.start_times(devices), config.changeover_model, config.max_split_rounds,
+                config.split_placement,
+            )
+        else:
+            df["是否拆分"] = False
+
+        # **📌 在规则排出的顺序上局部搜索，减少逾期和换料**
+        if config.optimize_seconds > 0 and device is not None:
+            front = df[FRONT_COLUMN].to_numpy() if device in registry.exclusive_first_names else None
+            with stage("优化顺序", rows=len(df), device=device):
+                df, report = optimize_sequence(
+                    df, device, calendar, config.start_times(devices)[device], config.changeover_model,
+                    config.optimize_seconds, front,
+                )
+            df.attrs["优化"] = report
+        return df
+
+
+def merge_device_results(frames, split_overdue, machines=None):
+    """
+    按固定规则合并各设备的排产结果，与所有设备一起排产的行顺序相同：
+    拆分时按设备名排列；不拆分时先是其他设备、再是 exclusive_first 的设备（异型管机2），
+    各自按排序键交错，排序键相同时按分配设备后的行号。
+    :param frames: {设备: 排产后的订单}，合并后清空（各设备的表不再占内存）
+    :param split_overdue: 是否拆分了逾期订单（或优化了生产顺序）：队列不再按排序键排列，按设备名拼接
+    :param machines: MachineRegistry，默认 DEFAULT_MACHINES
+    :return: 合并后的订单（不含行号列）
+    """
+    registry = machines if isinstance(machines, MachineRegistry) else MachineRegistry(machines)
+    df = pd.concat([frames[device] for device in sorted(frames, key=str)], ignore_index=True)
+    frames.clear()
+    if not split_overdue:
+        # 与 sort_orders 相同的一次 np.lexsort，键相同时按行号；整张表按位置取一次
+        is_front = df["设备"].isin(registry.exclusive_first_names).to_numpy()
+        order = _sequence_order(_sort_keys(df), is_front, df[FRONT_COLUMN].to_numpy(dtype=bool), df[ROW_NUMBER].to_numpy())
+        df = df.take(order)
+        df.index = pd.RangeIndex(len(df))
+    del df[ROW_NUMBER]
+    return df
+
+
+@profiled("排产流程")
+def _schedule_queues(queues, config):
+    """
+    各设备单独排产，device_workers 大于 1 时并行。
+    :param queues: {设备: 队列}，排完一台就释放这台的输入
+    :return: {设备: 排产后的订单}
+    """
+    if config.device_workers > 1 and len(queues) > 1:
+        with ProcessPoolExecutor(max_workers=min(config.device_workers, len(queues))) as pool:
+            frames = dict(zip(queues, pool.map(schedule_device, queues.values(), queues, [config] * len(queues))))
+        queues.clear()
+        return frames
+    return {device: schedule_device(queues.pop(device), device, config) for device in list(queues)}
+
+
+def _schedule_cached(queues, config, cache):
+    """
+    输入没有变化的设备直接读结果缓存，其余设备排产后写入缓存。
+    行号列在比较和保存时换成队列内的位置，前面插入一行订单不会让其他设备的缓存失效。
+    :param queues: {设备: 队列}，取出后清空
+    :param cache: ResultCache
+    :return: {设备: 排产后的订单}，顺序同 queues
+    """
+    devices = list(queues)
+    frames, keys, row_numbers = {}, {}, {}
+    for device in devices:
+        if device is None:  # 没有可排产的订单
+            continue
+        queue = queues[device]
+        row_numbers[device] = queue[ROW_NUMBER].to_numpy()
+        queue[ROW_NUMBER] = np.arange(len(queue))
+        keys[device] = cache.device_key(device, queue, config)
+        cached = cache.load_frame(keys[device], like=queue)
+        if cached is not None:
+            frames[device] = cached
+            del queues[device]
+
+    for device, frame in _schedule_queues(queues, config).items():
+        if device is not None:
+            cache.store_frame(keys[device], frame)
+        frames[device] = frame
+
+    # **📌 行号换回分配设备后的行号**
+    for device, positions in row_numbers.items():
+        frames[device][ROW_NUMBER] = positions[frames[device][ROW_NUMBER].to_numpy()]
+    return {device: frames[device] for device in devices}
+
+
+def schedule(df_original, config=None, cache=None):
+    """
+    对一份订单排产。
+    :param df_original: 读取的原始订单（read_orders 的结果）
+    :param config: ScheduleConfig，默认使用 ScheduleConfig()
+    :param cache: ResultCache，输入和配置没有变化的设备直接用缓存的结果，默认不使用；
+        打开优化（optimize_seconds > 0）时结果不可复现，不读写设备缓存
+    :return: ScheduleResult
+    """
+    config = config or ScheduleConfig()
+    registry = config.registry
+
+    df, df_other = prepare_orders(df_original)
+
+    # **📌 分配设备，清理无效设备数据（未分配的 "" 不在类别中，为缺失值）**
+    df["设备"] = pd.Categorical(assign_devices(df, registry), categories=registry.names)
+    kept = df["设备"].notna().to_numpy()
+    df[ROW_NUMBER] = np.cumsum(kept) - 1  # 有效订单的行号
+    # 所有设备一起解析，无法解析的只提示一次；未分配设备的行为 NaT
+    due = np.full(len(df), np.datetime64("NaT"), dtype="datetime64[ns]")
+    due[kept] = parse_due_dates(df["预计交期"][kept], config.start_time).to_numpy()
+    df["预计交期"] = due
+
+    # **📌 按行位置直接取出各设备的队列（不先复制过滤后的整张表），各设备单独排产**
+    names = registry.names
+    codes = df["设备"].cat.codes.to_numpy()
+    devices = sorted(names[code] for code in np.unique(codes[kept]))
+    queues = {device: df.take(np.flatnonzero(codes == names.index(device))) for device in devices}
+    if not devices:  # 没有可排产的订单，保持输出的列
+        queues = {None: df.iloc[:0].copy()}
+    del df
+    if cache is not None and config.optimize_seconds <= 0:
+        frames = _schedule_cached(queues, config, cache)
+    else:
+        frames = _schedule_queues(queues, config)
+    del queues
+    reports = [frame.attrs.pop("优化") for frame in frames.values() if "优化" in frame.attrs]
+    df = merge_device_results(frames, config.split_overdue or config.optimize_seconds > 0, registry)
+
+    project_delivery_df = project_delivery_times(df)
+    return ScheduleResult(
+        orders=df, project_delivery=project_delivery_df, other=df_other, devices=registry.names,
+        optimization=pd.DataFrame(reports, columns=REPORT_COLUMNS) if config.optimize_seconds > 0 else None,
+    )
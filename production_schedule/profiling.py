@@ -0,0 +1,196 @@
+"""
+按环节记录耗时、行数、内存变化（默认关闭）。
+
+    from production_schedule import profiling
+
+    with profiling.profiling("profile.jsonl") as profiler:
+        result = schedule(read_orders(path), config)
+        export_schedule(result, output)
+    print(profiler.summary())
+
+命令行：python -m production_schedule 3.21订单信息.xlsx --profile --profile-log profile.jsonl
+
+关闭时 @profiled 只多一次全局变量判断，stage() 返回共用的空上下文，几乎没有额外开销。
+内存变化是环节前后进程常驻内存（RSS）的差值：装了 psutil 用 psutil，Linux 上读 /proc/self/statm，
+都没有时不记录。
+"""
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:  # psutil 是可选依赖
+    psutil = None
+
+_PROCESS = psutil.Process() if psutil is not None else None
+_NULL_STAGE = nullcontext()
+_profiler = None  # 当前启用的 Profiler，None 表示关闭
+
+
+def _rss_bytes():
+    """ 当前进程常驻内存（字节），取不到返回 None """
+    if _PROCESS is not None:
+        return _PROCESS.memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _row_count(values):
+    """ 第一个 DataFrame / 数组的行数，(待排产, 其他) 这样的元组看第一个元素 """
+    for value in values:
+        if isinstance(value, tuple) and value:
+            value = value[0]
+        if hasattr(value, "shape"):
+            return int(value.shape[0])
+    return None
+
+
+def _display_width(text):
+    return sum(2 if ord(c) > 255 else 1 for c in text)  # 中文字符占 2 格
+
+
+def _ljust(text, width):
+    """ 按显示宽度左对齐 """
+    return text + " " * max(width - _display_width(text), 0)
+
+
+def _rjust(text, width):
+    """ 按显示宽度右对齐 """
+    return " " * max(width - _display_width(text), 0) + text
+
+
+class Profiler:
+    """
+    环节记录器。
+    :param log_path: JSON lines 文件路径，每个环节结束时追加一行；None 只保存在内存
+    """
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self.records = []
+        self._first_seen = {}  # 环节名称 → 首次出现时的嵌套深度（保持顺序，用于汇总表）
+        self._depth = 0
+        self._log = open(log_path, "a", encoding="utf-8") if log_path else None
+
+    @contextmanager
+    def stage(self, name, rows=None, **fields):
+        """
+        记录一个环节；with 里可以往 yield 出的字典补充字段（如 rounds）。
+        :param name: 环节名称
+        :param rows: 处理的行数
+        :param fields: 其他要记录的字段（如 device）
+        """
+        record = {"stage": name, "rows": rows, "depth": self._depth, **fields}
+        self._first_seen.setdefault(name, self._depth)
+        rss_before = _rss_bytes()
+        started_at = datetime.now()
+        started = time.perf_counter()
+        self._depth += 1
+        try:
+            yield record
+        finally:
+            self._depth -= 1
+            record["seconds"] = round(time.perf_counter() - started, 6)
+            rss_after = _rss_bytes()
+            record["memory_delta_mb"] = (
+                round((rss_after - rss_before) / 2 ** 20, 2) if rss_before is not None and rss_after is not None else None
+            )
+            record["started"] = started_at.isoformat(timespec="milliseconds")
+            self.records.append(record)
+            if self._log is not None:
+                self._log.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def summary(self):
+        """
+        汇总表：按环节合计 调用次数、总耗时、平均耗时、行数、内存变化，按首次出现的顺序、嵌套缩进。
+        :return: 字符串
+        """
+        totals = {name: {"depth": depth, "calls": 0, "seconds": 0.0, "rows": 0, "memory": 0.0}
+                  for name, depth in self._first_seen.items()}
+        for record in self.records:
+            item = totals[record["stage"]]
+            item["calls"] += 1
+            item["seconds"] += record["seconds"]
+            item["rows"] += record["rows"] or 0
+            item["memory"] += record["memory_delta_mb"] or 0.0
+
+        header = [("次数", 6), ("总耗时(s)", 12), ("平均(ms)", 12), ("行数", 12), ("内存变化(MB)", 14)]
+        lines = [_ljust("环节", 28) + "".join(_rjust(title, width) for title, width in header)]
+        for name, item in totals.items():
+            if item["calls"] == 0:  # 还没结束的环节
+                continue
+            label = "  " * item["depth"] + name
+            lines.append(
+                _ljust(label, 28) + f"{item['calls']:>6}{item['seconds']:>12.3f}{item['seconds'] / item['calls'] * 1000:>12.1f}"
+                f"{item['rows']:>12}{item['memory']:>14.1f}"
+            )
+        return "\n".join(lines)
+
+
+def enable(log_path=None):
+    """ 启用记录，返回 Profiler """
+    global _profiler
+    disable()
+    _profiler = Profiler(log_path)
+    return _profiler
+
+
+def disable():
+    """ 关闭记录 """
+    global _profiler
+    if _profiler is not None:
+        _profiler.close()
+    _profiler = None
+
+
+def current():
+    """ 当前的 Profiler，未启用时为 None """
+    return _profiler
+
+
+@contextmanager
+def profiling(log_path=None):
+    """ 在 with 范围内启用记录 """
+    profiler = enable(log_path)
+    try:
+        yield profiler
+    finally:
+        disable()
+
+
+def stage(name, rows=None, **fields):
+    """
+    记录一段代码：with stage("组1/组2", rows=len(df)): ...
+    未启用时返回共用的空上下文（as 得到 None）。
+    """
+    if _profiler is None:
+        return _NULL_STAGE
+    return _profiler.stage(name, rows, **fields)
+
+
+def profiled(name):
+    """ 装饰器：把整个函数记为一个环节，行数取第一个 DataFrame 参数 """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return func(*args, **kwargs)
+            with _profiler.stage(name, _row_count(args)) as record:
+                result = func(*args, **kwargs)
+                if record["rows"] is None:  # 参数里没有表（如 读取订单），记结果的行数
+                    record["rows"] = _row_count((result,))
+                return result
+        return wrapper
+    return decorate
@@ -0,0 +1,233 @@
+"""
+读取订单表格，并在表格旁边缓存解析后的列式快照。
+
+快照按文件内容的哈希命名（.schedule_cache/<文件名>.<哈希>.parquet），
+同一份表格重复排产、做各种假设分析时直接读快照，不再解析 xlsx 的 XML；
+表格内容一变，哈希随之改变，自动重新解析并替换旧快照。
+没有安装 pyarrow 时快照改用 pickle 保存。
+
+首次解析走只读流式路径：openpyxl read_only + values_only 逐行读取，按列直接构造 DataFrame，
+类型推断与 pd.read_excel(dtype={"预计交期": str}) 保持一致；
+再转换为存储类型（normalize_orders：加工工艺、材料材质为 category）后写快照，命中快照时直接返回。
+"""
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+
+from .profiling import profiled
+from .schema import CATEGORY_COLUMNS, map_categories
+
+CACHE_DIR_NAME = ".schedule_cache"
+ORDER_DTYPES = {"预计交期": str}  # 预计交期按字符串读取，如 "3.22 15:00"
+# pd.read_excel 默认当作缺失值的文字（pandas 文档 read_excel 的 na_values）
+NA_STRINGS = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    计算文件内容的 SHA-256（分块读取，不把整个文件读进内存）。
+    :param path: 文件路径
+    :return: 十六进制字符串
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _convert_value(value):
+    """ 与 pandas 的 openpyxl 读取器相同的单元格转换：空 → ""，错误值 → NaN，整数值的浮点数 → int """
+    if value is None:
+        return ""
+    if type(value) is float:
+        return int(value) if value.is_integer() else value
+    if type(value) is str and value in ERROR_CODES:
+        return np.nan
+    return value
+
+
+def _header(values):
+    """ 表头：空单元格为 "Unnamed: 序号"，重复的列名依次加 ".1"、".2"（与 pd.read_excel 相同） """
+    names = [f"Unnamed: {position}" if value == "" else value for position, value in enumerate(values)]
+    seen = {}
+    for position, name in enumerate(names):
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        while count and f"{name}.{count}" in seen:
+            count += 1
+        if count:
+            names[position] = f"{name}.{count}"
+            seen[names[position]] = 1
+    return names
+
+
+def _column(values, as_str=False):
+    """
+    一列单元格 → Series，类型推断与 pd.read_excel 相同：
+    空单元格和 NA_STRINGS 为 NaN；全是数字（或数字文字）时为数值列，全是日期时为 datetime64，否则保持 object。
+    :param values: 单元格值的列表（已经过 _convert_value）
+    :param as_str: 按字符串读取（dtype=str），缺失值仍为 NaN
+    """
+    values = np.array(values, dtype=object)
+    missing = np.array([value != value or (type(value) is str and value in NA_STRINGS) for value in values], dtype=bool)
+    values[missing] = np.nan
+    if as_str:
+        present = ~missing
+        values[present] = [str(value) for value in values[present]]
+        return pd.Series(values, dtype=object)
+    column = pd.Series(values, dtype=object).infer_objects()
+    if column.dtype == object and len(column):
+        try:
+            column = pd.to_numeric(column)  # 数字文字（如 "12"）也按数字读取
+        except (ValueError, TypeError):
+            pass
+    return column
+
+
+@profiled("流式解析表格")
+def read_orders_streaming(path, sheet_name=0):
+    """
+    只读流式解析订单表格（不经过 pd.read_excel 的逐单元格对象），直接由 openpyxl 的行按列构造 DataFrame。
+    :param path: xlsx 路径
+    :param sheet_name: 表单序号或名称
+    :return: DataFrame，列类型与 pd.read_excel(dtype={"预计交期": str}) 一致
+    """
+    wb = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        ws.reset_dimensions()
+        data = []
+        last_row_with_data = -1
+        for row in ws.iter_rows(values_only=True):
+            converted = [_convert_value(value) for value in row]
+            while converted and converted[-1] == "":  # 去掉行尾的空单元格
+                converted.pop()
+            if converted:
+                last_row_with_data = len(data)
+            data.append(converted)
+    finally:
+        wb.close()
+
+    data = data[: last_row_with_data + 1]  # 去掉末尾的空行
+    if not data:
+        return pd.DataFrame()
+    width = max(len(row) for row in data)
+    data = [row + [""] * (width - len(row)) for row in data]
+    names = _header(data[0])
+    columns = list(zip(*data[1:])) if len(data) > 1 else [()] * width
+    df = pd.DataFrame({
+        position: _column(list(values), ORDER_DTYPES.get(name) is str)
+        for position, (name, values) in enumerate(zip(names, columns))
+    })
+    df.columns = names  # 按位置构造，重复的列名也不会互相覆盖
+    return df
+
+
+def normalize_orders(df):
+    """
+    订单表的存储类型（快照保存的就是这个结果，命中快照时不再转换）：
+    CATEGORY_COLUMNS 中的文字列（加工工艺、材料材质）转为 category，取值不变；
+    prepare_orders 对 category 列只按类别处理一次。
+    :param df: read_orders_streaming 的结果（原地修改）
+    :return: df
+    """
+    for column in CATEGORY_COLUMNS:
+        if column in df and df[column].dtype == object:
+            df[column] = map_categories(df[column])
+    return df
+
+
+def snapshot_path(path, digest):
+    """ 快照文件路径（不含扩展名）：<表格目录>/.schedule_cache/<文件名>.<哈希前 16 位> """
+    path = Path(path)
+    return path.parent / CACHE_DIR_NAME / f"{path.name}.{digest[:16]}"
+
+
+def _write_snapshot(df, base):
+    """
+    优先写 Parquet，缺少 pyarrow 或列类型不支持时改用 pickle；
+    先写临时文件（文件名带进程号，批量并行时互不干扰）再替换，避免半个文件。
+    """
+    base.parent.mkdir(parents=True, exist_ok=True)
+    for suffix in (".parquet", ".pkl"):
+        target = base.with_name(base.name + suffix)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        try:
+            if suffix == ".parquet":
+                df.to_parquet(tmp, index=False)
+            else:
+                df.to_pickle(tmp)
+        except (ImportError, ValueError, TypeError):
+            if tmp.exists():
+                tmp.unlink()
+            continue
+        os.replace(tmp, target)
+        return target
+    return None
+
+
+def _restore_missing(df):
+    """ Parquet 把文本列里的 NaN 读回为 None，改回 NaN，保证后续 astype(str) 等结果与直接读表格一致 """
+    for column in df.columns[df.dtypes == object]:
+        missing = df[column].isna()
+        if missing.any():
+            df.loc[missing, column] = np.nan
+    return df
+
+
+def _read_snapshot(base):
+    """ 读取已有快照，不存在返回 None """
+    parquet = base.with_name(base.name + ".parquet")
+    if parquet.exists():
+        return _restore_missing(pd.read_parquet(parquet))
+    pickle = base.with_name(base.name + ".pkl")
+    if pickle.exists():
+        return pd.read_pickle(pickle)
+    return None
+
+
+def _remove_stale_snapshots(path, keep):
+    """ 删除同一表格旧内容的快照（其他进程正在写的临时文件不动） """
+    cache_dir = Path(path).parent / CACHE_DIR_NAME
+    for old in cache_dir.glob(f"{Path(path).name}.*"):
+        if old != keep and old.suffix != ".tmp":
+            old.unlink(missing_ok=True)
+
+
+@profiled("读取订单")
+def read_orders(path, cache=True):
+    """
+    读取订单 Excel，预计交期按字符串读取，加工工艺、材料材质为 category（normalize_orders）。
+    :param path: xlsx 路径
+    :param cache: 是否使用 / 生成内容哈希快照
+    :return: DataFrame
+    """
+    if not cache:
+        return normalize_orders(read_orders_streaming(path))
+
+    base = snapshot_path(path, file_digest(path))
+    try:
+        df = _read_snapshot(base)
+    except Exception as e:  # 快照损坏时重新解析
+        print(f"⚠️ 快照读取失败，重新解析: {base}，错误信息: {e}")
+        df = None
+    if df is not None:
+        return df
+
+    df = normalize_orders(read_orders_streaming(path))
+    try:
+        written = _write_snapshot(df, base)
+        if written is not None:
+            _remove_stale_snapshots(path, written)
+    except OSError as e:  # 表格所在目录不可写时只是不缓存
+        print(f"⚠️ 快照写入失败: {base}，错误信息: {e}")
+    return df
@@ -0,0 +1,236 @@
+"""
+排产结果缓存：按内容哈希保存各设备的排产结果和输出的 Excel，重复排产时直接复用。
+
+    python -m production_schedule 3.21订单信息.xlsx --result-cache .schedule_results --result-cache-mb 512
+
+每台设备的键 = 该设备队列（分配设备后的订单行）的哈希 + 这台设备用到的配置
+（同一设备池的设备表、班次、开工时间、适用的换料规则、拆分参数）+ 排产代码的版本；
+改了一行订单只有它所在的设备重新排产，其他设备直接读缓存。
+打开优化（optimize_seconds > 0）时结果取决于运行时间、不可复现，不使用设备缓存。
+输出的 Excel 按排产结果的哈希缓存，结果没变时复制缓存的文件，不再逐个单元格写入。
+
+缓存目录里每条缓存一个文件（<键>.pkl / <键>.xlsx），命中时更新文件的修改时间，
+总大小超过上限时按修改时间删除最久没用的（LRU）。
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+DEFAULT_MAX_MB = 512
+_SUFFIXES = (".pkl", ".xlsx")
+
+
+def code_version():
+    """
+    排产代码的版本：包内所有 .py 文件（文件名和内容）的哈希。
+    改了排产逻辑或列类型后键随之变化，旧缓存自动失效，不需要手动改版本号。
+    :return: 十六进制字符串（前 16 位）
+    """
+    package = Path(__file__).parent
+    digest = hashlib.sha256()
+    for path in sorted(package.rglob("*.py")):
+        digest.update(path.relative_to(package).as_posix().encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+CACHE_VERSION = code_version()
+
+
+def frame_digest(df, digest=None):
+    """
+    DataFrame 内容的哈希：列名、列类型和各行的值（不含索引）。
+    类别列只按值计算，类别列表不同（如整张表多了一种材质）不影响哈希。
+    :param df: DataFrame
+    :param digest: 要继续更新的 hashlib 对象，默认新建 sha256
+    :return: hashlib 对象
+    """
+    digest = digest or hashlib.sha256()
+    dtypes = ["category" if isinstance(dtype, pd.CategoricalDtype) else str(dtype) for dtype in df.dtypes]
+    digest.update(json.dumps([list(map(str, df.columns)), dtypes], ensure_ascii=False).encode("utf-8"))
+    if len(df):
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest
+
+
+def device_settings(config, device):
+    """
+    一台设备的排产用到的配置（其他设备的设置变化不影响这台设备的缓存）。
+    :param config: ScheduleConfig
+    :param device: 设备名
+    :return: 可写入 JSON 的字典
+    """
+    registry = config.registry
+    processes = registry[device].processes if device in registry else None
+    start = config.start_times([device])[device]
+    return {
+        "start_time": config.start_time.strftime("%Y-%m-%d %H:%M"),
+        "device_start_time": start.strftime("%Y-%m-%d %H:%M"),
+        "work_shifts": [list(shift) for shift in config.calendar_for(device).work_shifts],
+        "changeover_minutes": config.changeover_minutes,
+        "changeover_rules": [rule.to_dict() for rule in config.changeover_rules if rule.applies_to(device)],
+        "split_overdue": config.split_overdue,
+        "max_split_rounds": config.max_split_rounds,
+        "split_placement": config.split_placement,
+        # only_machine / exclusive_first 取决于同一设备池的其他设备
+        "pool": [machine.to_dict() for machine in registry.machines if machine.processes == processes],
+    }
+
+
+class ResultCache:
+    """
+    磁盘上的排产结果缓存，多个进程可以共用同一个目录（先写临时文件再替换）。
+    :param directory: 缓存目录，不存在时自动创建
+    :param max_mb: 缓存总大小上限（MB），超过时删除最久没用的
+    """
+
+    def __init__(self, directory, max_mb=DEFAULT_MAX_MB):
+        self.directory = Path(directory)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+    def device_key(self, device, queue, config):
+        """
+        一台设备的缓存键。
+        :param device: 设备名
+        :param queue: 分配到该设备的订单（行号列应为队列内的位置）
+        :param config: ScheduleConfig
+        :return: 十六进制字符串
+        """
+        digest = hashlib.sha256(f"设备 v{CACHE_VERSION} {device}".encode("utf-8"))
+        settings = device_settings(config, device)
+        digest.update(json.dumps(settings, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        return frame_digest(queue, digest).hexdigest()
+
+    def workbook_key(self, result):
+        """
+        输出 Excel 的缓存键：排产结果各表的哈希。
+        :param result: ScheduleResult
+        :return: 十六进制字符串
+        """
+        digest = hashlib.sha256(f"表格 v{CACHE_VERSION} {json.dumps(list(result.devices), ensure_ascii=False)}".encode("utf-8"))
+        for frame in (result.orders, result.project_delivery, result.other):
+            frame_digest(frame, digest)
+        return digest.hexdigest()
+
+    def _path(self, key, suffix):
+        return self.directory / f"{key}{suffix}"
+
+    def _touch(self, path):
+        """ 命中时更新修改时间，淘汰时按它排序 """
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def load_frame(self, key, like=None):
+        """
+        读取缓存的排产结果。
+        :param key: 缓存键
+        :param like: 同一内容的当前队列，类别列的类别对齐到它（合并各设备结果时类型一致）
+        :return: DataFrame，未命中返回 None
+        """
+        path = self._path(key, ".pkl")
+        try:
+            with open(path, "rb") as f:
+                df = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:  # 损坏的缓存当作未命中，删掉重新生成
+            print(f"⚠️ 排产结果缓存无法读取，重新排产: {path.name} ({type(e).__name__})")
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        self._touch(path)
+        self.hits += 1
+        if like is not None:
+            for column in df.columns.intersection(like.columns):
+                if isinstance(df[column].dtype, pd.CategoricalDtype) and isinstance(like[column].dtype, pd.CategoricalDtype):
+                    df[column] = df[column].cat.set_categories(like[column].cat.categories)
+        return df
+
+    def store_frame(self, key, df):
+        """ 保存一台设备的排产结果 """
+        self._write(key, ".pkl", lambda tmp: df.to_pickle(tmp))
+
+    def copy_workbook(self, key, output_file):
+        """
+        结果没变时把缓存的 Excel 复制到输出路径。
+        :return: 是否命中
+        """
+        path = self._path(key, ".xlsx")
+        try:
+            shutil.copyfile(path, output_file)
+        except FileNotFoundError:
+            return False
+        self._touch(path)
+        return True
+
+    def store_workbook(self, key, output_file):
+        """ 把刚写出的 Excel 复制一份到缓存 """
+        self._write(key, ".xlsx", lambda tmp: shutil.copyfile(output_file, tmp))
+
+    def _write(self, key, suffix, write):
+        """ 先写临时文件（文件名带进程号）再替换，写完按大小上限淘汰 """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self._path(key, suffix)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        try:
+            write(tmp)
+            os.replace(tmp, target)
+        except OSError as e:  # 缓存写不进去不影响排产
+            print(f"⚠️ 排产结果缓存写入失败: {e}")
+            tmp.unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def entries(self):
+        """
+        缓存中的文件，最久没用的在前。
+        :return: [(路径, 大小, 修改时间)]
+        """
+        if not self.directory.is_dir():
+            return []
+        entries = []
+        for path in self.directory.iterdir():
+            if path.suffix not in _SUFFIXES:
+                continue  # 其他进程正在写的临时文件不动
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime_ns))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self):
+        """ 缓存总大小（字节） """
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        总大小超过上限时，按修改时间从旧到新删除。
+        :return: 删除的文件数
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """ 清空缓存 """
+        for path, _, _ in self.entries():
+            path.unlink(missing_ok=True)
+
@@ -0,0 +1,315 @@
+"""
+情景对比（what-if）：分配设备、排序分组、换料只做一次，再批量评估多组班次 / 开工时间。
+
+    planner = ScenarioPlanner.from_orders(read_orders("3.21订单信息.xlsx"), config)
+    report = planner.evaluate([
+        Scenario("加班 21:00-23:00", work_shifts=DEFAULT_WORK_SHIFTS + [("21:00", "23:00")]),
+        Scenario("异型管机2 13:30 开工", device_start_times={"异型管机2": "2025-03-21 13:30"}),
+    ])
+    report.summary                       # 每个情景一行：逾期行数、逾期订单数、最晚完工时间、各设备完工时间
+    report.project_delivery["加班 21:00-23:00"]  # 每个情景的项目交付时间表
+    export_schedule(planner.result(scenario), "加班.xlsx")
+
+各情景沿用基准排产（config）的生产顺序：先全量排产一次（含拆分逾期订单），
+之后每个情景只换班次日历和开工时间，重算开始 / 结束时间、是否逾期、项目交付时间。
+同一台设备上所有情景一起递推：每一段连续不换料的订单只循环一次，每次处理所有情景（数组），
+班次不同的日历按行拼成一张表，用一次 searchsorted 查各自的班次。
+生产顺序不随情景变化：情景下逾期的订单不会重新拆分，需要时用 scenario.apply(config) 全量排产。
+"""
+import copy
+import json
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .config import ScheduleConfig
+from .pipeline import ScheduleResult, project_delivery_times, schedule
+from .profiling import profiled
+from .shift_calendar import MINUTES_PER_DAY, NS_PER_MINUTE, to_minutes
+
+ROW_STEP = 1 << 20  # 多个日历拼成一维数组时每行的偏移，大于一天的分钟数
+
+
+@dataclass
+class Scenario:
+    """
+    一个情景：在基准排产参数上修改班次和开工时间。
+    :param name: 情景名
+    :param work_shifts: 工作班次，None 沿用基准
+    :param start_time: 各设备的默认开工时间，None 沿用基准
+    :param device_start_times: 单独指定某些设备的开工时间（device_last_end_time），与基准的合并
+    :param device_work_shifts: 单独指定某些设备的班次，如 {"异型管机2": [["08:00", "12:00"], ["13:30", "23:00"]]}
+    """
+    name: str
+    work_shifts: list = None
+    start_time: pd.Timestamp = None
+    device_start_times: dict = field(default_factory=dict)
+    device_work_shifts: dict = field(default_factory=dict)
+
+    def apply(self, config):
+        """
+        情景对应的排产参数。
+        :param config: 基准 ScheduleConfig
+        :return: 新的 ScheduleConfig（不修改 config）
+        """
+        config = copy.deepcopy(config)
+        if self.work_shifts is not None:
+            config.work_shifts = [tuple(shift) for shift in self.work_shifts]
+        if self.start_time is not None:
+            config.start_time = pd.Timestamp(self.start_time)
+        config.device_start_times.update({device: pd.Timestamp(ts) for device, ts in self.device_start_times.items()})
+        for machine in config.machines:
+            if machine.name in self.device_work_shifts:
+                machine.work_shifts = [tuple(shift) for shift in self.device_work_shifts[machine.name]]
+        return config
+
+    @classmethod
+    def from_dict(cls, data):
+        """ 从字典构造（JSON 情景文件的一项） """
+        return cls(**data)
+
+
+@dataclass
+class ScenarioReport:
+    """
+    情景对比结果。
+    :param summary: 每个情景一行（情景, 订单行数, 逾期行数, 逾期订单数, 最晚完工时间, 各设备完工时间）
+    :param project_delivery: {情景: 项目交付时间表（订单编号, 项目交付时间）}
+    """
+    summary: pd.DataFrame
+    project_delivery: dict
+
+    def to_excel(self, path):
+        """ 写出 Excel：“汇总”表单 + “项目交付时间”表单（每个情景一列） """
+        delivery = pd.DataFrame({
+            name: table.set_index("订单编号")["项目交付时间"] for name, table in self.project_delivery.items()
+        })
+        with pd.ExcelWriter(path) as writer:
+            self.summary.to_excel(writer, sheet_name="汇总", index=False)
+            delivery.sort_values(by=delivery.columns[0]).to_excel(writer, sheet_name="项目交付时间", index_label="订单编号")
+
+
+def load_scenarios(path):
+    """
+    从 JSON 文件读取情景列表，每项是 Scenario 的字段，如
+    [{"name": "加班", "work_shifts": [["08:00", "12:00"], ["13:30", "17:30"], ["18:00", "23:00"]]}]
+    :return: Scenario 列表
+    """
+    with open(path, encoding="utf-8") as f:
+        return [Scenario.from_dict(item) for item in json.load(f)]
+
+
+class _CalendarStack:
+    """
+    多个班次日历按行拼在一起，ShiftCalendar 的 *_array 方法的多日历版本：
+    每个元素带一个行号（用哪个日历），一次 searchsorted 同时查所有日历。
+    结果与逐个日历计算完全一致。
+    :param calendars: ShiftCalendar 列表
+    """
+
+    def __init__(self, calendars):
+        width = max(len(calendar.starts) for calendar in calendars)
+
+        def pad(name, fill):
+            return np.array([getattr(calendar, name) + [fill] * (width - len(calendar.starts)) for calendar in calendars],
+                            dtype=np.int64)
+
+        # 补齐的班次放在一天之后，不会被查到
+        self.starts = pad("starts", MINUTES_PER_DAY + 1)
+        self.ends = pad("ends", MINUTES_PER_DAY + 1)
+        self.cum_starts = pad("cum_starts", ROW_STEP - 1)
+        self.cum_ends = pad("cum_ends", ROW_STEP - 1)
+        self.daily = np.array([calendar.daily_minutes for calendar in calendars], dtype=np.int64)
+        self.last = np.array([len(calendar.starts) - 1 for calendar in calendars], dtype=np.int64)
+        self.width = width
+        offsets = (np.arange(len(calendars), dtype=np.int64) * ROW_STEP)[:, None]
+        self._starts = (self.starts + offsets).ravel()
+        self._cum_starts = (self.cum_starts + offsets).ravel()
+        self._cum_ends = (self.cum_ends + offsets).ravel()
+
+    def _search(self, flat, rows, values, side):
+        """ 在各自的行里 searchsorted，返回行内下标 """
+        return np.searchsorted(flat, rows * ROW_STEP + values, side=side) - rows * self.width
+
+    def working_minutes(self, minutes, rows):
+        """ ShiftCalendar.working_minutes_array """
+        day, offset = np.divmod(minutes, MINUTES_PER_DAY)
+        i = self._search(self._starts, rows, offset, "right") - 1
+        j = np.maximum(i, 0)
+        worked = self.cum_starts[rows, j] + np.minimum(offset, self.ends[rows, j]) - self.starts[rows, j]
+        return day * self.daily[rows] + np.where(i < 0, 0, worked)
+
+    def start_at(self, worked, rows):
+        """ ShiftCalendar.start_at_array """
+        day, offset = np.divmod(worked, self.daily[rows])
+        i = self._search(self._cum_starts, rows, offset, "right") - 1
+        return day * MINUTES_PER_DAY + self.starts[rows, i] + offset - self.cum_starts[rows, i]
+
+    def end_at(self, worked, rows):
+        """ ShiftCalendar.end_at_array """
+        day, offset = np.divmod(worked, self.daily[rows])
+        i = np.minimum(self._search(self._cum_ends, rows, offset, "left"), self.last[rows])
+        end = day * MINUTES_PER_DAY + self.starts[rows, i] + offset - self.cum_starts[rows, i]
+        return np.where(offset == 0, (day - 1) * MINUTES_PER_DAY + self.ends[rows, self.last[rows]], end)
+
+
+def schedule_queue_scenarios(stack, rows, start_minutes, minutes, changeover_minutes):
+    """
+    schedule_queue 的多情景版本：同一条队列（生产顺序、换料固定），每个情景各自的日历和开工时刻。
+    :param stack: _CalendarStack
+    :param rows: 每个情景用 stack 的哪个日历（长度 S）
+    :param start_minutes: 每个情景的设备开工时刻（分钟整数，长度 S）
+    :param minutes: 每单生产分钟数（按队列顺序，长度 n）
+    :param changeover_minutes: 每单开工前的换料分钟数（长度 n）
+    :return: (开始时刻, 结束时刻)，S × n 的分钟整数数组
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    minutes = np.asarray(minutes, dtype=np.int64)
+    changeover_minutes = np.asarray(changeover_minutes, dtype=np.int64)
+    n = len(minutes)
+    if n == 0:
+        empty = np.empty((len(rows), 0), dtype=np.int64)
+        return empty, empty
+
+    # 分段、段内累计与 schedule_queue 相同，所有情景共用
+    run_starts = np.flatnonzero(changeover_minutes > 0)
+    if run_starts.size == 0 or run_starts[0] != 0:
+        run_starts = np.concatenate(([0], run_starts))
+    run_ends = np.append(run_starts[1:], n)
+    run_id = np.repeat(np.arange(len(run_starts)), run_ends - run_starts)
+    before = np.cumsum(minutes) - minutes
+    offset_in_run = before - before[run_starts][run_id]
+
+    # **🔹 逐段递推段起点 W，每次同时处理所有情景**
+    run_worked = np.empty((len(rows), len(run_starts)), dtype=np.int64)
+    last_end = np.asarray(start_minutes, dtype=np.int64)
+    for k, (first, stop) in enumerate(zip(run_starts.tolist(), run_ends.tolist())):
+        worked = stack.working_minutes(last_end + int(changeover_minutes[first]), rows)
+        run_worked[:, k] = worked
+        last = stop - 1
+        last_start_worked = worked + int(offset_in_run[last])
+        if minutes[last] > 0:
+            last_end = stack.end_at(last_start_worked + int(minutes[last]), rows)
+        else:  # 0 分钟的订单，完工时间即开工时间
+            last_end = stack.start_at(last_start_worked, rows)
+
+    start_worked = run_worked[:, run_id] + offset_in_run
+    grid = np.broadcast_to(rows[:, None], start_worked.shape)
+    starts = stack.start_at(start_worked, grid)
+    ends = np.where(minutes > 0, stack.end_at(start_worked + minutes, grid), starts)
+    return starts, ends
+
+
+class ScenarioPlanner:
+    """
+    在一次基准排产的生产顺序上评估多个情景。
+    :param result: 基准排产结果（schedule 的 ScheduleResult）
+    :param config: 基准排产参数
+    """
+
+    def __init__(self, result, config=None):
+        self.base = result
+        self.config = config or ScheduleConfig()
+        orders = result.orders
+        self.devices = orders["设备"].to_numpy()
+        self.minutes = orders["生产分钟"].to_numpy(dtype=np.int64)
+        self.changeovers = orders["换料分钟"].to_numpy(dtype=np.int64)
+        due = orders["预计交期"].to_numpy().astype("datetime64[ns]")
+        self.has_due = ~np.isnat(due)
+        self.due = due.astype(np.int64)
+        present = pd.unique(self.devices)
+        order = [device for device in result.devices if device in present] + [d for d in present if d not in result.devices]
+        self.positions = {device: np.flatnonzero(self.devices == device) for device in order}  # 按设备表的顺序
+
+        # 项目交付时间：按订单编号排好，之后每个情景用 reduceat 取各订单的最晚结束时间
+        codes, self.order_ids = pd.factorize(orders["订单编号"])
+        self._order_sort = np.argsort(codes, kind="stable")
+        self._order_bounds = np.flatnonzero(np.r_[True, np.diff(codes[self._order_sort]) != 0])
+
+    @classmethod
+    def from_orders(cls, df_original, config=None):
+        """ 先按基准参数全量排产，再构造 ScenarioPlanner """
+        config = config or ScheduleConfig()
+        return cls(schedule(df_original, config), config)
+
+    def _end_matrix(self, scenarios):
+        """
+        所有情景的生产开始 / 结束时间。
+        :return: (开始时刻, 结束时刻)，情景数 × 订单行数的分钟整数数组
+        """
+        configs = [scenario.apply(self.config) for scenario in scenarios]
+        calendars, calendar_rows = [], {}
+        starts = np.zeros((len(scenarios), len(self.devices)), dtype=np.int64)
+        ends = np.zeros_like(starts)
+        if not configs:
+            return starts, ends
+        for device, positions in self.positions.items():
+            keys = []
+            for config in configs:
+                calendar = config.calendar_for(device)
+                shifts = tuple(calendar.work_shifts)
+                if shifts not in calendar_rows:
+                    calendar_rows[shifts] = len(calendars)
+                    calendars.append(calendar)
+                keys.append((calendar_rows[shifts], to_minutes(config.start_times([device])[device])))
+            # 班次和开工时刻都相同的情景只算一次
+            unique, inverse = np.unique(np.array(keys, dtype=np.int64), axis=0, return_inverse=True)
+            stack = _CalendarStack(calendars)
+            device_starts, device_ends = schedule_queue_scenarios(
+                stack, unique[:, 0], unique[:, 1], self.minutes[positions], self.changeovers[positions],
+            )
+            starts[:, positions] = device_starts[inverse.ravel()]
+            ends[:, positions] = device_ends[inverse.ravel()]
+        return starts, ends
+
+    @profiled("情景对比")
+    def evaluate(self, scenarios):
+        """
+        批量评估情景。
+        :param scenarios: Scenario（或字典）列表
+        :return: ScenarioReport
+        """
+        scenarios = [s if isinstance(s, Scenario) else Scenario.from_dict(s) for s in scenarios]
+        names = [scenario.name for scenario in scenarios]
+        if len(set(names)) != len(names):
+            raise ValueError("情景名重复")
+        _, ends = self._end_matrix(scenarios)
+        end_ns = ends * NS_PER_MINUTE
+        overdue = self.has_due & (self.due < end_ns)
+
+        # **🔹 各订单的最晚结束时间 = 项目交付时间**
+        project_ends = np.maximum.reduceat(end_ns[:, self._order_sort], self._order_bounds, axis=1)
+        project_overdue = np.logical_or.reduceat(overdue[:, self._order_sort], self._order_bounds, axis=1)
+
+        summary = pd.DataFrame({
+            "情景": names,
+            "订单行数": len(self.devices),
+            "逾期行数": overdue.sum(axis=1),
+            "逾期订单数": project_overdue.sum(axis=1),
+            "最晚完工时间": pd.to_datetime(end_ns.max(axis=1, initial=0)),
+        })
+        for device, positions in self.positions.items():
+            summary[f"{device}完工时间"] = pd.to_datetime(end_ns[:, positions].max(axis=1, initial=0))
+
+        project_delivery = {}
+        for scenario, delivery in zip(scenarios, project_ends):
+            table = pd.DataFrame({"订单编号": self.order_ids, "项目交付时间": pd.to_datetime(delivery)})
+            project_delivery[scenario.name] = table.sort_values(by="项目交付时间").reset_index(drop=True)
+        return ScenarioReport(summary=summary, project_delivery=project_delivery)
+
+    def result(self, scenario):
+        """
+        某个情景的完整排产结果（可直接 export_schedule）。
+        :param scenario: Scenario 或字典
+        :return: ScheduleResult
+        """
+        scenario = scenario if isinstance(scenario, Scenario) else Scenario.from_dict(scenario)
+        starts, ends = self._end_matrix([scenario])
+        df = self.base.orders.copy()
+        df["生产开始时间"] = (starts[0] * NS_PER_MINUTE).astype("datetime64[ns]")
+        df["生产结束时间"] = (ends[0] * NS_PER_MINUTE).astype("datetime64[ns]")
+        df["按时交付检查"] = ~self.has_due | (self.due >= ends[0] * NS_PER_MINUTE)
+        return ScheduleResult(
+            orders=df, project_delivery=project_delivery_times(df), other=self.base.other, devices=self.base.devices,
+        )
@@ -0,0 +1,119 @@
+"""
+订单表的内部列类型：排产过程中用紧凑的类型，只在输出时转换为显示用的文字。
+
+    设备、材料材质、原始材料材质、加工工艺   category（几十种取值，比较 / 分组只比整数编码）
+    材料厚度                                 float32
+    是否换料、是否拆分、按时交付检查、是否有交期   bool（按时交付检查 True 表示按时交付）
+    生产分钟、换料分钟                       int64 分钟
+    预计交期、生产开始 / 结束时间等          datetime64[ns]（本身就是 int64，排产时按分钟整数计算）
+
+厚度用 float32 保存，比较时两边都转为 float32（见 as_thickness），0.6 这类十进制小数才能对得上；
+输出时转回 float64 的最短十进制表示，与输入表格一致。
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORY_COLUMNS = ["设备", "材料材质", "原始材料材质", "加工工艺"]
+THICKNESS_COLUMN = "材料厚度"
+# 布尔列输出时的文字：(True, False)
+FLAG_LABELS = {
+    "是否换料": ("是", "否"),
+    "是否拆分": ("是", "否"),
+    "按时交付检查": ("按时交付", "逾期交付"),
+}
+
+
+def map_categories(values, func=None):
+    """
+    转为 category 列，func 对每个不同的取值只调用一次（如去掉“来料”前缀）。
+    :param values: Series
+    :param func: 取值的转换函数，None 表示不转换
+    :return: category Series（index 同 values）
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    mapped = pd.Categorical([func(value) for value in uniques] if func is not None else uniques)
+    return pd.Series(
+        pd.Categorical.from_codes(mapped.codes[codes], categories=mapped.categories),
+        index=values.index, name=values.name,
+    )
+
+
+def as_thickness(values):
+    """ 厚度比较用的 float32 数组（无法转换的为 NaN） """
+    return np.asarray(pd.to_numeric(pd.Series(values), errors="coerce"), dtype=np.float32)
+
+
+def to_internal(df):
+    """
+    把预处理后的订单转换为内部类型（原地修改）。
+    :param df: 订单 DataFrame
+    :return: df
+    """
+    for column in CATEGORY_COLUMNS:
+        if column in df and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = map_categories(df[column])
+    if THICKNESS_COLUMN in df and df[THICKNESS_COLUMN].dtype == np.float64:
+        df[THICKNESS_COLUMN] = df[THICKNESS_COLUMN].astype(np.float32)
+    return df
+
+
+def match_categories(df, references):
+    """
+    让 df 和 references 中各表的 category 列使用相同的类别，拼接时才能保持 category 类型。
+    新的取值追加到类别后面；references 原地更新。
+    :param df: 新的订单
+    :param references: 已有订单的 DataFrame 列表
+    :return: 转换后的 df
+    """
+    df = df.copy()
+    for column in CATEGORY_COLUMNS:
+        frames = [ref for ref in references if column in ref and isinstance(ref[column].dtype, pd.CategoricalDtype)]
+        if not frames or column not in df:
+            continue
+        # 已有的表直接合并类别（不扫描整列），只有新订单按取值追加
+        categories = frames[0][column].cat.categories
+        new_values = pd.Index(df[column].dropna().astype(object).unique())
+        for values in [ref[column].cat.categories for ref in frames[1:]] + [new_values]:
+            categories = categories.append(values.difference(categories))
+        for ref in frames:
+            if len(ref[column].cat.categories) < len(categories):
+                ref[column] = ref[column].cat.set_categories(categories)
+        df[column] = pd.Categorical(df[column], categories=categories)
+    return df
+
+
+def display_thickness(values):
+    """ float32 厚度 → float64 的最短十进制表示（0.6f → 0.6），每个不同的厚度只转换一次 """
+    codes, uniques = pd.factorize(values)
+    decimals = np.array([float(str(value)) for value in np.asarray(uniques)] + [np.nan], dtype=np.float64)
+    return pd.Series(decimals[codes], index=values.index, name=values.name)
+
+
+def to_display(df):
+    """
+    输出前转换为显示用的类型：布尔列 → 是 / 否、按时交付 / 逾期交付，category → 文字，厚度 → float64。
+    :param df: 订单 DataFrame（不修改）
+    :return: 新的 DataFrame
+    """
+    out = df.copy(deep=False)  # 下面只替换整列，不会改到 df
+    for column, (yes, no) in FLAG_LABELS.items():
+        if column in out and out[column].dtype == bool:
+            out[column] = np.where(out[column].to_numpy(), yes, no).astype(object)
+    for column in out.columns:
+        if isinstance(out[column].dtype, pd.CategoricalDtype):
+            out[column] = out[column].astype(object)
+    if THICKNESS_COLUMN in out and out[THICKNESS_COLUMN].dtype == np.float32:
+        out[THICKNESS_COLUMN] = display_thickness(out[THICKNESS_COLUMN])
+    return out
+
+
+def flag_values(values, column):
+    """
+    读取布尔列：内部的 bool 列原样返回，输出格式的文字（是 / 按时交付）转换为 bool。
+    :param values: Series
+    :param column: 列名（FLAG_LABELS 的键）
+    :return: 布尔数组
+    """
+    if values.dtype == bool:
+        return values.to_numpy()
+    return (values.fillna("").astype(str).str.strip() == FLAG_LABELS[column][0]).to_numpy()
@@ -0,0 +1,242 @@
+"""
+本地 HTTP / JSON 排产服务：MES 等系统直接提交订单行，返回各设备的生产顺序和项目交付时间，不再交换 Excel。
+
+    python -m production_schedule --serve 8765 -j 4 --config config.json
+
+    POST /schedule   {"orders": [{"订单编号": "SO001", "加工工艺": "直管", "材料厚度": 0.5, ...}, ...],
+                      "config": {"start_time": "2025-03-21 08:00"}}          # config 可省略，覆盖服务启动时的参数
+    GET  /health     {"status": "ok", "workers": 4}
+
+返回：
+    {"devices": {"直管机": [{"订单编号": ..., "生产开始时间": ..., "生产结束时间": ..., "是否换料": "是", "按时交付检查": "按时交付", ...}]},
+     "project_delivery": [{"订单编号": ..., "项目交付时间": ...}],
+     "other": [...]}                                                         # 与输出 Excel 的各表单相同
+
+asyncio 只负责收发请求，排产在进程池里运行，多个请求同时排产；只用标准库，完全离线。
+请求格式不对（RequestError：JSON、订单列、config 参数不对，以及 Content-Length 不对、chunked 请求体）时返回 400 和 {"error": "..."}，
+排产本身出错时返回 500。
+"""
+import asyncio
+import json
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+import pandas as pd
+
+from .config import ScheduleConfig
+from .export import output_sheets
+from .pipeline import order_columns, schedule
+
+DEFAULT_PORT = 8765
+MAX_BODY_MB = 64
+
+
+class RequestError(ValueError):
+    """ 请求内容不对（JSON 格式、订单列、config 参数），返回 400 """
+
+
+def orders_frame(orders, machines=None):
+    """
+    把 JSON 的订单行转换为与 read_orders 相同的表格（预计交期为字符串，缺失为 NaN）。
+    :param orders: 订单行（对象）的列表
+    :param machines: 设备表，决定需要哪些数量列，默认 DEFAULT_MACHINES
+    :param orders: 字典列表
+    :return: DataFrame
+    """
+    if not isinstance(orders, list) or not all(isinstance(row, dict) for row in orders):
+        raise RequestError("orders 必须是订单行（对象）的列表")
+    columns = order_columns(machines)
+    df = pd.DataFrame.from_records(orders) if orders else pd.DataFrame(columns=columns)
+    missing = [column for column in columns if column not in df.columns]
+    if missing:
+        raise RequestError(f"订单缺少列: {'、'.join(missing)}")
+    due = df["预计交期"]
+    df["预计交期"] = due.where(due.isna(), due.astype(str))
+    return df
+
+
+def _records(df):
+    """ DataFrame → 行字典列表，时间列为 "YYYY-MM-DD HH:MM" 文字，缺失值为 None """
+    df = df.assign(**{
+        column: df[column].dt.strftime("%Y-%m-%d %H:%M")
+        for column in df.columns if pd.api.types.is_datetime64_any_dtype(df[column])
+    })
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def result_json(result):
+    """
+    排产结果转换为可写入 JSON 的字典，内容与输出 Excel 的各表单相同。
+    :param result: ScheduleResult
+    :return: {"devices": {设备: 行列表}, "project_delivery": 行列表, "other": 行列表}
+    """
+    sheets = output_sheets(result)
+    return {
+        "devices": {device: _records(sheets[device]) for device in result.devices},
+        "project_delivery": _records(sheets["项目交付时间"]),
+        "other": _records(sheets["其他"]),
+    }
+
+
+def schedule_request(body, config):
+    """
+    处理一个排产请求（在进程池中运行，解析和序列化 JSON 也不占用前端）。
+    :param body: 请求体（bytes）
+    :param config: 服务启动时的 ScheduleConfig
+    :return: 响应体（bytes）
+    """
+    try:
+        payload = json.loads(body)
+    except ValueError as e:  # 含 UnicodeDecodeError
+        raise RequestError(f"请求体不是 JSON: {e}") from e
+    if not isinstance(payload, dict):
+        raise RequestError("请求体必须是 JSON 对象")
+    overrides = payload.get("config") or {}
+    if not isinstance(overrides, dict):
+        raise RequestError("config 必须是 JSON 对象")
+    if overrides:
+        try:
+            config = ScheduleConfig.from_dict({**config.to_dict(), **overrides})
+        except (TypeError, KeyError, AttributeError, ValueError) as e:  # 如 "work_shifts": 5
+            raise RequestError(f"config 参数不对: {e}") from e
+    config.device_workers = 1  # 已经在进程池里，不再开子进程
+    result = schedule(orders_frame(payload.get("orders"), config.registry), config)
+    return json.dumps(result_json(result), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _error(message):
+    """ 错误响应体 {"error": ...} """
+    return json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+
+
+async def _write_response(writer, status, payload, close=False):
+    """ 写出一个 JSON 响应 """
+    headers = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(payload)}",
+    ]
+    if close:
+        headers.append("Connection: close")
+    writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + payload)
+    await writer.drain()
+
+
+class ScheduleService:
+    """
+    asyncio 前端 + 进程池的排产服务。
+    :param config: ScheduleConfig，请求里的 config 覆盖其中的参数
+    :param workers: 同时排产的进程数，默认 CPU 核数
+    :param host: 监听地址，默认只接受本机
+    :param port: 端口，0 表示由系统分配空闲端口
+    :param max_body_mb: 请求体大小上限（MB）
+    """
+
+    def __init__(self, config=None, workers=None, host="127.0.0.1", port=DEFAULT_PORT, max_body_mb=MAX_BODY_MB):
+        self.config = config or ScheduleConfig()
+        self.workers = workers or os.cpu_count() or 1
+        self.host = host
+        self.port = port
+        self.max_body = int(max_body_mb * 1024 * 1024)
+        self.pool = None
+
+    async def _read_request(self, reader):
+        """
+        读取一个 HTTP 请求。
+        :return: (方法, 路径, 请求体)，连接已关闭时返回 None
+        """
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise ValueError("请求行格式不对")
+        length = 0
+        while True:
+            header = await reader.readline()
+            if header in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = header.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                try:
+                    length = int(value.strip())
+                except ValueError:
+                    raise ValueError("Content-Length 不是整数")
+                if length < 0:
+                    raise ValueError("Content-Length 不能为负数")
+            elif name == "transfer-encoding":
+                raise ValueError("不支持 Transfer-Encoding（如 chunked），请求体请带 Content-Length")
+        if length > self.max_body:
+            raise OverflowError(f"请求体超过 {self.max_body // (1024 * 1024)}MB")
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?", 1)[0], body
+
+    async def _respond(self, method, path, body):
+        """ 路由：返回 (状态码, 响应体) """
+        if path == "/health":
+            return HTTPStatus.OK, json.dumps({"status": "ok", "workers": self.workers}).encode("utf-8")
+        if path != "/schedule":
+            return HTTPStatus.NOT_FOUND, _error("路径不存在，可用 POST /schedule、GET /health")
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, _error("/schedule 只接受 POST")
+        loop = asyncio.get_running_loop()
+        try:
+            return HTTPStatus.OK, await loop.run_in_executor(self.pool, schedule_request, body, self.config)
+        except RequestError as e:  # JSON 格式、缺少列、参数不对
+            return HTTPStatus.BAD_REQUEST, _error(str(e))
+        except Exception as e:  # 排产出错（包括排产内部的 ValueError）
+            return HTTPStatus.INTERNAL_SERVER_ERROR, _error(f"{type(e).__name__}: {e}")
+
+    async def handle(self, reader, writer):
+        """ 处理一个连接（支持 keep-alive，同一连接依次处理多个请求） """
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ValueError as e:
+                    await _write_response(writer, HTTPStatus.BAD_REQUEST, _error(f"请求格式不对: {e}"), close=True)
+                    break
+                except asyncio.IncompleteReadError:
+                    await _write_response(writer, HTTPStatus.BAD_REQUEST, _error("请求格式不对"), close=True)
+                    break
+                except OverflowError as e:
+                    await _write_response(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, _error(str(e)), close=True)
+                    break
+                if request is None:
+                    break
+                status, payload = await self._respond(*request)
+                await _write_response(writer, status, payload)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, ready=None):
+        """
+        启动服务，一直运行到被取消。
+        :param ready: 开始监听后调用的函数（测试 / 压测用）
+        """
+        try:  # 收到 SIGTERM 时正常退出，进程池的子进程随之关闭（Windows 不支持，只能 Ctrl+C）
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, AttributeError):
+            pass
+        with ProcessPoolExecutor(max_workers=self.workers) as self.pool:
+            server = await asyncio.start_server(self.handle, self.host, self.port)
+            self.port = server.sockets[0].getsockname()[1]  # port = 0 时由系统分配空闲端口
+            print(f"🌐 排产服务已启动: http://{self.host}:{self.port}（{self.workers} 个进程），按 Ctrl+C 退出")
+            if ready is not None:
+                ready()
+            async with server:
+                await server.serve_forever()
+
+    def run(self):
+        """ 在当前线程运行服务，Ctrl+C / SIGTERM 退出 """
+        try:
+            asyncio.run(self.serve())
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            print("👋 排产服务已停止")
+
@@ -0,0 +1,170 @@
+"""
+班次日历：把工作班次预先展开成“累计工作分钟”时间轴。
+
+时间统一用分钟整数表示（自 1970-01-01 00:00 起的分钟数）。
+一天内各班次的起止分钟和“班次开始前的累计工作分钟”只计算一次，
+之后任意时刻 T 的累计工作分钟 W(T)、以及“从 T 开始工作 N 分钟何时结束”
+都能用 floor 除法 + 二分查找直接算出，复杂度 O(log 班次数)，
+不再按班次一段一段地构造 pd.Timestamp 步进。
+
+休息时间就是班次之间的空档，跨天休息（如 21:00 - 08:00）自然包含在内：
+凌晨 00:00 - 08:00 也按休息处理。
+"""
+import bisect
+
+import numpy as np
+import pandas as pd
+
+MINUTES_PER_DAY = 24 * 60
+NS_PER_MINUTE = 60 * 1_000_000_000
+
+
+def parse_hhmm(text):
+    """
+    把 "HH:MM" 转成一天内的分钟数。
+    :param text: 时间字符串，如 "08:00"、"24:00"
+    :return: 分钟数（0 - 1440）
+    """
+    hours, minutes = str(text).strip().replace("：", ":").split(":")
+    total = int(hours) * 60 + int(minutes)
+    if not 0 <= total <= MINUTES_PER_DAY:
+        raise ValueError(f"无效的班次时间: {text}")
+    return total
+
+
+def to_minutes(timestamp):
+    """ 把时间戳转换为分钟整数（不足一分钟的部分舍去） """
+    return pd.Timestamp(timestamp).value // NS_PER_MINUTE
+
+
+def from_minutes(minutes):
+    """ 把分钟整数转换回 pd.Timestamp """
+    return pd.Timestamp(int(minutes) * NS_PER_MINUTE)
+
+
+class ShiftCalendar:
+    """
+    按天循环的工作日历。
+    :param work_shifts: 工作班次列表，如 [("08:00", "12:00"), ("13:30", "17:30")]；
+                        结束时间早于开始时间的班次视为跨天班次
+    """
+
+    def __init__(self, work_shifts):
+        intervals = []
+        for start, end in work_shifts:
+            start_min, end_min = parse_hhmm(start), parse_hhmm(end)
+            if end_min > start_min:
+                intervals.append((start_min, end_min))
+            elif end_min < start_min:  # 跨天班次拆成当天和次日两段
+                intervals.append((start_min, MINUTES_PER_DAY))
+                if end_min > 0:
+                    intervals.append((0, end_min))
+
+        # 合并重叠 / 相接的班次
+        merged = []
+        for start_min, end_min in sorted(intervals):
+            if merged and start_min <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end_min)
+            else:
+                merged.append([start_min, end_min])
+        if not merged:
+            raise ValueError("工作班次不能为空")
+
+        self.work_shifts = [tuple(shift) for shift in work_shifts]
+        self.starts = [start_min for start_min, _ in merged]  # 班次开始（当天分钟）
+        self.ends = [end_min for _, end_min in merged]  # 班次结束（当天分钟）
+        self.cum_starts = []  # 班次开始前的当天累计工作分钟
+        self.cum_ends = []  # 班次结束时的当天累计工作分钟
+        total = 0
+        for start_min, end_min in merged:
+            self.cum_starts.append(total)
+            total += end_min - start_min
+            self.cum_ends.append(total)
+        self.daily_minutes = total  # 每天的工作分钟数
+
+        # 批量计算用的 NumPy 版本
+        self._starts = np.asarray(self.starts, dtype=np.int64)
+        self._ends = np.asarray(self.ends, dtype=np.int64)
+        self._cum_starts = np.asarray(self.cum_starts, dtype=np.int64)
+        self._cum_ends = np.asarray(self.cum_ends, dtype=np.int64)
+
+    def working_minutes(self, minute):
+        """
+        计算时刻的累计工作分钟 W(T)。
+        :param minute: 分钟整数
+        :return: 从 1970-01-01 00:00 到该时刻的工作分钟数
+        """
+        day, offset = divmod(minute, MINUTES_PER_DAY)
+        i = bisect.bisect_right(self.starts, offset) - 1
+        worked = 0 if i < 0 else self.cum_starts[i] + min(offset, self.ends[i]) - self.starts[i]
+        return day * self.daily_minutes + worked
+
+    def start_at(self, worked):
+        """
+        累计工作分钟对应的开工时刻：落在班次边界上时取下一个班次的开始。
+        :param worked: 累计工作分钟
+        :return: 分钟整数
+        """
+        day, offset = divmod(worked, self.daily_minutes)
+        i = bisect.bisect_right(self.cum_starts, offset) - 1
+        return day * MINUTES_PER_DAY + self.starts[i] + offset - self.cum_starts[i]
+
+    def end_at(self, worked):
+        """
+        累计工作分钟对应的完工时刻：落在班次边界上时取上一个班次的结束。
+        :param worked: 累计工作分钟
+        :return: 分钟整数
+        """
+        day, offset = divmod(worked, self.daily_minutes)
+        if offset == 0:  # 正好做完前一天最后一个班次
+            return (day - 1) * MINUTES_PER_DAY + self.ends[-1]
+        i = bisect.bisect_left(self.cum_ends, offset)
+        return day * MINUTES_PER_DAY + self.starts[i] + offset - self.cum_starts[i]
+
+    def working_minutes_array(self, minutes):
+        """ working_minutes 的批量版本：输入输出均为 int64 数组 """
+        day, offset = np.divmod(np.asarray(minutes, dtype=np.int64), MINUTES_PER_DAY)
+        i = np.searchsorted(self._starts, offset, side="right") - 1
+        j = np.maximum(i, 0)
+        worked = self._cum_starts[j] + np.minimum(offset, self._ends[j]) - self._starts[j]
+        return day * self.daily_minutes + np.where(i < 0, 0, worked)
+
+    def start_at_array(self, worked):
+        """ start_at 的批量版本 """
+        day, offset = np.divmod(np.asarray(worked, dtype=np.int64), self.daily_minutes)
+        i = np.searchsorted(self._cum_starts, offset, side="right") - 1
+        return day * MINUTES_PER_DAY + self._starts[i] + offset - self._cum_starts[i]
+
+    def end_at_array(self, worked):
+        """ end_at 的批量版本 """
+        day, offset = np.divmod(np.asarray(worked, dtype=np.int64), self.daily_minutes)
+        i = np.minimum(np.searchsorted(self._cum_ends, offset, side="left"), len(self._cum_ends) - 1)
+        end = day * MINUTES_PER_DAY + self._starts[i] + offset - self._cum_starts[i]
+        return np.where(offset == 0, (day - 1) * MINUTES_PER_DAY + self._ends[-1], end)
+
+    def next_working_minute(self, minute):
+        """ 若时刻处于休息时间，返回下一个班次的开始；否则原样返回 """
+        return self.start_at(self.working_minutes(minute))
+
+    def advance(self, start_minute, minutes):
+        """
+        从 start_minute 开始连续工作 minutes 分钟（自动跳过休息时间、跨班次拆分）。
+        :param start_minute: 开始时刻（分钟整数），可以落在休息时间内
+        :param minutes: 需要的工作分钟数
+        :return: (实际开工时刻, 完工时刻)，均为分钟整数
+        """
+        worked = self.working_minutes(start_minute)
+        start = self.start_at(worked)
+        if minutes <= 0:
+            return start, start
+        return start, self.end_at(worked + minutes)
+
+    def schedule(self, start_time, minutes):
+        """
+        pd.Timestamp 版本的 advance。
+        :param start_time: 开始时间
+        :param minutes: 需要的工作分钟数
+        :return: (生产开始时间, 生产结束时间)
+        """
+        start, end = self.advance(to_minutes(start_time), int(minutes))
+        return from_minutes(start), from_minutes(end)
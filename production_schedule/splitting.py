@@ -0,0 +1,243 @@
+"""
+逾期订单拆分：把逾期订单前面的无交期订单标记为拆分、重新排序，
+重新判断是否换料、重新计算生产时间、重新判断是否逾期，
+循环到逾期订单前没有可拆分的订单为止。
+
+拆分订单放在哪里由 split_placement 决定：
+- "group"（默认，与 3.22 版本相同）：拆分订单保留组2，整队按 (组2, 逾期优先) 稳定排序，
+  拆分订单排在本组同状态订单的后面，组内按 材质 + 厚度；
+- "tail"（本包早期版本的做法）：拆分订单移到设备队列最后（材质 + 厚度），组2 接在原有组号之后重新编号。
+
+每一轮只会改动队列的一段后缀（从第一个被移动的位置开始），
+因此只重算这段后缀的换料标记和开始 / 结束时间，前面已经排好的订单保持不变。
+"""
+import numpy as np
+import pandas as pd
+
+from .changeover import ChangeoverModel
+from .profiling import profiled, stage
+from .scheduling import schedule_queue
+from .schema import flag_values
+from .shift_calendar import NS_PER_MINUTE, to_minutes
+
+NO_DUE_DATE = pd.Timestamp("2100-01-01")  # 无交期订单的 交期排序
+SPLIT_PLACEMENTS = ("group", "tail")  # 拆分订单回到本组 / 移到队尾
+
+
+def split_marks(groups, fixed_date, overdue):
+    """
+    debug_move_orders 的数组版本，线性时间：
+    先按组2 编号建一张“该组是否含无交期订单”的表，
+    再用累计最大值得到“编号不超过 k 的、最近一个含无交期订单的组2”，
+    每个逾期订单直接查 k = 自己的组2 - 1，不再逐组往前找。
+    :param groups: 组2（按队列顺序）
+    :param fixed_date: 是否无交期订单（交期排序 = 2100-01-01）
+    :param overdue: 是否逾期交付
+    :return: 布尔数组，True 表示需要拆分
+    """
+    groups = np.asarray(groups, dtype=float)
+    fixed_date = np.asarray(fixed_date, dtype=bool)
+    overdue = np.asarray(overdue, dtype=bool)
+    valid = ~np.isnan(groups) & (groups >= 0)  # 组2 < 0 或缺失的订单不会被找到
+    ids = np.where(valid, groups, 0).astype(np.int64)
+    if not valid.any():
+        return np.zeros(len(groups), dtype=bool)
+
+    # **📌 组2 → 是否含无交期订单；nearest[k] = 编号 ≤ k 的最近一个含无交期订单的组2（没有为 -1）**
+    size = int(ids[valid].max()) + 1
+    has_fixed = np.zeros(size, dtype=bool)
+    has_fixed[ids[valid & fixed_date]] = True
+    nearest = np.maximum.accumulate(np.where(has_fixed, np.arange(size), -1))
+
+    # **📌 每个逾期订单往前找到的组2，组内的无交期订单都标记为拆分**
+    overdue_ids = ids[valid & overdue]
+    targets = nearest[overdue_ids[overdue_ids >= 1] - 1]
+    marked = np.zeros(size, dtype=bool)
+    marked[targets[targets >= 0]] = True
+    return valid & fixed_date & marked[ids]
+
+
+def debug_move_orders(df_group):
+    """
+    在单个 '设备' 子表内计算 '是否拆分'：
+    对每个逾期订单，向前找最近一个含无交期订单（交期排序 = 2100-01-01）的组2，
+    这个组里的无交期订单都标记为拆分。
+    :param df_group: 单台设备的订单（含 组2、交期排序、按时交付检查）
+    :return: 布尔 Series（index 同 df_group），True 表示需要拆分
+    """
+    groups = pd.to_numeric(df_group["组2"], errors="coerce").to_numpy(dtype=float)
+    fixed_date = (pd.to_datetime(df_group["交期排序"], errors="coerce") == NO_DUE_DATE).to_numpy()
+    overdue = ~flag_values(df_group["按时交付检查"], "按时交付检查")
+    return pd.Series(split_marks(groups, fixed_date, overdue), index=df_group.index)
+
+
+def _tail_keys(material, thickness):
+    """
+    拆分订单在队尾的排序键：材质升序（缺失在前）→ 厚度升序（缺失在后），合成一个 int64，
+    与按 (材质编码, 厚度) np.lexsort 的顺序相同。
+    """
+    material_code = pd.factorize(material, sort=True)[0].astype(np.int64) + 1
+    thickness_code, uniques = pd.factorize(thickness, sort=True)
+    thickness_code = np.where(thickness_code < 0, len(uniques), thickness_code)
+    return material_code * (len(uniques) + 1) + thickness_code
+
+
+def _members(by_group, bounds, targets):
+    """ 组号为 targets 的所有行（by_group 为按组号排好的行位置，bounds[k]:bounds[k + 1] 为组 k 的一段） """
+    starts = bounds[targets]
+    lengths = bounds[targets + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return by_group[offsets + np.arange(lengths.sum())]
+
+
+def _resolve_device(queue, calendar, start_minute, changeovers, max_rounds, device=None, placement="group"):
+    """
+    在单台设备的队列上循环拆分，直到没有新的拆分 / 提前。
+    placement="group" 时队列始终按 (组2, 逾期优先, 未拆分在前, 材质 + 厚度) 排好；
+    placement="tail" 时队列始终是 [未拆分的订单（按组2 排好）] + [拆分的订单（按材质 + 厚度排好）]。
+    每一轮只处理改动的后缀：
+    - 只有上一轮改动位置之后的逾期订单可能找到新的拆分（前面的逾期订单要么没有可拆分的组，
+      要么它找到的组已经移走、它自己也在后缀里），每组剩余的无交期订单数另外维护，不再整队标记；
+    - 只重排受影响的组之后的订单（"tail" 时新拆分的订单归并进已经排好的队尾），不再整队排序。
+    """
+    n = len(queue)
+    minutes = queue["生产分钟"].to_numpy(dtype=np.int64)
+    thickness = queue["材料厚度"].to_numpy()
+    material = queue["材料材质"].to_numpy()
+    groups = pd.to_numeric(queue["组2"]).to_numpy().astype(np.int64)
+    due = pd.to_datetime(queue["预计交期"], errors="coerce")
+    has_due = due.notna().to_numpy()
+    due_minute = np.where(has_due, due.to_numpy().astype("datetime64[ns]").astype(np.int64) // NS_PER_MINUTE, 0)
+    fixed_date = (pd.to_datetime(queue["交期排序"], errors="coerce") == NO_DUE_DATE).to_numpy()
+    tail_key = _tail_keys(material, thickness)
+    no_thickness = pd.isna(thickness)  # 厚度缺失的拆分订单各自一组（与按 (材质, 厚度) 编号相同）
+
+    # **📌 原始组2 → 行：拆分后队尾的组2 会重新编号，未拆分的订单保持原始组2**
+    size = int(groups.max()) + 1 if n else 0
+    by_group = np.argsort(groups, kind="stable")
+    bounds = np.searchsorted(groups[by_group], np.arange(size + 1))
+    fixed_left = np.bincount(groups[fixed_date], minlength=size)  # 每组还没拆分的无交期订单数
+
+    order = np.arange(n)  # 当前队列顺序（queue 的行位置）
+    position = np.arange(n)  # 行 → 在 order 中的位置
+    head_len = n  # order[:head_len] 按组2 排好，order[head_len:] 为拆分移到队尾的订单（只有 "tail"）
+    moved = np.zeros(n, dtype=bool)  # 已拆分
+    priority = np.zeros(n, dtype=bool)  # 曾经逾期：组内提前
+
+    flags, changeover_minutes = changeovers.changeovers(order)
+    starts, ends = schedule_queue(calendar, start_minute, minutes, changeover_minutes)
+    overdue = has_due & (due_minute < ends)
+
+    dirty = 0  # 上一轮改动的第一个位置，之前的订单不会产生新的拆分 / 提前
+    for round_index in range(max_rounds):
+        # **📌 1. 标记拆分：后缀里的逾期订单往前最近一个含无交期订单的组2**
+        late = order[dirty:][overdue[dirty:]]
+        nearest = np.maximum.accumulate(np.where(fixed_left > 0, np.arange(size), -1))
+        lookup = np.minimum(groups[late], size) - 1
+        targets = nearest[lookup[lookup >= 0]]
+        split = _members(by_group, bounds, np.unique(targets[targets >= 0]))
+        split = split[fixed_date[split] & ~moved[split]]
+        promoted = late[~priority[late]]
+        if not split.size and not promoted.size:
+            break  # 不动点：没有可拆分的订单，也没有新的逾期订单需要提前
+        moved[split] = True
+        fixed_left -= np.bincount(groups[split], minlength=size)
+        priority[late] = True
+
+        # **📌 2. 重新排序：从受影响的第一个组开始，按组2、组内逾期优先；拆分的订单排在本组最后（group）或归并进队尾（tail）**
+        affected = np.concatenate((split, promoted[~moved[promoted]]))
+        if not affected.size:
+            dirty = n  # 只有队尾的订单被提前，顺序不变
+            continue
+        if round_index == 0:
+            resort = 0  # 输入的队列不一定按组2 排好，第一轮整队排序
+        else:
+            first_group = groups[order[position[affected].min()]]
+            resort = position[_members(by_group, bounds, np.array([first_group]))]
+            resort = resort[resort < head_len].min()
+        segment = order[resort:head_len]
+        if placement == "group":
+            # 与 3.22 相同：[未拆分] + [拆分（材质 + 厚度）] 再按 (组2, 逾期优先) 稳定排序，组2 不变
+            split_key = np.where(moved[segment], tail_key[segment], 0)
+            segment = segment[np.lexsort((split_key, moved[segment], ~priority[segment], groups[segment]))]
+            new_order = np.concatenate((order[:resort], segment))
+        else:
+            head = segment[~moved[segment]]
+            head = head[np.lexsort((~priority[head], groups[head]))]
+            new_tail = segment[moved[segment]]
+            new_tail = new_tail[np.argsort(tail_key[new_tail], kind="stable")]
+            tail = order[head_len:]
+            tail = np.insert(tail, np.searchsorted(tail_key[tail], tail_key[new_tail], side="left"), new_tail)
+            head_len = resort + len(head)
+            if len(tail):
+                # 拆分订单重新编组2，接在原有组号之后
+                last_head = head[-1] if len(head) else (order[resort - 1] if resort > 0 else None)
+                base = groups[last_head] + 1 if last_head is not None else 0
+                keys = tail_key[tail]
+                new_group = no_thickness[tail].copy()
+                new_group[0] = True
+                new_group[1:] |= keys[1:] != keys[:-1]
+                groups[tail] = base + np.cumsum(new_group) - 1
+            new_order = np.concatenate((order[:resort], head, tail))
+
+        changed = np.flatnonzero(new_order[resort:] != order[resort:])
+        if changed.size == 0:
+            dirty = n
+            continue
+        first = resort + changed[0]
+        order = new_order
+        position[order[first:]] = np.arange(first, n)
+        dirty = first if round_index > 0 else 0  # 第一轮之前的顺序不一定按组2，下一轮再看一遍所有逾期订单
+
+        # **📌 3. 只重算后缀：是否换料 + 生产开始 / 结束时间 + 是否逾期**
+        suffix = order[first:]
+        prev = order[first - 1] if first > 0 else None
+        flags[first:], changeover_minutes[first:] = changeovers.changeovers(suffix, prev)
+        suffix_start = ends[first - 1] if first > 0 else start_minute
+        starts[first:], ends[first:] = schedule_queue(
+            calendar, suffix_start, minutes[suffix], changeover_minutes[first:]
+        )
+        overdue[first:] = has_due[suffix] & (due_minute[suffix] < ends[first:])
+    else:
+        print(f"⚠️ {device} 拆分逾期订单达到 {max_rounds} 轮上限，可能还有未拆分的订单，可调大 max_split_rounds")
+
+    result = queue.take(order)  # 按新顺序取一次整张表
+    result.index = pd.RangeIndex(n)
+    result["组2"] = groups[order]
+    result["是否换料"] = flags
+    result["换料分钟"] = changeover_minutes
+    result["生产开始时间"] = (starts * NS_PER_MINUTE).astype("datetime64[ns]")
+    result["生产结束时间"] = (ends * NS_PER_MINUTE).astype("datetime64[ns]")
+    result["按时交付检查"] = ~overdue
+    result["是否拆分"] = moved[order]
+    return result
+
+
+@profiled("拆分逾期订单")
+def resolve_overdue_splits(df, calendar, device_start_times, changeover_model=None, max_rounds=1000, placement="group"):
+    """
+    循环拆分逾期订单前的无交期订单，直到逾期订单前没有可拆分的订单为止。
+    每一轮：标记拆分 → 重新排序（拆分订单回到本组 / 移到队尾）+ 组内逾期优先 → 重新判断换料 → 重算后缀的生产时间 → 重新判断是否逾期。
+    :param df: 已排好序的订单（含 设备、组2、材料厚度、材料材质、生产分钟、预计交期、交期排序）
+    :param calendar: ShiftCalendar
+    :param device_start_times: {设备: 开始时间}
+    :param changeover_model: ChangeoverModel，默认每次换料 15 分钟
+    :param max_rounds: 最多循环轮数（每轮至少拆分或提前一单，正常不会达到）
+    :param placement: 拆分订单的位置，"group"（回到本组，与 3.22 相同）或 "tail"（移到队尾）
+    :return: 按设备拼接的新 DataFrame（含 是否拆分）
+    """
+    changeover_model = changeover_model or ChangeoverModel()
+    frames = []
+    devices = df["设备"].to_numpy()
+    for device in sorted(df["设备"].dropna().unique(), key=str):
+        positions = np.flatnonzero(devices == device)
+        queue = df if len(positions) == len(df) else df.take(positions)  # 只有一台设备时不复制
+        with stage("拆分（单台设备）", rows=len(queue), device=device):
+            frames.append(_resolve_device(
+                queue, calendar, to_minutes(device_start_times[device]),
+                changeover_model.compile(device, queue["材料厚度"].to_numpy(), queue["材料材质"].to_numpy()), max_rounds,
+                device, placement,
+            ))
+    if not frames:
+        return df.assign(是否拆分=False)
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
@@ -0,0 +1,146 @@
+"""
+监视文件夹：有新的 / 修改过的订单表格时自动排产，在旁边写出 优化排产 表格。
+
+    python -m production_schedule --watch 订单 --start-from-name
+
+常驻一个进程，Python / pandas / openpyxl 只导入一次，排产参数（设备表、班次日历）只解析一次；
+各设备上次的排产结果放在结果缓存里（默认 <文件夹>/.schedule_cache/results），
+新表格里没有变化的设备直接用上次的结果，只重排有变化的设备。
+
+轮询文件的大小和修改时间（不需要额外的依赖）：连续 settle 秒没有变化才认为写完了，
+Excel / 网盘同步还没写完的表格不会被读到一半。输出先写临时文件再替换，打开输出的人不会看到半个文件。
+"""
+import fnmatch
+import os
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from .batch import default_output_path, start_from_name
+from .export import export_schedule
+from .pipeline import schedule
+from .reader import CACHE_DIR_NAME, read_orders
+from .result_cache import ResultCache
+
+DEFAULT_PATTERN = "*订单信息*.xlsx"
+
+
+class FolderWatcher:
+    """
+    监视一个文件夹的订单表格并排产。
+    :param directory: 监视的文件夹
+    :param config: ScheduleConfig
+    :param pattern: 订单表格的文件名通配符
+    :param interval: 轮询间隔（秒）
+    :param settle: 文件大小和修改时间连续多少秒不变才排产（秒）
+    :param infer_start: 是否从文件名推断开工时间，见 batch.start_from_name
+    :param result_cache: ResultCache，默认 <文件夹>/.schedule_cache/results
+    :param cache: 是否使用表格快照
+    """
+
+    def __init__(self, directory, config, pattern=DEFAULT_PATTERN, interval=0.5, settle=0.5,
+                 infer_start=False, result_cache=None, cache=True):
+        self.directory = Path(directory)
+        self.config = config
+        self.pattern = pattern
+        self.interval = interval
+        self.settle = settle
+        self.infer_start = infer_start
+        self.result_cache = result_cache or ResultCache(self.directory / CACHE_DIR_NAME / "results")
+        self.cache = cache
+        self.done = {}  # {表格: 已排产时的 (大小, 修改时间)}
+        self.pending = {}  # {表格: ((大小, 修改时间), 第一次看到这个状态的时间)}
+
+    def candidates(self):
+        """
+        文件夹中的订单表格（跳过 Excel 的锁文件 ~$*.xlsx 和排产输出）。
+        :return: {路径: (大小, 修改时间)}
+        """
+        files = {}
+        for path in sorted(self.directory.iterdir()):
+            name = path.name
+            if name.startswith("~$") or "优化排产" in name or not fnmatch.fnmatch(name, self.pattern):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # 列出后被删除 / 改名
+                continue
+            if path.is_file():
+                files[path] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def skip_existing(self):
+        """ 启动时：输出比表格新的不再重排 """
+        for path, signature in self.candidates().items():
+            output = default_output_path(path)
+            if output.exists() and output.stat().st_mtime_ns >= signature[1]:
+                self.done[path] = signature
+
+    def poll(self, now=None):
+        """
+        检查一次文件夹，排产已经写完的新表格 / 修改过的表格。
+        :param now: 当前时间（time.monotonic()），默认现在
+        :return: 本次写出的输出路径列表
+        """
+        now = time.monotonic() if now is None else now
+        files = self.candidates()
+        for path in list(self.pending):
+            if path not in files:
+                del self.pending[path]
+
+        outputs = []
+        for path, signature in files.items():
+            if self.done.get(path) == signature:
+                continue
+            seen = self.pending.get(path)
+            if seen is None or seen[0] != signature:  # 新出现或还在写
+                self.pending[path] = (signature, now)
+                continue
+            if now - seen[1] < self.settle:
+                continue
+            del self.pending[path]
+            self.done[path] = signature  # 出错时也记下，文件再次修改才重试
+            output = self.process(path)
+            if output is not None:
+                outputs.append(output)
+        return outputs
+
+    def process(self, path):
+        """
+        排产一个表格，输出先写临时文件再替换。
+        :return: 输出路径，失败时返回 None
+        """
+        started = time.perf_counter()
+        output = default_output_path(path)
+        tmp = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+        config = self.config
+        if self.infer_start:
+            start_time = start_from_name(path, config)
+            if start_time is not None:
+                config = replace(config, start_time=start_time)
+        try:
+            result = schedule(read_orders(path, cache=self.cache), config, self.result_cache)
+            export_schedule(result, tmp, self.result_cache)
+            os.replace(tmp, output)
+        except Exception as e:  # 一个表格出错不影响继续监视
+            tmp.unlink(missing_ok=True)
+            print(f"❌ {path.name} 排产失败: {type(e).__name__}: {e}")
+            return None
+        print(f"✅ {path.name} 排产已完成（{time.perf_counter() - started:.1f}s），结果保存至 {output}")
+        return output
+
+    def run(self, stop=None):
+        """
+        一直监视，直到 Ctrl+C（或 stop() 返回 True）。
+        :param stop: 每次轮询后调用的函数，返回 True 时退出
+        """
+        self.skip_existing()
+        print(f"👀 正在监视 {self.directory}（{self.pattern}），按 Ctrl+C 退出")
+        try:
+            while True:
+                self.poll()
+                if stop is not None and stop():
+                    break
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("👋 已停止监视")
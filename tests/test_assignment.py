@@ -0,0 +1,123 @@
+"""
+设备分配（assign_devices）与原脚本逐行 iterrows 分配的对照。
+
+baseline_assign 是 3.22 版本脚本里“分配设备”一段的原样拷贝（输入为预处理后的订单）。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate_orders import generate_orders
+from production_schedule import assign_devices
+from production_schedule.pipeline import prepare_orders
+
+
+def baseline_assign(df):
+    """
+    原脚本的逐行分配。
+    :param df: 已清理加工工艺、去掉材质‘来料’前缀的订单
+    :return: 设备 Series，未分配的为空字符串
+    """
+    df = df.copy()
+    # 初始化设备列
+    df["设备"] = ""
+
+    # 计算负荷
+    yixing1_load, yixing2_load = 0, 0
+    assigned_materials = {}
+
+    # 过滤出非直管、非差异化订单
+    df_orders = df[~df["加工工艺"].isin(["直管", "差异化"])].copy()
+
+    # 确保数据类型正确
+    df_orders["材料厚度"] = pd.to_numeric(df_orders["材料厚度"], errors="coerce")
+    df_orders["未完成数量"] = pd.to_numeric(df_orders["未完成数量"], errors="coerce")
+    df_orders["材料材质"] = df_orders["材料材质"].astype(str)
+
+    # **🔹 先按“材料厚度”降序排列，确保厚的订单优先分配**
+    df_orders = df_orders.sort_values(by="材料厚度", ascending=False)
+
+    # 遍历订单，分配设备
+    for index, row in df_orders.iterrows():
+        thickness = row["材料厚度"]
+        material = row["材料材质"]
+        unfinished = row["未完成数量"] if not pd.isna(row["未完成数量"]) else 0
+        load_yixing1, load_yixing2 = unfinished / 50, unfinished / 80
+        key = (thickness, material)
+
+        # **🔹 规则 1：判断是否必须给“异型管机2”**
+        if thickness not in {0.5, 0.75, 0.6, 0.8, 1.0} or "不锈钢" in material:
+            df.at[index, "设备"] = "异型管机2"
+            yixing2_load += load_yixing2
+            assigned_materials[key] = "异型管机2"
+
+        # **🔹 规则 2：如果相同厚度 & 材质的订单已分配过，则沿用原设备**
+        elif key in assigned_materials:
+            assigned_device = assigned_materials[key]
+            df.at[index, "设备"] = assigned_device
+            if assigned_device == "异型管机1":
+                yixing1_load += load_yixing1
+            else:
+                yixing2_load += load_yixing2
+
+        # **🔹 规则 3：厚的订单优先分配给“异型管机2”**
+        else:
+            if thickness >= 1.0 or yixing2_load <= yixing1_load:
+                assigned_device = "异型管机2"
+            else:
+                assigned_device = "异型管机1"
+
+            df.at[index, "设备"] = assigned_device
+            assigned_materials[key] = assigned_device
+            if assigned_device == "异型管机1":
+                yixing1_load += load_yixing1
+            else:
+                yixing2_load += load_yixing2
+
+    # **🔹 处理“直管机”订单**
+    df.loc[df["加工工艺"] == "直管", "设备"] = "直管机"
+    return df["设备"]
+
+
+def baseline_input(df_original):
+    """ 原脚本分配设备前的预处理：清理加工工艺、去掉材质的‘来料’前缀 """
+    df = df_original.copy()
+    df["加工工艺"] = df["加工工艺"].astype(str).str.strip().str.replace(r"\s+", "", regex=True)
+    df["材料材质"] = df["材料材质"].apply(lambda m: m.replace("来料", "").strip() if isinstance(m, str) else m)
+    return df
+
+
+def assert_same_assignment(df_original):
+    expected = baseline_assign(baseline_input(df_original))
+    df, _ = prepare_orders(df_original)
+    pd.testing.assert_series_equal(assign_devices(df), expected, check_names=False)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_generated_orders_match_row_loop(seed):
+    assert_same_assignment(generate_orders(int(np.random.default_rng(seed).integers(50, 2000)), seed=seed))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_missing_values_match_row_loop(seed):
+    df = generate_orders(500, seed=seed)
+    rng = np.random.default_rng(seed)
+    df.loc[rng.random(len(df)) < 0.05, "未完成数量"] = np.nan
+    df.loc[rng.random(len(df)) < 0.02, "材料厚度"] = np.nan
+    assert_same_assignment(df)
+
+
+def test_equal_loads_prefer_yixing2():
+    # A → 异型管机2（40/80 = 0.5），B → 异型管机1（25/50 = 0.5），C 分配时两台负荷相等，仍给 异型管机2
+    df = pd.DataFrame({
+        "订单编号": ["A", "B", "C", "D"],
+        "加工工艺": ["异型", "异型", "异型", "弯头"],
+        "材料厚度": [0.8, 0.6, 0.5, 0.5],
+        "材料材质": ["镀锌板", "镀锌板", "冷轧板", "冷轧板"],
+        "未完成数量": [40.0, 25.0, 40.0, 0.0],
+        "生产件数": [1, 1, 1, 1],
+        "预计交期": [None] * 4,
+        "完成量": [None] * 4,
+    })
+    assert_same_assignment(df)
+    assert assign_devices(prepare_orders(df)[0]).tolist() == ["异型管机2", "异型管机1", "异型管机2", "异型管机2"]
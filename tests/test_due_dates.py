@@ -0,0 +1,44 @@
+"""
+预计交期解析（parse_due_dates）：年份推断、空值和无法解析的值，以及整列都没有交期的情况。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from production_schedule import parse_due_dates
+
+REFERENCE = pd.Timestamp("2025-03-21 08:00")
+
+
+def test_parses_month_day_time():
+    values = pd.Series(["3.22 15:00", " 3.22 15:00 ", "4.1 8：30", "3.25 9:05:30"], index=[5, 6, 7, 8])
+    expected = ["2025-03-22 15:00", "2025-03-22 15:00", "2025-04-01 08:30", "2025-03-25 09:05:30"]
+    expected = pd.Series([pd.Timestamp(text) for text in expected], index=values.index, dtype="datetime64[ns]")
+    pd.testing.assert_series_equal(parse_due_dates(values, REFERENCE), expected)
+
+
+def test_infers_year_across_new_year():
+    values = pd.Series(["1.5 8:00", "12.28 8:00"])
+    assert parse_due_dates(values, "2024-12-20").tolist() == [pd.Timestamp("2025-01-05 08:00"), pd.Timestamp("2024-12-28 08:00")]
+    assert parse_due_dates(values, "2025-01-03").tolist() == [pd.Timestamp("2025-01-05 08:00"), pd.Timestamp("2024-12-28 08:00")]
+
+
+def test_missing_and_unparsable_are_nat(capsys):
+    values = pd.Series(["3.22 15:00", None, np.nan, "", "尽快", "尽快"])
+    result = parse_due_dates(values, REFERENCE)
+    assert result.iloc[0] == pd.Timestamp("2025-03-22 15:00")
+    assert result.iloc[1:].isna().all()
+    assert "2 单预计交期无法解析" in capsys.readouterr().out
+
+
+# 整列都没有交期时，去重后的字符串为空，缺失值（编码 -1）要取到末尾补的 NaT，不能下标越界
+@pytest.mark.parametrize("values", [
+    pd.Series([np.nan, np.nan, np.nan], index=[3, 1, 2]),
+    pd.Series([None, None], dtype=object),
+    pd.Series([], dtype=object),
+])
+def test_no_due_dates(values):
+    result = parse_due_dates(values, REFERENCE)
+    assert result.dtype == "datetime64[ns]"
+    assert result.index.equals(values.index)
+    assert result.isna().all()
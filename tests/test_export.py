@@ -0,0 +1,55 @@
+"""
+输出 Excel：预计交期、生产开始 / 结束时间、项目交付时间写成带数字格式的日期时间单元格；
+缺失的日期（没有交期、没填下单日期）为空单元格。
+"""
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from benchmarks.generate_orders import generate_orders
+from production_schedule import ScheduleConfig, export_schedule, schedule
+from production_schedule.export import DATETIME_FORMAT
+
+
+def test_time_columns_are_datetime_cells(tmp_path):
+    result = schedule(generate_orders(300, seed=1), ScheduleConfig())
+    path = tmp_path / "排产.xlsx"
+    export_schedule(result, path)
+    wb = load_workbook(path)
+
+    ws = wb["直管机"]
+    header = [cell.value for cell in ws[1]]
+    queue = result.orders[result.orders["设备"] == "直管机"].reset_index(drop=True)
+    for column in ["预计交期", "生产开始时间", "生产结束时间"]:
+        cells = [row[header.index(column)] for row in ws.iter_rows(min_row=2)]
+        expected = pd.to_datetime(queue[column])
+        assert [cell.value for cell in cells] == [None if pd.isna(ts) else ts.to_pydatetime() for ts in expected]
+        assert all(cell.number_format == DATETIME_FORMAT for cell in cells if cell.value is not None)
+    assert queue["预计交期"].isna().any()  # 有没有交期的订单（空单元格）
+
+    delivery = [row[1] for row in wb["项目交付时间"].iter_rows(min_row=2)]
+    assert all(isinstance(cell.value, datetime) and cell.number_format == DATETIME_FORMAT for cell in delivery)
+
+
+def test_missing_dates_are_empty_cells(tmp_path):
+    df = pd.DataFrame({
+        "订单编号": ["A1", "A2"],
+        "下单日期": [pd.Timestamp("2025-03-20"), None],
+        "加工工艺": ["直管", "直管"],
+        "材料厚度": [0.5, 0.5],
+        "材料材质": ["镀锌板", "镀锌板"],
+        "未完成数量": [90, 90],
+        "生产件数": [90, 90],
+        "预计交期": ["3.25 12:00", None],
+        "完成量": [None, None],
+    })
+    path = tmp_path / "排产.xlsx"
+    export_schedule(schedule(df, ScheduleConfig()), path)
+
+    ws = load_workbook(path)["直管机"]
+    rows = list(ws.iter_rows(values_only=True))
+    cells = {order: dict(zip(rows[0], row)) for order, row in zip([row[0] for row in rows[1:]], rows[1:])}
+    assert cells["A1"]["下单日期"] is not None and cells["A1"]["预计交期"] is not None
+    assert cells["A2"]["下单日期"] is None
+    assert cells["A2"]["预计交期"] is None
@@ -0,0 +1,139 @@
+"""
+增量插单：新组按各设备还没开工的负荷分配、已有的组沿用原设备；
+只重排后缀之后，冻结的订单不变，换料和开始 / 结束时间与整队重算相同；
+已开工的订单不能改单，改单会替换“其他”表单里的旧行，中间读不读队列结果都一样。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate_orders import generate_orders
+from production_schedule import ScheduleConfig, assign_devices, schedule
+from production_schedule.changeover import mark_changeovers
+from production_schedule.incremental import ScheduleState
+from production_schedule.pipeline import prepare_orders
+from production_schedule.scheduling import schedule_queue
+from production_schedule.shift_calendar import NS_PER_MINUTE, to_minutes
+
+
+def orders(rows):
+    """ (订单编号, 材料厚度, 材料材质, 未完成数量) → 异型订单表 """
+    df = pd.DataFrame(rows, columns=["订单编号", "材料厚度", "材料材质", "未完成数量"])
+    return df.assign(加工工艺="异型", 生产件数=1, 预计交期=None, 完成量=None)
+
+
+def test_new_group_goes_to_least_loaded_device():
+    config = ScheduleConfig()
+    # 1.2 只有 异型管机2 能生产：异型管机2 还有 8000 / 80 = 100 的负荷，异型管机1 只有 50 / 50 = 1
+    state = ScheduleState.from_result(schedule(orders([
+        ("A", 1.2, "镀锌板", 4000.0), ("B", 1.2, "冷轧板", 4000.0), ("C", 0.5, "冷轧板", 50.0),
+    ]), config), config)
+    batch = orders([("N1", 0.6, "镀铝锌板", 10.0), ("N2", 0.5, "冷轧板", 10.0)])
+    # 单独分配时两台负荷都是 0，N1 给 异型管机2
+    assert assign_devices(prepare_orders(batch)[0])[0] == "异型管机2"
+
+    state.insert_orders(batch)
+    devices = dict(zip(state.result().orders["订单编号"], state.result().orders["设备"]))
+    assert devices["N1"] == "异型管机1"  # 新组：异型管机1 未开工的负荷更小
+    assert devices["N2"] == "异型管机1"  # 已有的组沿用原设备
+
+
+def test_started_orders_do_not_count_as_load():
+    config = ScheduleConfig()
+    state = ScheduleState.from_result(schedule(generate_orders(300, seed=0), config), config)
+    assert all(load > 0 for load in state._pending_loads(state._removed_rows(set())).values())
+    state.freeze("2100-01-01")
+    assert all(load == 0 for load in state._pending_loads(state._removed_rows(set())).values())
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_inserts_match_full_recompute(seed):
+    config = ScheduleConfig()
+    rng = np.random.default_rng(seed)
+    df_original = generate_orders(int(rng.integers(100, 2000)), seed=seed)
+    state = ScheduleState.from_result(schedule(df_original, config), config)
+    now = config.start_time
+    for step in range(3):
+        # 新订单 + 几单改数量的已有订单（改单）
+        batch = generate_orders(int(rng.integers(1, 12)), seed=1000 + seed * 10 + step)
+        batch["订单编号"] = [f"N{step}-{i}" for i in range(len(batch))]
+        edited = df_original.sample(int(rng.integers(0, 4)), random_state=seed + step)
+        batch = pd.concat([batch, edited.assign(未完成数量=edited["未完成数量"] * 2)], ignore_index=True)
+        now += pd.Timedelta(hours=int(rng.integers(0, 30)))
+        before = {device: queue.copy() for device, queue in state.queues.items()}
+        affected = state.insert_orders(batch, now=now)
+
+        for device, queue in state.queues.items():
+            first = affected.get(device, len(queue))
+            assert first >= state.frozen[device]
+            if device in before:
+                # 第一个变化的位置之前（含冻结的订单）逐行不变
+                pd.testing.assert_frame_equal(queue.iloc[:first], before[device].iloc[:first])
+            # 换料：与整队重算相同
+            recomputed = mark_changeovers(queue[["设备", "材料厚度", "材料材质"]].copy(), config.changeover_model)
+            assert (recomputed["换料分钟"].to_numpy() == queue["换料分钟"].to_numpy()).all()
+            assert (recomputed["是否换料"].to_numpy() == queue["是否换料"].to_numpy()).all()
+            if first == len(queue):
+                continue
+            # 开始 / 结束时间：从 first 起接着前一单、不早于 now 整段重算
+            begin = to_minutes(queue["生产结束时间"].iloc[first - 1]) if first else to_minutes(config.start_time)
+            starts, ends = schedule_queue(
+                config.calendar_for(device), max(begin, to_minutes(now)),
+                queue["生产分钟"].to_numpy(np.int64)[first:], queue["换料分钟"].to_numpy(np.int64)[first:],
+            )
+            assert (queue["生产开始时间"].to_numpy()[first:] == (starts * NS_PER_MINUTE).astype("datetime64[ns]")).all()
+            assert (queue["生产结束时间"].to_numpy()[first:] == (ends * NS_PER_MINUTE).astype("datetime64[ns]")).all()
+
+        # 新订单都排进了队列（或其他订单），且只出现一次；改单删掉了未开工的旧行
+        numbers = pd.concat([queue["订单编号"] for queue in state.queues.values()], ignore_index=True)
+        counts = numbers.value_counts()
+        assert set(batch["订单编号"]) <= set(numbers) | set(state.other["订单编号"])
+        assert (counts[counts.index.str.startswith("N")] == 1).all()
+
+
+def test_changing_started_order_is_ignored(capsys):
+    config = ScheduleConfig()
+    state = ScheduleState.from_result(schedule(generate_orders(300, seed=2), config), config)
+    now = config.start_time + pd.Timedelta(hours=6)
+    state.freeze(now)
+    device, queue = next((device, queue) for device, queue in state.queues.items() if state.frozen[device])
+    started = queue.iloc[[0]]
+    before = {device: queue.copy() for device, queue in state.queues.items()}
+
+    # 已开工的订单改数量：忽略并提示，队列不变，订单不会出现两次
+    affected = state.insert_orders(started.assign(未完成数量=started["未完成数量"] * 3), now=now)
+    assert affected == {}
+    assert "已开工，忽略改单" in capsys.readouterr().out
+    for device, queue in state.queues.items():
+        pd.testing.assert_frame_equal(queue, before[device])
+
+
+def test_changed_order_replaces_other_row():
+    config = ScheduleConfig()
+    state = ScheduleState.from_result(schedule(orders([("A", 1.2, "镀锌板", 100.0)]), config), config)
+    state.insert_orders(orders([("N1", 0.5, "冷轧板", 10.0)]).assign(完成量="已完成"))
+    assert state.other["订单编号"].tolist() == ["N1"]
+
+    # 改单后“其他”表单里的旧行删掉，不会越积越多；队列里也只有一行
+    state.insert_orders(orders([("N1", 0.5, "冷轧板", 20.0)]))
+    assert "N1" not in set(state.other["订单编号"])
+    state.insert_orders(orders([("N1", 0.5, "冷轧板", 30.0)]).assign(完成量="已完成"))
+    assert state.other["订单编号"].tolist() == ["N1"]
+    assert state.other["未完成数量"].tolist() == [30.0]
+    assert state.result().orders["订单编号"].tolist().count("N1") == 1
+
+
+def test_reading_queues_between_inserts_does_not_change_result():
+    config = ScheduleConfig()
+    df_original = generate_orders(1500, seed=4)
+    states = [ScheduleState.from_result(schedule(df_original, config), config) for _ in range(2)]
+    now = config.start_time
+    for step in range(4):
+        batch = generate_orders(6, seed=200 + step)
+        batch["订单编号"] = [f"N{step}-{i}" for i in range(len(batch))]
+        now += pd.Timedelta(hours=3)
+        for i, state in enumerate(states):
+            state.insert_orders(batch, now=now)
+            if i == 0:
+                state.queues  # 每次插单后都重建队列表格；另一个状态只在最后重建
+    pd.testing.assert_frame_equal(states[0].result().orders, states[1].result().orders)
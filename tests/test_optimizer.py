@@ -0,0 +1,69 @@
+"""
+局部搜索：接受一步时只重算被移动的一段（_BlockSequence.apply）与按新顺序整体重算（rebuild）的对照，
+以及 evaluate 预测的目标变化与实际变化的对照。
+"""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate_orders import generate_orders
+from production_schedule import ScheduleConfig, schedule
+from production_schedule.optimizer import _block_sequence, optimize_sequence
+from production_schedule.shift_calendar import NS_PER_MINUTE, to_minutes
+
+STATE = ["sequence", "changeover", "flags", "over", "key", "near_index"]
+ARRAYS = ["starts", "due_rows", "row_position", "row_slack", "near_position", "near_slack", "near_counts"]
+
+
+def device_sequence(queue, device, config):
+    """ 与 optimize_sequence 相同：一台设备的队列 → _BlockSequence """
+    minutes = queue["生产分钟"].to_numpy(dtype=np.int64)
+    due = pd.to_datetime(queue["预计交期"], errors="coerce").to_numpy().astype("datetime64[ns]")
+    has_due = ~np.isnat(due)
+    due_minute = np.where(has_due, due.astype(np.int64) // NS_PER_MINUTE, 0)
+    table = config.changeover_model.compile(device, queue["材料厚度"].to_numpy(), queue["材料材质"].to_numpy())
+    start_minute = to_minutes(config.start_times([device])[device])
+    return lambda: _block_sequence(queue, table, config.calendar_for(device), start_minute, minutes, has_due, due_minute)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_apply_matches_rebuild(seed):
+    # 换料规则不同，换料分钟不全相同；每一步都接受（不只是更好的），平移有正有负
+    config = ScheduleConfig(changeover_rules=[{"to_material": "不锈钢", "minutes": 45}])
+    orders = schedule(generate_orders(1500, seed=seed), config).orders
+    rng = random.Random(seed)
+    for device, queue in orders.groupby("设备", observed=True):
+        build = device_sequence(queue.reset_index(drop=True), device, config)
+        sequence, expected = build(), build()
+        for _ in range(300):
+            move = sequence.propose(rng, 16)
+            if move is None:
+                continue
+            lo, hi, segment = move
+            change = sequence.evaluate(lo, hi, segment)
+            key = sequence.key
+            sequence.apply(lo, hi, segment, change)
+
+            expected.sequence = list(sequence.sequence)
+            expected.rebuild()
+            for name in STATE:
+                assert getattr(sequence, name) == getattr(expected, name), name
+            assert tuple(a - b for a, b in zip(expected.key, key)) == change
+            for name in ARRAYS:
+                np.testing.assert_array_equal(getattr(sequence, name), getattr(expected, name), err_msg=name)
+
+
+def test_optimized_queue_matches_report():
+    config = ScheduleConfig()
+    orders = schedule(generate_orders(2000, seed=11), config).orders
+    queue = orders[orders["设备"] == "直管机"].reset_index(drop=True)
+    args = (queue, "直管机", config.calendar_for("直管机"), config.start_time, config.changeover_model, 60)
+    result, report = optimize_sequence(*args, seed=3, max_moves=20000)
+    again, _ = optimize_sequence(*args, seed=3, max_moves=20000)
+    pd.testing.assert_frame_equal(result, again)  # 相同的种子结果相同
+    assert sorted(result["订单编号"]) == sorted(queue["订单编号"])
+    assert report["接受次数"] > 0
+    assert (~result["按时交付检查"]).sum() == report["优化后逾期行数"] <= report["优化前逾期行数"]
+    assert result["是否换料"].sum() == report["优化后换料次数"]
@@ -0,0 +1,96 @@
+"""
+排产流程：各设备并行排产（device_workers > 1）与在当前进程依次排产的对照，合并后的结果必须逐行相同；
+组最早交期的分组、按设备判断是否换料。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate_orders import generate_orders
+from production_schedule import ScheduleConfig, schedule
+from production_schedule.pipeline import _schedule_queues
+
+
+def assert_same_result(serial, parallel):
+    pd.testing.assert_frame_equal(parallel.orders, serial.orders)
+    pd.testing.assert_frame_equal(parallel.project_delivery, serial.project_delivery)
+    pd.testing.assert_frame_equal(parallel.other, serial.other)
+
+
+@pytest.mark.parametrize("seed, settings", [
+    (0, {}),
+    (1, {"split_overdue": False}),
+    (2, {"device_start_times": {"异型管机2": "2025-03-21 13:30", "直管机": "2025-03-20 22:00"}}),
+    (3, {"changeover_rules": [{"to_material": "不锈钢", "minutes": 30}]}),
+    (4, {"split_overdue": False, "start_time": "2025-03-22 05:00"}),
+])
+def test_parallel_schedule_matches_serial(seed, settings):
+    df_original = generate_orders(1500, seed=seed)
+    serial = schedule(df_original, ScheduleConfig(**settings))
+    parallel = schedule(df_original, ScheduleConfig(device_workers=3, **settings))
+    assert_same_result(serial, parallel)
+
+
+def test_parallel_queues_match_serial():
+    rng = np.random.default_rng(5)
+    df = generate_orders(800, seed=5)
+    config = ScheduleConfig()
+    serial = schedule(df, config).orders
+    queues = {
+        device: serial[serial["设备"] == device].sample(frac=1, random_state=rng.integers(1 << 31))
+        for device in ["异型管机1", "异型管机2", "直管机"]
+    }
+
+    def copies():
+        return {device: queue.copy() for device, queue in queues.items()}
+
+    expected = _schedule_queues(copies(), config)
+    frames = _schedule_queues(copies(), ScheduleConfig(device_workers=2))
+    assert list(frames) == list(expected)
+    for device, frame in expected.items():
+        pd.testing.assert_frame_equal(frames[device], frame)
+
+
+
+def make_orders(rows):
+    """
+    手工订单。
+    :param rows: [(订单编号, 加工工艺, 材料厚度, 材料材质, 数量, 预计交期)]，数量同时作为未完成数量和生产件数
+    :return: DataFrame
+    """
+    df = pd.DataFrame(rows, columns=["订单编号", "加工工艺", "材料厚度", "材料材质", "未完成数量", "预计交期"])
+    df["生产件数"] = df["未完成数量"]
+    df["完成量"] = None
+    return df
+
+
+def device_queue(result, device):
+    orders = result.orders
+    return orders[orders["设备"] == device].set_index("订单编号")
+
+
+def test_group_due_date_is_per_device():
+    # 异型管机2 的 (1.2, 冷轧板) 组与直管机的 (0.5, 镀锌板) 组在各自设备内都是第 0 组，
+    # 组最早交期不能取到直管机的交期：无交期的 A1 排在有交期的 B1 之后
+    df = make_orders([
+        ("Z1", "直管", 0.5, "镀锌板", 90, "3.21 10:00"),
+        ("A1", "异型", 1.2, "冷轧板", 80, None),
+        ("B1", "异型", 1.5, "冷轧板", 80, "3.25 12:00"),
+    ])
+    for split_overdue in (True, False):
+        result = schedule(df, ScheduleConfig(split_overdue=split_overdue))
+        assert device_queue(result, "异型管机2").index.tolist() == ["B1", "A1"]
+
+
+def test_changeover_is_per_device():
+    # Y1、Z1、Y2 排序键相同、保持原顺序；Y2 与同设备的上一单 Y1 材料相同，不换料，紧接着开工
+    df = make_orders([
+        ("X1", "异型", 2.0, "冷轧板", 800, None),  # 先占满异型管机2，Y1 / Y2 分配给异型管机1
+        ("Y1", "异型", 0.5, "镀锌板", 50, None),
+        ("Z1", "直管", 0.5, "镀锌板", 90, None),
+        ("Y2", "异型", 0.5, "镀锌板", 50, None),
+    ])
+    for split_overdue in (True, False):
+        queue = device_queue(schedule(df, ScheduleConfig(split_overdue=split_overdue)), "异型管机1")
+        assert queue.index.tolist() == ["Y1", "Y2"]
+        assert queue.loc["Y2", "生产开始时间"] == queue.loc["Y1", "生产结束时间"]
@@ -0,0 +1,66 @@
+"""
+读取订单：流式解析（read_orders_streaming）与 pd.read_excel(dtype={"预计交期": str}) 的对照，
+以及快照保存的是转换后的存储类型（normalize_orders），命中快照时结果不变、排产结果与直接读表格相同。
+"""
+import datetime as dt
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from benchmarks.generate_orders import generate_orders
+from production_schedule import ScheduleConfig, read_orders, read_orders_streaming, schedule
+from production_schedule.reader import CACHE_DIR_NAME, ORDER_DTYPES
+
+
+def write_rows(path, rows):
+    wb = Workbook()
+    for row in rows:
+        wb.active.append(row)
+    wb.save(path)
+    return path
+
+
+EDGE_ROWS = [
+    ["订单编号", "数字", "混合", None, "订单编号", "日期", "预计交期", "NA文字", "布尔", "数字文字", "空列", "浮点"],
+    ["SO1", 1, 1, "x", "a", dt.datetime(2025, 3, 1), "3.22 15:00", "NA", True, "12", None, 1.5],
+    ["SO2", 2.0, "b", None, "b", dt.datetime(2025, 3, 2, 8), 3.22, "n/a", False, "3", None, 2.0],
+    ["SO3", None, None, "#N/A", None, None, None, "x", None, "4.5", None, None],
+    [None, 4, 2.5, "y", "c", dt.datetime(2025, 3, 3), "", "null", True, None, None, 3.25],
+    [],
+]
+
+
+@pytest.mark.parametrize("rows", [
+    EDGE_ROWS,
+    [["a", "b", "c", 5], [True, dt.datetime(2025, 1, 1), "001", 1], [False, "y", " 7 ", 2]],
+    [["订单编号", "预计交期"]],
+])
+def test_streaming_matches_read_excel(tmp_path, rows):
+    path = write_rows(tmp_path / "订单.xlsx", rows)
+    pd.testing.assert_frame_equal(read_orders_streaming(path), pd.read_excel(path, dtype=ORDER_DTYPES))
+
+
+def test_generated_orders_match_read_excel(tmp_path):
+    path = tmp_path / "订单.xlsx"
+    generate_orders(400, seed=2).to_excel(path, index=False)
+    pd.testing.assert_frame_equal(read_orders_streaming(path), pd.read_excel(path, dtype=ORDER_DTYPES))
+
+
+def test_snapshot_stores_normalized_frame(tmp_path):
+    path = tmp_path / "订单.xlsx"
+    generate_orders(600, seed=4).to_excel(path, index=False)
+    first = read_orders(path)
+    snapshots = list((tmp_path / CACHE_DIR_NAME).iterdir())
+    assert len(snapshots) == 1
+    for column in ["加工工艺", "材料材质"]:
+        assert isinstance(first[column].dtype, pd.CategoricalDtype)
+    hit = read_orders(path)
+    pd.testing.assert_frame_equal(hit, first)
+    pd.testing.assert_frame_equal(read_orders(path, cache=False), first)
+
+    expected = schedule(read_orders_streaming(path), ScheduleConfig())
+    result = schedule(hit, ScheduleConfig())
+    pd.testing.assert_frame_equal(result.orders, expected.orders)
+    pd.testing.assert_frame_equal(result.project_delivery, expected.project_delivery)
+    pd.testing.assert_frame_equal(result.other.astype(object), expected.other.astype(object))
@@ -0,0 +1,36 @@
+"""
+排产结果缓存：命中时结果与重新排产相同；缓存键含排产代码的版本；打开优化时不使用设备缓存。
+"""
+import pandas as pd
+
+from benchmarks.generate_orders import generate_orders
+from production_schedule import ResultCache, ScheduleConfig, schedule
+from production_schedule import result_cache
+
+
+def test_cached_result_matches_fresh(tmp_path):
+    df_original = generate_orders(600, seed=11)
+    config = ScheduleConfig()
+    cache = ResultCache(tmp_path)
+    fresh = schedule(df_original, config, cache)
+    cached = schedule(df_original, config, cache)
+    assert cache.hits == cache.misses > 0
+    pd.testing.assert_frame_equal(cached.orders, fresh.orders)
+
+
+def test_key_follows_code_version(tmp_path, monkeypatch):
+    assert result_cache.CACHE_VERSION == result_cache.code_version()
+    queue = generate_orders(50, seed=12)
+    cache, config = ResultCache(tmp_path), ScheduleConfig()
+    key = cache.device_key("直管机", queue, config)
+    assert cache.device_key("直管机", queue, config) == key
+    monkeypatch.setattr(result_cache, "CACHE_VERSION", "0" * 16)
+    assert cache.device_key("直管机", queue, config) != key
+
+
+def test_optimized_schedule_is_not_cached(tmp_path):
+    df_original = generate_orders(300, seed=13)
+    cache = ResultCache(tmp_path)
+    schedule(df_original, ScheduleConfig(optimize_seconds=0.05), cache)
+    assert cache.hits == cache.misses == 0
+    assert not list(tmp_path.glob("*.pkl"))
@@ -0,0 +1,174 @@
+"""
+批量计算开始 / 结束时间（schedule_queue / compute_schedule）与原脚本逐行 iterrows 循环的对照。
+
+baseline_queue 是 3.22 版本脚本里“计算生产开始时间 & 结束时间”循环的原样拷贝（只把设备循环换成一条队列），
+get_next_available_shift / is_in_break_time 也原样保留，只有两处补充：
+- 0 分钟的订单在原脚本里会因 segments 为空报 IndexError，这里按“跳过休息时间后开工即完工”补全；
+- 开工时间（含换料）落在凌晨 00:00 - 08:00 时，原脚本会直接在夜里开工。班次日历把凌晨按休息处理
+  （见 shift_calendar.py），所以 is_in_break_time 多了凌晨这一段休息。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from production_schedule import DEFAULT_WORK_SHIFTS, ShiftCalendar, compute_schedule, from_minutes, to_minutes
+from production_schedule.scheduling import schedule_queue
+
+# **📌 原脚本的班次和休息时间**
+work_shifts = [
+    ("08:00", "12:00"),
+    ("13:30", "17:30"),
+    ("18:00", "21:00")
+]
+break_times = [
+    ("12:00", "13:30"),
+    ("17:30", "18:00"),
+    ("21:00", "08:00")  # 跨天休息
+]
+
+
+def get_next_available_shift(current_time):
+    current_day = current_time.date()
+    for start, end in work_shifts:
+        shift_start = pd.Timestamp(f"{current_day} {start}")
+        shift_end = pd.Timestamp(f"{current_day} {end}")
+        if shift_end.hour == 8:
+            shift_end += pd.Timedelta(days=1)
+        if current_time < shift_end:
+            available_minutes = max(0, (shift_end - max(current_time, shift_start)).seconds // 60)
+            return shift_start, shift_end, available_minutes
+    next_day = current_day + pd.Timedelta(days=1)
+    return pd.Timestamp(f"{next_day} 08:00"), pd.Timestamp(f"{next_day} 12:00"), 240
+
+
+def is_in_break_time(time):
+    if time.hour < 8:  # 班次日历：凌晨 00:00 - 08:00 同样视为休息（原脚本没有这一段）
+        return time.normalize() + pd.Timedelta(hours=8)
+    current_day = time.date()
+    for start, end in break_times:
+        break_start = pd.Timestamp(f"{current_day} {start}")
+        break_end = pd.Timestamp(f"{current_day} {end}")
+        if break_end.hour == 8:
+            break_end += pd.Timedelta(days=1)
+        if break_start <= time < break_end:
+            return break_end
+    return None
+
+
+def baseline_queue(last_end_time, minutes, changeovers):
+    """
+    原脚本的逐行循环。
+    :param last_end_time: 设备上次结束时间
+    :param minutes: 每单生产分钟数
+    :param changeovers: 每单是否换料
+    :return: [(生产开始时间, 生产结束时间)]
+    """
+    rows = []
+    for total_minutes, changeover in zip(minutes, changeovers):
+        start_time = last_end_time
+        # **📌 如果需要换料，增加 15 分钟**
+        if changeover:
+            start_time += pd.Timedelta(minutes=15)
+        remaining_time = total_minutes
+        segments = []
+
+        while remaining_time > 0:
+            # **📌 检查是否在休息时间**
+            break_end = is_in_break_time(start_time)
+            if break_end:
+                start_time = break_end
+
+            # **📌 获取当前班次**
+            shift_start, shift_end, available_minutes = get_next_available_shift(start_time)
+            production_time = min(remaining_time, available_minutes)
+            end_time = start_time + pd.Timedelta(minutes=production_time)
+
+            segments.append((start_time, end_time))
+            remaining_time -= production_time
+            start_time = end_time + pd.Timedelta(minutes=1)
+
+        if not segments:  # 原脚本在这里报错：0 分钟的订单跳过休息时间后开工即完工
+            start_time = is_in_break_time(start_time) or start_time
+            segments.append((start_time, start_time))
+        rows.append((segments[0][0], segments[-1][1]))
+        last_end_time = segments[-1][1]
+    return rows
+
+
+def vectorized_queue(last_end_time, minutes, changeovers):
+    """ schedule_queue 的结果，换成与 baseline_queue 相同的格式 """
+    calendar = ShiftCalendar(DEFAULT_WORK_SHIFTS)
+    starts, ends = schedule_queue(
+        calendar, to_minutes(last_end_time), np.asarray(minutes), np.asarray(changeovers, dtype=np.int64) * 15,
+    )
+    return [(from_minutes(start), from_minutes(end)) for start, end in zip(starts, ends)]
+
+
+def random_queue(rng):
+    """ 随机队列：开工时间覆盖全天，约 1/5 为 0 分钟的订单，约 2/5 需要换料 """
+    n = int(rng.integers(1, 25))
+    start = pd.Timestamp("2025-03-21") + pd.Timedelta(minutes=int(rng.integers(0, 24 * 60)))
+    minutes = rng.integers(0, 600, n)
+    minutes[rng.random(n) < 0.2] = 0
+    changeovers = rng.random(n) < 0.4
+    return start, minutes.tolist(), changeovers.tolist()
+
+
+@pytest.mark.parametrize("seed", range(400))
+def test_random_queues_match_row_loop(seed):
+    start, minutes, changeovers = random_queue(np.random.default_rng(seed))
+    expected = baseline_queue(start, minutes, changeovers)
+    assert vectorized_queue(start, minutes, changeovers) == expected
+
+
+@pytest.mark.parametrize("start, minutes, changeovers", [
+    # 换料 15 分钟跨过午休、晚饭、夜休
+    ("2025-03-21 11:50", [10, 30], [True, True]),
+    ("2025-03-21 17:20", [5, 60], [False, True]),
+    ("2025-03-21 20:50", [0, 45, 20], [True, True, False]),
+    ("2025-03-21 11:45", [0, 0, 15], [True, False, True]),
+    # 正好在班次结束时完工，下一单换料
+    ("2025-03-21 08:00", [240, 240, 180, 30], [False, True, True, True]),
+    # 凌晨开工
+    ("2025-03-21 00:00", [30, 600], [False, True]),
+    ("2025-03-21 03:20", [234, 0, 15], [True, False, True]),
+    ("2025-03-21 07:59", [1, 1], [False, False]),
+    # 0 分钟的订单
+    ("2025-03-21 12:00", [0], [False]),
+    ("2025-03-21 21:00", [0, 0], [False, True]),
+])
+def test_edge_cases_match_row_loop(start, minutes, changeovers):
+    start = pd.Timestamp(start)
+    expected = baseline_queue(start, minutes, changeovers)
+    assert vectorized_queue(start, minutes, changeovers) == expected
+
+
+def test_early_morning_start_waits_for_first_shift():
+    rows = vectorized_queue(pd.Timestamp("2025-03-21 03:20"), [234], [False])
+    assert rows == [(pd.Timestamp("2025-03-21 08:00"), pd.Timestamp("2025-03-21 11:54"))]
+
+
+def test_compute_schedule_matches_row_loop_per_device():
+    rng = np.random.default_rng(0)
+    frames, expected, last_end_time = [], {}, {}
+    for device in ["直管机", "异型管机1", "异型管机2"]:
+        start, minutes, changeovers = random_queue(rng)
+        frames.append(pd.DataFrame({
+            "设备": device, "生产分钟": minutes, "换料分钟": np.asarray(changeovers, dtype=np.int64) * 15,
+        }))
+        expected[device] = baseline_queue(start, minutes, changeovers)
+        last_end_time[device] = start
+    # 各设备的订单随机交错（设备内的先后不变），compute_schedule 按设备分别计算
+    labels = np.repeat(np.arange(len(frames)), [len(frame) for frame in frames])
+    rng.shuffle(labels)
+    offsets = np.cumsum([0] + [len(frame) for frame in frames])
+    order = np.empty(len(labels), dtype=np.int64)
+    for k, frame in enumerate(frames):
+        order[labels == k] = offsets[k] + np.arange(len(frame))
+    df = pd.concat(frames, ignore_index=True).take(order).reset_index(drop=True)
+    compute_schedule(df, ShiftCalendar(DEFAULT_WORK_SHIFTS), last_end_time)
+
+    for device, rows in expected.items():
+        queue = df[df["设备"] == device]
+        assert list(zip(queue["生产开始时间"], queue["生产结束时间"])) == rows
+        assert last_end_time[device] == rows[-1][1]
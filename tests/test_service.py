@@ -0,0 +1,118 @@
+"""
+排产服务：请求格式不对（config 参数、订单列、Content-Length、chunked 请求体）时返回 400，
+排产出错时返回 500，--serve 0 也会启动服务。
+"""
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.generate_orders import generate_orders
+from production_schedule import RequestError, ScheduleConfig, ScheduleService, cli, schedule, service
+from production_schedule.pipeline import order_columns
+from production_schedule.service import orders_frame, schedule_request
+
+
+class _Writer:
+    """ 记录写出内容的 StreamWriter 替身 """
+
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def respond(raw):
+    """ 把原始请求交给 ScheduleService.handle，返回 (状态码, 响应 JSON) """
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        writer = _Writer()
+        await ScheduleService().handle(reader, writer)
+        return writer.data
+
+    head, _, body = asyncio.run(run()).partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(body)
+
+
+@pytest.mark.parametrize("overrides", [
+    {"work_shifts": 5},
+    {"changeover_rules": [{"minutes": 10, "unknown": 1}]},
+    {"machines": [{"rate": 3}]},
+    {"device_start_times": 5},
+    {"start_time": "不是时间"},
+    {"split_placement": "end"},
+])
+def test_bad_config_is_request_error(overrides):
+    body = json.dumps({"orders": [], "config": overrides}).encode("utf-8")
+    with pytest.raises(RequestError, match="config 参数不对"):
+        schedule_request(body, ScheduleConfig())
+
+
+def test_order_columns_are_what_schedule_needs():
+    # 只有 order_columns() 这些列也能排产，少任何一列排产都会出错
+    df = generate_orders(60, seed=0)
+    columns = order_columns()
+    assert set(columns) == {"订单编号", "加工工艺", "材料厚度", "材料材质", "未完成数量", "生产件数", "预计交期", "完成量"}
+    schedule(df[columns], ScheduleConfig())
+    for column in columns:
+        with pytest.raises(KeyError):
+            schedule(df[columns].drop(columns=column), ScheduleConfig())
+        with pytest.raises(RequestError, match=column):
+            orders_frame(json.loads(df[columns].drop(columns=column).to_json(orient="records", force_ascii=False)))
+
+
+@pytest.mark.parametrize("body, message", [
+    (b"{", "JSON"),
+    (b"[]", "JSON 对象"),
+    (json.dumps({"orders": [{"订单编号": "SO1"}]}).encode("utf-8"), "订单缺少列"),
+])
+def test_bad_request_is_400(body, message):
+    raw = b"POST /schedule HTTP/1.1\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+    status, payload = respond(raw)
+    assert status == 400
+    assert message in payload["error"]
+
+
+def test_schedule_error_is_500(monkeypatch):
+    def fail(df, config):
+        raise ValueError("排产内部错误")
+
+    monkeypatch.setattr(service, "schedule", fail)
+    body = json.dumps({"orders": []}).encode("utf-8")
+    status, payload = respond(b"POST /schedule HTTP/1.1\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+    assert status == 500
+    assert "排产内部错误" in payload["error"]
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b""])
+def test_bad_content_length_is_400(length):
+    status, payload = respond(b"POST /schedule HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}")
+    assert status == 400
+    assert "Content-Length" in payload["error"]
+
+
+def test_chunked_body_is_400():
+    raw = b"POST /schedule HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n2\r\n{}\r\n0\r\n\r\n"
+    status, payload = respond(raw)
+    assert status == 400
+    assert "chunked" in payload["error"]
+
+
+def test_health():
+    assert respond(b"GET /health HTTP/1.1\r\n\r\n")[0] == 200
+
+
+def test_serve_zero_starts_service(monkeypatch):
+    started = []
+    monkeypatch.setattr(cli.ScheduleService, "run", lambda self: started.append(self.port))
+    assert cli.main(["--serve", "0"]) == 0
+    assert started == [0]
@@ -0,0 +1,104 @@
+"""
+排序分组（sort_orders 的一次 np.lexsort）与原来的排序链的对照。
+
+baseline_sort_orders 是改成一次 lexsort 之前的 sort_orders 原样拷贝：
+groupby().transform 求组最早交期，两段 sort_values（exclusive_first 的设备在后），再逐台设备 groupby().ngroup() 编组。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate_orders import generate_orders
+from production_schedule import assign_devices
+from production_schedule.changeover import mark_changeovers
+from production_schedule.due_dates import parse_due_dates
+from production_schedule.machines import MachineRegistry
+from production_schedule.pipeline import FRONT_COLUMN, SORT_COLUMNS, prepare_orders, sort_orders
+from production_schedule.splitting import NO_DUE_DATE
+
+SORT_ASCENDING = [True, True, True, False, True]
+REFERENCE = pd.Timestamp("2025-03-21 08:00")
+
+
+def _sort_positions(df, positions, by, ascending):
+    """ df 中 positions 这些行按 by 排序后的行位置（稳定排序） """
+    keys = df[by].iloc[positions].reset_index(drop=True)
+    return positions[keys.sort_values(by=by, ascending=ascending).index.to_numpy()]
+
+
+def baseline_sort_orders(df, reference=None, changeover_model=None, machines=None):
+    """ 原来的排序链 """
+    registry = machines if isinstance(machines, MachineRegistry) else MachineRegistry(machines)
+    # 📌 交期转换，填充 NaT 为 2100-01-01，确保无交期的订单排在最后
+    df["预计交期"] = parse_due_dates(df["预计交期"], reference)
+    df["交期排序"] = df["预计交期"].fillna(NO_DUE_DATE)
+    # 📌 标记是否有交期 (1: 有交期, 0: 无交期)
+    df["是否有交期"] = (df["交期排序"] < NO_DUE_DATE).to_numpy()
+
+    # 📌 计算组的最早交期：组 = 同一设备、厚度、材质
+    df["组最早交期"] = df.groupby(["设备", "材料厚度", "材料材质"], dropna=False, observed=True)["交期排序"].transform("min")
+    only_machine = np.zeros(len(df), dtype=bool)
+    devices = df["设备"].to_numpy()
+    for device in pd.unique(devices):
+        positions = np.flatnonzero(devices == device)
+        only_machine[positions] = registry.only_machine(
+            device, df["材料厚度"].to_numpy()[positions], df["材料材质"].to_numpy()[positions],
+        )
+    df[FRONT_COLUMN] = only_machine
+
+    # 📌 排序：保证相同材质 & 厚度的订单在一起，同时组外按交期排序
+    # **📌 exclusive_first 设备（异型管机2）其他设备不可生产的订单优先**
+    is_front = df["设备"].isin(registry.exclusive_first_names).to_numpy()
+    order = np.concatenate((
+        _sort_positions(df, np.flatnonzero(~is_front), SORT_COLUMNS, SORT_ASCENDING),
+        _sort_positions(df, np.flatnonzero(is_front), [FRONT_COLUMN] + SORT_COLUMNS, [False] + SORT_ASCENDING),
+    ))
+    df = df.take(order)
+    df.index = pd.RangeIndex(len(df))
+
+    # **📌 组1：设备内相同厚度 & 材质的订单为一组；组2：按队列顺序从 0 开始编号**
+    df["组1"] = -1
+    df["组2"] = -1
+    for device in df["设备"].unique():
+        mask = df["设备"] == device
+        device_df = df.loc[mask, ["材料厚度", "材料材质"]]
+        group1 = device_df.groupby(["材料厚度", "材料材质"], dropna=False, observed=True).ngroup()
+        df.loc[mask, "组1"] = group1
+        df.loc[mask, "组2"] = pd.factorize(group1)[0]
+
+    return mark_changeovers(df, changeover_model)
+
+
+def assigned_orders(df_original):
+    """ 与 schedule 相同：预处理、分配设备，去掉未分配的订单 """
+    df, _ = prepare_orders(df_original)
+    registry = MachineRegistry()
+    df["设备"] = pd.Categorical(assign_devices(df, registry), categories=registry.names)
+    return df[df["设备"].notna()].reset_index(drop=True)
+
+
+def assert_same_order(df):
+    expected = baseline_sort_orders(df.copy(), REFERENCE)
+    result = sort_orders(df.copy(), REFERENCE)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_generated_orders_match_sort_chain(seed):
+    n = int(np.random.default_rng(seed).integers(20, 2000))
+    assert_same_order(assigned_orders(generate_orders(n, seed=seed)))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ties_and_missing_values_match_sort_chain(seed):
+    # 少量交期、材质和厚度，大量相同的排序键；部分缺失交期和厚度
+    rng = np.random.default_rng(seed)
+    df = generate_orders(600, seed=seed)
+    df["预计交期"] = rng.choice(["3.22 8:00", "3.25 13:30", "4.1 9:30", None], len(df))
+    df.loc[rng.random(len(df)) < 0.03, "材料厚度"] = np.nan
+    assert_same_order(assigned_orders(df))
+
+
+def test_single_device_matches_sort_chain():
+    df = assigned_orders(generate_orders(300, seed=7))
+    assert_same_order(df[df["设备"] == "异型管机2"].reset_index(drop=True))
@@ -0,0 +1,294 @@
+"""
+拆分标记（split_marks / debug_move_orders）与原脚本逐单往前找的 debug_move_orders 的对照，
+拆分后的重新排序（placement="group"）与 3.22 版本脚本的对照，
+以及只处理后缀的拆分循环（_resolve_device）与每轮整队重做的循环的对照。
+
+baseline_debug_move_orders 是 3.22 版本脚本里 debug_move_orders 标记‘是否拆分’一段的原样拷贝；
+baseline_resort 是 3.22 版本 debug_move_orders 的拼接、sort_by_due_status 和重新判断换料的原样拷贝；
+full_rounds_resolve_device 是改成只处理后缀之前的 _resolve_device（placement="tail"）。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate_orders import generate_orders
+from production_schedule import ScheduleConfig, assign_devices
+from production_schedule.pipeline import prepare_orders, sort_orders
+from production_schedule.scheduling import compute_schedule, production_minutes, schedule_queue
+from production_schedule.shift_calendar import NS_PER_MINUTE, to_minutes
+from production_schedule.splitting import NO_DUE_DATE, _resolve_device, debug_move_orders, split_marks
+
+
+def baseline_debug_move_orders(df_group):
+    """
+    原脚本的逐单往前找。
+    :param df_group: 单台设备的订单（含 组2、交期排序、按时交付检查）
+    :return: 布尔 Series（index 同 df_group），True 表示需要拆分
+    """
+    df_copy = df_group.copy()
+    df_copy['按时交付检查'] = df_copy['按时交付检查'].fillna('').astype(str).str.strip()
+    df_copy['组2'] = pd.to_numeric(df_copy['组2'], errors='coerce')
+    df_copy['是否拆分'] = '否'  # 默认值
+
+    overdue_orders = df_copy[df_copy['按时交付检查'] == '逾期交付']
+    split_orders = set()
+
+    for index, row in overdue_orders.iterrows():
+        group2_id = row['组2']
+        prev_group2_id = group2_id - 1
+        prev_group_orders = pd.DataFrame()  # ✅ 先初始化为空 DataFrame，防止未定义错误
+
+        while prev_group2_id >= 0:  # 继续往前找，直到组2 == 0
+            prev_group_orders = df_copy[df_copy['组2'] == prev_group2_id]  # 每次循环更新
+
+            if prev_group_orders.empty:  # 如果当前组是空的，继续往前找
+                prev_group2_id -= 1
+                continue
+
+            fixed_date_orders = prev_group_orders[prev_group_orders['交期排序'] == pd.Timestamp("2100-01-01")]
+
+            if not fixed_date_orders.empty:  # 如果找到符合条件的订单，就停止循环
+                split_orders.update(fixed_date_orders.index.tolist())
+                break  # 找到了就不继续查找
+
+            prev_group2_id -= 1  # 否则继续往前找
+
+        if prev_group_orders.empty:
+            continue
+
+        # 确保 "交期排序" 为时间格式
+        df_copy['交期排序'] = pd.to_datetime(df_copy['交期排序'], errors='coerce')
+
+        # 过滤 交期排序=2100-01-01 的订单
+        fixed_date_orders = prev_group_orders[prev_group_orders['交期排序'] == pd.Timestamp("2100-01-01")]
+
+        split_orders.update(fixed_date_orders.index.tolist())
+
+    df_copy.loc[df_copy.index.isin(split_orders), '是否拆分'] = '是'
+    return df_copy['是否拆分'] == '是'
+
+
+def random_group(rng):
+    """ 随机设备子表：组2 含缺失和负数，约 1/3 无交期、1/4 逾期，index 打乱 """
+    n = int(rng.integers(1, 60))
+    groups = rng.integers(-2, 12, n).astype(float)
+    groups[rng.random(n) < 0.1] = np.nan
+    fixed_date = rng.random(n) < 0.35
+    overdue = rng.random(n) < 0.25
+    return pd.DataFrame({
+        "组2": groups,
+        "交期排序": np.where(fixed_date, NO_DUE_DATE, pd.Timestamp("2025-04-01")),
+        "按时交付检查": np.where(overdue, "逾期交付", "按时交付"),
+    }, index=rng.permutation(n) * 3 + 7)
+
+
+@pytest.mark.parametrize("seed", range(500))
+def test_random_groupings_match_walk_back(seed):
+    df_group = random_group(np.random.default_rng(seed))
+    expected = baseline_debug_move_orders(df_group)
+    pd.testing.assert_series_equal(debug_move_orders(df_group), expected, check_names=False)
+
+
+@pytest.mark.parametrize("groups, fixed_date, overdue, expected", [
+    # 中间的组没有无交期订单，继续往前找
+    ([0, 1, 2, 3], [True, False, False, False], [False, False, False, True], [True, False, False, False]),
+    # 组号不连续（缺 1、2），跳过空组
+    ([0, 3, 3], [True, False, True], [False, True, False], [True, False, False]),
+    # 只找最近的一组，同组的无交期订单全部拆分
+    ([0, 1, 1, 2], [True, True, True, False], [False, False, False, True], [False, True, True, False]),
+    # 组2 = 0 的逾期订单前面没有组；逾期订单本身无交期也不拆自己
+    ([0, 0], [True, True], [True, True], [False, False]),
+    # 缺失 / 负数的组2 既不会往前找，也不会被找到
+    ([np.nan, -1, 0, np.nan], [True, True, False, False], [False, False, True, True], [False, False, False, False]),
+    ([-1, 1], [True, False], [False, True], [False, False]),
+])
+def test_edge_cases_match_walk_back(groups, fixed_date, overdue, expected):
+    df_group = pd.DataFrame({
+        "组2": groups,
+        "交期排序": np.where(fixed_date, NO_DUE_DATE, pd.NaT),
+        "按时交付检查": np.where(overdue, "逾期交付", "按时交付"),
+    })
+    assert baseline_debug_move_orders(df_group).tolist() == expected
+    assert split_marks(groups, fixed_date, overdue).tolist() == expected
+
+
+def full_rounds_resolve_device(queue, calendar, start_minute, changeovers, max_rounds):
+    """ 每一轮整队标记、整队排序的拆分循环（只处理后缀之前的 _resolve_device） """
+    n = len(queue)
+    minutes = queue["生产分钟"].to_numpy(dtype=np.int64)
+    thickness = queue["材料厚度"].to_numpy()
+    material = queue["材料材质"].to_numpy()
+    groups = pd.to_numeric(queue["组2"]).to_numpy().astype(np.int64)
+    due = pd.to_datetime(queue["预计交期"], errors="coerce")
+    has_due = due.notna().to_numpy()
+    due_minute = np.where(has_due, due.to_numpy().astype("datetime64[ns]").astype(np.int64) // NS_PER_MINUTE, 0)
+    fixed_date = (pd.to_datetime(queue["交期排序"], errors="coerce") == NO_DUE_DATE).to_numpy()
+
+    order = np.arange(n)  # 当前队列顺序（queue 的行位置）
+    moved = np.zeros(n, dtype=bool)  # 已拆分移到队尾
+    priority = np.zeros(n, dtype=bool)  # 曾经逾期：组内提前
+
+    flags, changeover_minutes = changeovers.changeovers(order)
+    starts, ends = schedule_queue(calendar, start_minute, minutes, changeover_minutes)
+    overdue = has_due & (due_minute < ends)
+
+    for _ in range(max_rounds):
+        # **📌 1. 标记拆分：逾期订单前最近一个含无交期订单的组2**
+        split = split_marks(groups[order], fixed_date[order] & ~moved[order], overdue)
+        promoted = overdue & ~priority[order]
+        if not split.any() and not promoted.any():
+            break  # 不动点：没有可拆分的订单，也没有新的逾期订单需要提前
+        moved[order[split]] = True
+        priority[order[overdue]] = True
+
+        # **📌 2. 重新排序：未拆分的订单按组2、组内逾期优先；拆分的订单移到最后，按材质 + 厚度排序**
+        current_moved = moved[order]
+        head = order[~current_moved]
+        head = head[np.lexsort((~priority[head], groups[head]))]
+        tail = order[current_moved]
+        material_code = pd.factorize(material[tail], sort=True)[0]
+        tail = tail[np.lexsort((thickness[tail], material_code))]
+        if len(tail):
+            # 拆分订单重新编组2，接在原有组号之后
+            tail_keys = pd.Series(list(zip(material[tail], thickness[tail])))
+            base = groups[head].max() + 1 if len(head) else 0
+            groups[tail] = base + pd.factorize(tail_keys)[0]
+        new_order = np.concatenate((head, tail))
+
+        changed = np.flatnonzero(new_order != order)
+        if changed.size == 0:
+            continue
+        first = changed[0]
+        order = new_order
+
+        # **📌 3. 只重算后缀：是否换料 + 生产开始 / 结束时间 + 是否逾期**
+        suffix = order[first:]
+        prev = order[first - 1] if first > 0 else None
+        flags[first:], changeover_minutes[first:] = changeovers.changeovers(suffix, prev)
+        suffix_start = ends[first - 1] if first > 0 else start_minute
+        starts[first:], ends[first:] = schedule_queue(
+            calendar, suffix_start, minutes[suffix], changeover_minutes[first:]
+        )
+        overdue[first:] = has_due[suffix] & (due_minute[suffix] < ends[first:])
+
+    result = queue.take(order)  # 按新顺序取一次整张表
+    result.index = pd.RangeIndex(n)
+    result["组2"] = groups[order]
+    result["是否换料"] = flags
+    result["换料分钟"] = changeover_minutes
+    result["生产开始时间"] = (starts * NS_PER_MINUTE).astype("datetime64[ns]")
+    result["生产结束时间"] = (ends * NS_PER_MINUTE).astype("datetime64[ns]")
+    result["按时交付检查"] = ~overdue
+    result["是否拆分"] = moved[order]
+    return result
+
+
+def device_queues(df_original, config):
+    """ 与 schedule_device 相同：分配设备、排序分组、计算生产时间，得到各设备拆分前的队列 """
+    registry = config.registry
+    df, _ = prepare_orders(df_original)
+    df["设备"] = pd.Categorical(assign_devices(df, registry), categories=registry.names)
+    df = df[df["设备"].notna()]
+    for device in sorted(df["设备"].unique(), key=str):
+        queue = sort_orders(df[df["设备"] == device].copy(), config.start_time, config.changeover_model, registry)
+        queue["生产分钟"] = production_minutes(queue, registry.rates)
+        compute_schedule(queue, config.calendar, config.start_times([device]))
+        yield device, queue
+
+
+def assert_same_splits(df_original, config, max_rounds=1000):
+    for device, queue in device_queues(df_original, config):
+        args = (
+            config.calendar, to_minutes(config.start_time),
+            config.changeover_model.compile(device, queue["材料厚度"].to_numpy(), queue["材料材质"].to_numpy()),
+            max_rounds,
+        )
+        expected = full_rounds_resolve_device(queue, *args)
+        pd.testing.assert_frame_equal(_resolve_device(queue, *args, device, "tail"), expected)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_suffix_rounds_match_full_rounds(seed):
+    n = int(np.random.default_rng(seed).integers(50, 1500))
+    assert_same_splits(generate_orders(n, seed=seed), ScheduleConfig())
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_suffix_rounds_match_full_rounds_with_ties_and_missing_thickness(seed):
+    # 交期集中、部分缺少厚度，换料规则不同：逾期多、队尾有厚度缺失的订单
+    rng = np.random.default_rng(seed)
+    df = generate_orders(800, seed=seed)
+    df["预计交期"] = rng.choice(["3.21 17:00", "3.22 8:00", "3.24 13:30", None, None], len(df))
+    df.loc[rng.random(len(df)) < 0.05, "材料厚度"] = np.nan
+    config = ScheduleConfig(changeover_rules=[{"to_material": "不锈钢", "minutes": 45}])
+    assert_same_splits(df, config)
+
+
+def test_max_rounds_stops_at_the_same_point_and_warns(capsys):
+    df = generate_orders(600, seed=3)
+    assert_same_splits(df, ScheduleConfig(), max_rounds=2)
+    assert "拆分逾期订单达到 2 轮上限" in capsys.readouterr().out
+
+
+def baseline_resort(df_copy, split_orders):
+    """
+    3.22 版本拆分一轮之后的重新排序和重新判断换料。
+    :param df_copy: 单台设备的订单（含 组2、按时交付检查（'按时交付' / '逾期交付'））
+    :param split_orders: 需要拆分的行（df_copy 的 index）
+    :return: 新顺序的 DataFrame（是否换料 为 '是' / '否'）
+    """
+    df_copy = df_copy.copy()
+    df_copy['是否拆分'] = '否'
+    df_copy.loc[df_copy.index.isin(split_orders), '是否拆分'] = '是'
+    # ✅ 拆分为两个部分：
+    df_not_split = df_copy[df_copy['是否拆分'] == '否']  # ❌ 不需要拆分的订单（保持原顺序）
+    df_split = df_copy[df_copy['是否拆分'] == '是'].sort_values(
+        by=['材料材质', '材料厚度'], ascending=[True, True]  # ✅ 需要拆分的订单（材质+厚度排序）
+    )
+    # ✅ 按原索引顺序合并
+    df = pd.concat([df_not_split, df_split]).reset_index(drop=True)
+
+    # **📌 在每个 设备 + 组2 内部，把 '逾期交付' 的订单排在最前面**
+    df = df.sort_values(by=["组2", "按时交付检查"], ascending=[True, False]).reset_index(drop=True)
+
+    # **📌 重新判断是否需要换料**
+    df["是否换料"] = (
+        df["设备"].ne(df["设备"].shift()) |
+        df["材料厚度"].ne(df["材料厚度"].shift()) |
+        df["材料材质"].ne(df["材料材质"].shift())
+    ).map({True: "是", False: "否"})
+    return df
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_group_placement_matches_322(seed):
+    rng = np.random.default_rng(seed)
+    df = generate_orders(int(rng.integers(100, 1200)), seed=seed)
+    df["预计交期"] = rng.choice(["3.21 17:00", "3.22 8:00", "3.24 13:30", None, None], len(df))
+    config = ScheduleConfig()
+    calendar = config.calendar
+    for device, queue in device_queues(df, config):
+        queue = queue.reset_index(drop=True).assign(行号=np.arange(len(queue)))
+        due = pd.to_datetime(queue["预计交期"], errors="coerce")
+        queue["按时交付检查"] = np.where(due.notna() & (due < queue["生产结束时间"]), "逾期交付", "按时交付")
+        split = debug_move_orders(queue)
+        expected = baseline_resort(queue, queue.index[split])
+
+        # **📌 3.22 重新计算生产时间：换料加 15 分钟，从设备开工时间开始**
+        changeover_minutes = np.where(expected["是否换料"] == "是", 15, 0)
+        starts, ends = schedule_queue(
+            calendar, to_minutes(config.start_time), expected["生产分钟"].to_numpy(dtype=np.int64), changeover_minutes
+        )
+        expected_due = pd.to_datetime(expected["预计交期"], errors="coerce").to_numpy().astype("datetime64[ns]")
+        expected_end = (ends * NS_PER_MINUTE).astype("datetime64[ns]")
+
+        changeovers = config.changeover_model.compile(device, queue["材料厚度"].to_numpy(), queue["材料材质"].to_numpy())
+        result = _resolve_device(queue, calendar, to_minutes(config.start_time), changeovers, 1, device, "group")
+        assert result["行号"].tolist() == expected["行号"].tolist()
+        assert result["组2"].tolist() == expected["组2"].tolist()
+        assert result["是否换料"].tolist() == (expected["是否换料"] == "是").tolist()
+        assert result["生产开始时间"].tolist() == list((starts * NS_PER_MINUTE).astype("datetime64[ns]"))
+        assert result["生产结束时间"].tolist() == list(expected_end)
+        overdue = ~np.isnat(expected_due) & (expected_due < expected_end)
+        assert result["按时交付检查"].tolist() == (~overdue).tolist()
+        assert result["是否拆分"].tolist() == (expected["是否拆分"] == "是").tolist()